@@ -0,0 +1,36 @@
+"""End-to-end IntegratedAdversarialLoop runs against a latency-injecting mock model client."""
+import logging
+import time
+
+from benchmarks.harness import benchmark
+from src.integrated_loop import IntegratedAdversarialLoop
+
+class LatencyClient:
+    """Mock model client that sleeps `latency` seconds per call and returns a fixed-size reply."""
+
+    def __init__(self, latency: float = 0.0, response_chars: int = 400):
+        self.latency = latency
+        self.response = "x" * response_chars
+        self.calls = 0
+
+    def generate(self, prompt: str) -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self.response
+
+@benchmark("loop.run_iteration", agents=[3, 8], latency_ms=[0, 2])
+def run_iteration(agents, latency_ms):
+    logging.getLogger("src").setLevel(logging.WARNING)
+    configs = [
+        {"id": f"agent_{i}", "domain": f"domain_{i}", "morphology": {"expertise": f"group_{i % 2}"}}
+        for i in range(agents)
+    ]
+    client = LatencyClient(latency_ms / 1000)
+
+    def run():
+        loop = IntegratedAdversarialLoop(
+            configs, "Expert reference.", max_iterations=3, model_client=client, agent_model_client=client, seed=0
+        )
+        return loop.run_iteration("Benchmark query")
+    return run
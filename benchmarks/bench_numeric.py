@@ -0,0 +1,48 @@
+"""Microbenchmarks for the numeric core: diffusion sampling, OMAD coordination, grouping, blackboard."""
+import numpy as np
+
+from benchmarks.harness import benchmark
+from src.blackboard import Blackboard
+from src.diffusion import DiffusionPolicy
+from src.grouping import EmbodimentGrouper
+from src.omad import OMADOrchestrator
+
+def agent_metadata(num_agents: int, num_groups: int):
+    return [
+        {"id": f"agent_{i}", "domain": f"domain_{i}", "morphology": {"expertise": f"group_{i % num_groups}"}}
+        for i in range(num_agents)
+    ]
+
+@benchmark("diffusion.sample_action", horizon=[1, 16], action_dim=[1, 8], steps=[5, 50])
+def sample_action(horizon, action_dim, steps):
+    policy = DiffusionPolicy(
+        action_dim=action_dim, horizon=horizon, num_diffusion_steps=steps, rng=np.random.default_rng(0)
+    )
+    return lambda: policy.sample_action("benchmark context")
+
+@benchmark("omad.coordinate", agents=[4, 32, 128], groups=[1, 4, 16])
+def coordinate(agents, groups):
+    metadata = agent_metadata(agents, groups)
+    policies = {m["id"]: DiffusionPolicy(action_dim=4, horizon=8, rng=np.random.default_rng(0)) for m in metadata}
+    orchestrator = OMADOrchestrator(policies, agent_metadata=metadata, replay_capacity=0)
+    rng = np.random.default_rng(0)
+    trajectories = {aid: rng.standard_normal((8, 4)) for aid in policies}
+    return lambda: orchestrator.coordinate(trajectories)
+
+@benchmark("grouping.perform_grouping", agents=[10, 100, 1000])
+def perform_grouping(agents):
+    grouper = EmbodimentGrouper(agent_metadata(agents, 8))
+    return grouper.perform_grouping
+
+@benchmark("blackboard.render", entries=[10, 100, 1000], token_budget=[None, 512])
+def blackboard_render(entries, token_budget):
+    # One round of posting followed by the prompt view, as the environment does per agent
+    contents = [f"Step {i}: reasoning about clause {i % 7} and its exceptions. " * 4 for i in range(entries)]
+
+    def run():
+        blackboard = Blackboard(token_budget=token_budget)
+        for i, content in enumerate(contents):
+            blackboard.post(f"domain_{i % 4}", content)
+            blackboard.context_view()
+        return blackboard.render()
+    return run
@@ -0,0 +1,19 @@
+"""Retrieval benchmarks over a synthetic Zipf-distributed corpus."""
+import numpy as np
+
+from benchmarks.harness import benchmark
+from src.retrieval import BM25Index
+
+def zipf_corpus(num_passages: int, passage_tokens: int = 20, vocabulary_size: int = 20000):
+    """Passages of 'w<rank>' tokens with Zipfian frequencies: 'w0' behaves like a stopword."""
+    rng = np.random.default_rng(0)
+    words = np.array([f"w{i}" for i in range(vocabulary_size)])
+    ranks = np.minimum(rng.zipf(1.2, size=(num_passages, passage_tokens)) - 1, vocabulary_size - 1)
+    return [" ".join(row) for row in words[ranks]]
+
+@benchmark("retrieval.bm25_search", passages=[10_000, 300_000], query=["stopwords", "rare"])
+def bm25_search(passages, query):
+    index = BM25Index.build(zipf_corpus(passages))
+    # Frequent terms gather postings from most of the corpus; rare ones touch a handful
+    text = "w0 w1 w2" if query == "stopwords" else "w500 w7000"
+    return lambda: index.search(text, k=5)
@@ -0,0 +1,160 @@
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Registered benchmarks: name -> (setup factory, parameter grid)
+REGISTRY: Dict[str, Dict[str, Any]] = {}
+
+def benchmark(name: str, **params: Iterable[Any]):
+    """
+    Registers a parameterized benchmark. The decorated function receives one
+    combination of `params` and returns the zero-argument callable to time;
+    everything before the return is untimed setup.
+
+        @benchmark("diffusion.sample_action", horizon=[1, 16], steps=[5, 50])
+        def sample_action(horizon, steps):
+            policy = DiffusionPolicy(horizon=horizon, num_diffusion_steps=steps)
+            return lambda: policy.sample_action("ctx")
+    """
+    def register(setup: Callable[..., Callable[[], Any]]):
+        REGISTRY[name] = {"setup": setup, "params": {key: list(values) for key, values in params.items()}}
+        return setup
+    return register
+
+def case_id(name: str, params: Dict[str, Any]) -> str:
+    """Stable identifier of one benchmark case, e.g. 'omad.coordinate[agents=32,groups=4]'."""
+    if not params:
+        return name
+    return f"{name}[{','.join(f'{key}={value}' for key, value in params.items())}]"
+
+def cases(name_filter: Optional[str] = None) -> Iterable[Dict[str, Any]]:
+    """Yields every (benchmark, parameter combination) whose id contains `name_filter`."""
+    for name, entry in REGISTRY.items():
+        keys = list(entry["params"])
+        for values in itertools.product(*(entry["params"][key] for key in keys)):
+            params = dict(zip(keys, values))
+            cid = case_id(name, params)
+            if name_filter is None or name_filter in cid:
+                yield {"id": cid, "name": name, "params": params, "setup": entry["setup"]}
+
+def measure(fn: Callable[[], Any], repeat: int = 5, min_time: float = 0.05) -> Dict[str, Any]:
+    """
+    Times `fn` like `timeit`: calls per repeat are calibrated so one repeat takes
+    at least `min_time` seconds, then `repeat` repeats are timed. Per-call times
+    are reported in seconds. The minimum is the least noisy estimate and is what
+    `compare` uses by default.
+    """
+    fn()  # Warm-up (lazy caches, first-call allocations)
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter() - start) / number)
+    return {
+        "number": number,
+        "repeat": repeat,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+    }
+
+def run(name_filter: Optional[str] = None, repeat: int = 5, min_time: float = 0.05, log: Callable[[str], None] = print) -> Dict[str, Any]:
+    """Runs the selected cases and returns a results document (see `save_results`)."""
+    results = {}
+    for case in cases(name_filter):
+        fn = case["setup"](**case["params"])
+        stats = measure(fn, repeat=repeat, min_time=min_time)
+        results[case["id"]] = dict(stats, name=case["name"], params=case["params"])
+        log(f"{case['id']:<60} {format_seconds(stats['min']):>10}  (median {format_seconds(stats['median'])}, x{stats['number']})")
+    return {"environment": environment(), "results": results}
+
+def environment() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def save_results(path: str, document: Dict[str, Any]):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(document, f, indent=4, sort_keys=True)
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float = 0.25,
+    statistic: str = "min"
+) -> List[Dict[str, Any]]:
+    """
+    Compares per-call times (`statistic`: 'min', 'median' or 'mean') case by
+    case. A case regresses when it is more than `threshold` (relative) slower
+    than the baseline and improves when it is more than `threshold` faster.
+    Cases missing from either side are reported as new or missing.
+
+    Returns:
+        One row per case with 'id', 'status' ('ok', 'regression', 'improvement',
+        'new' or 'missing'), 'baseline', 'current' and 'ratio'.
+    """
+    base_results = baseline.get("results", {})
+    cur_results = current.get("results", {})
+    rows = []
+    for cid in sorted(set(base_results) | set(cur_results)):
+        base = base_results.get(cid, {}).get(statistic)
+        cur = cur_results.get(cid, {}).get(statistic)
+        if base is None or cur is None:
+            status, ratio = ("new" if base is None else "missing"), None
+        else:
+            ratio = cur / base if base > 0 else float("inf")
+            if ratio > 1 + threshold:
+                status = "regression"
+            elif ratio < 1 / (1 + threshold):
+                status = "improvement"
+            else:
+                status = "ok"
+        rows.append({"id": cid, "status": status, "baseline": base, "current": cur, "ratio": ratio})
+    return rows
+
+def format_seconds(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+def print_comparison(rows: List[Dict[str, Any]], out=sys.stdout):
+    for row in rows:
+        ratio = "-" if row["ratio"] is None else f"{row['ratio']:.2f}x"
+        out.write(
+            f"{row['status']:<12} {row['id']:<60} "
+            f"{format_seconds(row['baseline']):>10} -> {format_seconds(row['current']):>10}  {ratio}\n"
+        )
@@ -0,0 +1,66 @@
+"""
+Runs the benchmark suite and compares it against a JSON baseline.
+
+    python -m benchmarks.run                              # run all, compare to the default baseline
+    python -m benchmarks.run --filter omad --quick        # subset, fewer/shorter repeats
+    python -m benchmarks.run --save-baseline              # record a new baseline
+    python -m benchmarks.run --output current.json        # keep this run's results
+
+Exits with status 1 when any case is slower than the baseline by more than --threshold.
+"""
+import argparse
+import os
+import sys
+
+from benchmarks import bench_numeric, bench_loop, bench_retrieval  # noqa: F401  (registers the benchmarks)
+from benchmarks.harness import compare, load_results, print_comparison, run, save_results
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "baseline.json")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Adversarial Domain Diffuser benchmarks")
+    parser.add_argument("--filter", type=str, help="Only run cases whose id contains this string")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repeats per case")
+    parser.add_argument("--min-time", type=float, default=0.05, help="Minimum seconds per repeat")
+    parser.add_argument("--quick", action="store_true", help="Shorthand for --repeat 3 --min-time 0.01")
+    parser.add_argument("--baseline", type=str, default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to --baseline")
+    parser.add_argument("--output", type=str, help="Also write the results to this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Relative slowdown flagged as a regression")
+    parser.add_argument("--statistic", choices=["min", "median", "mean"], default="min", help="Per-call time compared")
+    args = parser.parse_args(argv)
+
+    repeat, min_time = (3, 0.01) if args.quick else (args.repeat, args.min_time)
+    document = run(args.filter, repeat=repeat, min_time=min_time)
+    if args.output:
+        save_results(args.output, document)
+
+    if args.save_baseline:
+        if args.filter and os.path.exists(args.baseline):
+            # Partial runs update only their cases
+            baseline = load_results(args.baseline)
+            baseline["results"].update(document["results"])
+            baseline["environment"] = document["environment"]
+            document = baseline
+        save_results(args.baseline, document)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+
+    baseline = load_results(args.baseline)
+    if args.filter:
+        baseline["results"] = {k: v for k, v in baseline["results"].items() if args.filter in k}
+    rows = compare(document, baseline, threshold=args.threshold, statistic=args.statistic)
+    print()
+    print_comparison(rows)
+    regressions = [row for row in rows if row["status"] == "regression"]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%} against {args.baseline}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,9 @@
 import logging
+from typing import Optional
+
+from src.model_client import as_async_client
+from src.profiling import DISABLED, Profiler
+from src.prompting import ADVERSARIAL_PROMPT
 
 class AdversarialGenerator:
     """
@@ -6,11 +11,20 @@ class AdversarialGenerator:
     between a target model and an expert model.
     """
 
-    def __init__(self, model_client=None):
+    def __init__(self, model_client=None, prompt_token_budget: Optional[int] = None, profiler: Optional[Profiler] = None):
         """
         Initialize with an optional model client for LLM calls.
+
+        Args:
+            model_client: Optional client implementing `generate` and/or `agenerate`.
+            prompt_token_budget: Maximum prompt size in (estimated) tokens; the target
+                response is truncated first, then the expert reference. None disables truncation.
+            profiler: Optional profiler timing prompt assembly and LLM calls.
         """
         self.model_client = model_client
+        self.prompt_token_budget = prompt_token_budget
+        self.last_prompt_tokens = 0
+        self.profiler = profiler if profiler is not None else DISABLED
         self.logger = logging.getLogger(__name__)
 
     def generate_question(self, original_prompt: str, target_response: str, expert_reference: str) -> str:
@@ -18,30 +32,48 @@ class AdversarialGenerator:
         Analyzes the target response against the expert reference and generates
          a new question that targets identified weaknesses.
         """
-        prompt = self._build_adversarial_prompt(original_prompt, target_response, expert_reference)
-        
-        if self.model_client:
-            # Placeholder for actual LLM call
-            response = self.model_client.generate(prompt)
-            return response
-        else:
-            # Mock implementation if no client is provided
-            return f"Based on the gap where the target missed nuances in '{original_prompt}', can you explain the specific edge cases mentioned in the expert reference?"
+        with self.profiler.span("generator.generate_question"):
+            prompt = self._build_adversarial_prompt(original_prompt, target_response, expert_reference)
+
+            if self.model_client:
+                # Placeholder for actual LLM call
+                with self.profiler.span("generator.llm"):
+                    response = self.model_client.generate(prompt)
+                return response
+            else:
+                return self._mock_question(original_prompt)
+
+    async def agenerate_question(self, original_prompt: str, target_response: str, expert_reference: str) -> str:
+        """
+        Async variant of `generate_question` using the client's `agenerate`
+        (synchronous clients are adapted to run off the event loop).
+        """
+        with self.profiler.span("generator.generate_question"):
+            prompt = self._build_adversarial_prompt(original_prompt, target_response, expert_reference)
+
+            if self.model_client:
+                with self.profiler.span("generator.llm"):
+                    return await as_async_client(self.model_client).agenerate(prompt)
+            return self._mock_question(original_prompt)
+
+    def _mock_question(self, original_prompt: str) -> str:
+        # Mock implementation if no client is provided
+        return f"Based on the gap where the target missed nuances in '{original_prompt}', can you explain the specific edge cases mentioned in the expert reference?"
 
     def _build_adversarial_prompt(self, original_prompt: str, target_response: str, expert_reference: str) -> str:
         """
         Constructs the prompt for the adversarial question generation.
         """
-        return f"""
-        Original Prompt: {original_prompt}
-        
-        Target Model Response: {target_response}
-        
-        Expert Model Reference: {expert_reference}
-        
-        Task: Identify the semantic gaps, missing reasoning, or inaccuracies in the Target Model's response 
-        compared to the Expert Model. Then, generate a follow-up "adversarial" question that would 
-        force the model to confront these gaps directly.
-        
-        Adversarial Question:
-        """
+        with self.profiler.span("generator.prompt"):
+            assembled = ADVERSARIAL_PROMPT.render(
+                {
+                    "original_prompt": original_prompt,
+                    "target_response": target_response,
+                    "expert_reference": expert_reference
+                },
+                token_budget=self.prompt_token_budget
+            )
+        self.last_prompt_tokens = assembled.token_count
+        if assembled.truncated:
+            self.logger.debug(f"Truncated prompt slots {assembled.truncated} to fit {self.prompt_token_budget} tokens")
+        return assembled.text
@@ -0,0 +1,243 @@
+import logging
+import re
+from collections import deque
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+Summarizer = Callable[[Optional[str], List[Dict[str, Any]]], str]
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (~4 characters per token), good enough for budgeting.
+    """
+    if not text:
+        return 0
+    return max(1, (len(text) + 3) // 4)
+
+class FirstSentenceSummarizer:
+    """
+    Default extractive summarizer: keeps the first sentence of each evicted entry
+    and drops the oldest summary lines once `max_tokens` is exceeded.
+    """
+
+    _SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+    def __init__(self, max_tokens: int = 256, token_counter: Callable[[str], int] = estimate_tokens):
+        self.max_tokens = max_tokens
+        self.token_counter = token_counter
+
+    def __call__(self, summary: Optional[str], evicted: List[Dict[str, Any]]) -> str:
+        lines = summary.split("\n") if summary else []
+        for entry in evicted:
+            first = self._SENTENCE_END.split(entry["content"].strip(), maxsplit=1)[0]
+            lines.append(f"[{entry['agent_domain']}] {first}")
+        while len(lines) > 1 and self.token_counter("\n".join(lines)) > self.max_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
+
+class Blackboard:
+    """
+    Shared knowledge store for the agent environment with bounded retention.
+
+    Retention policies (all optional, applied after every post):
+        - `max_entries_per_agent`: keep only the last N entries of each agent.
+        - `token_budget`: keep the newest entries whose rendered size fits the budget.
+    Evicted entries are handed to `summarizer`, which folds them into a compact
+    running summary shown at the top of the context view.
+    """
+
+    def __init__(
+        self,
+        max_entries_per_agent: Optional[int] = None,
+        token_budget: Optional[int] = None,
+        summarizer: Optional[Summarizer] = None,
+        token_counter: Callable[[str], int] = estimate_tokens
+    ):
+        """
+        Args:
+            max_entries_per_agent: Retain at most this many entries per agent.
+            token_budget: Retain at most this many (estimated) tokens of entries.
+            summarizer: Callable `(summary, evicted_entries) -> summary`. If None,
+                evicted entries are simply dropped.
+            token_counter: Function used to measure rendered entries.
+        """
+        self.max_entries_per_agent = max_entries_per_agent
+        self.token_budget = token_budget
+        self.summarizer = summarizer
+        self.token_counter = token_counter
+        self.logger = logging.getLogger(__name__)
+        self.clear()
+
+    def clear(self):
+        """Removes all entries, the summary and the rendering cache."""
+        self.entries: List[Dict[str, Any]] = []
+        self.summary: Optional[str] = None
+        self._sequence = 0
+        self._segments: List[str] = []
+        self._segment_tokens: List[int] = []
+        self._total_tokens = 0
+        self._reset_rendering()
+
+    def _reset_rendering(self):
+        self._rendered = ""
+        self._rendered_count = 0
+        # Start offset of every rendered segment, in positions that are never
+        # renumbered: `_rendered[0]` sits at `_rendered_base`
+        self._rendered_starts = deque()
+        self._rendered_base = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __getitem__(self, index):
+        return self.entries[index]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.entries)
+
+    @staticmethod
+    def render_entry(entry: Dict[str, Any]) -> str:
+        return f"[{entry['agent_domain']}]: {entry['content']}"
+
+    def post(self, agent_domain: str, content: str) -> Dict[str, Any]:
+        """Appends an entry and applies the retention policies."""
+        entry = {
+            "agent_domain": agent_domain,
+            "content": content,
+            "timestamp": self._sequence  # Simple sequence tracker
+        }
+        self._sequence += 1
+        segment = self.render_entry(entry)
+        tokens = self.token_counter(segment)
+
+        self.entries.append(entry)
+        self._segments.append(segment)
+        self._segment_tokens.append(tokens)
+        self._total_tokens += tokens
+        self._enforce_retention(agent_domain)
+        return entry
+
+    def _enforce_retention(self, agent_domain: str):
+        evict = set()
+        if self.max_entries_per_agent is not None:
+            positions = [i for i, e in enumerate(self.entries) if e["agent_domain"] == agent_domain]
+            evict.update(positions[:max(0, len(positions) - self.max_entries_per_agent)])
+
+        if self.token_budget is not None:
+            total = self._total_tokens - sum(self._segment_tokens[i] for i in evict)
+            # Drop the oldest entries first, always keeping the newest one
+            for i in range(len(self.entries) - 1):
+                if total <= self.token_budget:
+                    break
+                if i not in evict:
+                    evict.add(i)
+                    total -= self._segment_tokens[i]
+
+        if evict:
+            self._evict(sorted(evict))
+
+    def _evict(self, positions: List[int]):
+        evicted = [self.entries[i] for i in positions]
+        if self.summarizer is not None:
+            self.summary = self.summarizer(self.summary, evicted)
+
+        count = len(positions)
+        if positions[-1] == count - 1:
+            # Oldest entries (the usual case under retention): drop the head in place
+            del self.entries[:count]
+            del self._segments[:count]
+            self._total_tokens -= sum(self._segment_tokens[:count])
+            del self._segment_tokens[:count]
+            self._drop_rendered_head(count)
+        else:
+            drop = set(positions)
+            keep = [i for i in range(len(self.entries)) if i not in drop]
+            self.entries = [self.entries[i] for i in keep]
+            self._segments = [self._segments[i] for i in keep]
+            self._segment_tokens = [self._segment_tokens[i] for i in keep]
+            self._total_tokens = sum(self._segment_tokens)
+            # The cached prefix no longer matches; re-render the (bounded) window on demand
+            self._reset_rendering()
+        self.logger.debug(f"Evicted {len(evicted)} blackboard entries")
+
+    def _drop_rendered_head(self, count: int):
+        """Cuts the first `count` segments off the cached rendering without re-joining the rest."""
+        if count >= self._rendered_count:
+            self._reset_rendering()
+            return
+        for _ in range(count):
+            self._rendered_starts.popleft()
+        start = self._rendered_starts[0]
+        self._rendered = self._rendered[start - self._rendered_base:]
+        self._rendered_base = start
+        self._rendered_count -= count
+
+    def get_state(self) -> Dict[str, Any]:
+        """JSON-serializable snapshot of the entries, summary and sequence counter."""
+        return {"entries": [dict(e) for e in self.entries], "summary": self.summary, "sequence": self._sequence}
+
+    def set_state(self, state: Dict[str, Any]):
+        """Restores a snapshot produced by `get_state` (retention is not re-applied)."""
+        self.clear()
+        for entry in state["entries"]:
+            segment = self.render_entry(entry)
+            tokens = self.token_counter(segment)
+            self.entries.append(dict(entry))
+            self._segments.append(segment)
+            self._segment_tokens.append(tokens)
+            self._total_tokens += tokens
+        self.summary = state.get("summary")
+        self._sequence = state.get("sequence", len(self.entries))
+
+    @property
+    def total_tokens(self) -> int:
+        """Estimated tokens of the retained entries (excluding the summary)."""
+        return self._total_tokens
+
+    def render(self) -> str:
+        """
+        Renders all retained entries. The rendering is cached and evicting the
+        oldest entries only trims its head, so each call joins just the entries
+        posted since the last one.
+        """
+        if self._rendered_count < len(self._segments):
+            new_segments = self._segments[self._rendered_count:]
+            new_content = "\n\n".join(new_segments)
+            position = self._rendered_base + len(self._rendered)
+            if self._rendered_count:
+                position += 2
+                self._rendered = f"{self._rendered}\n\n{new_content}"
+            else:
+                self._rendered = new_content
+            for segment in new_segments:
+                self._rendered_starts.append(position)
+                position += len(segment) + 2
+            self._rendered_count = len(self._segments)
+        return self._rendered
+
+    def context_view(self, token_budget: Optional[int] = None) -> str:
+        """
+        Bounded view for agent prompts: the running summary (if any) followed by
+        the newest retained entries that fit in `token_budget` (defaults to the
+        blackboard's own budget; None means all retained entries).
+        """
+        budget = self.token_budget if token_budget is None else token_budget
+        parts = []
+        if self.summary:
+            parts.append(f"[summary of earlier discussion]:\n{self.summary}")
+            if budget is not None:
+                budget = max(0, budget - self.token_counter(parts[0]))
+
+        if budget is None or self._total_tokens <= budget:
+            body = self.render()
+        else:
+            # Newest entries first until the budget is spent
+            start = len(self._segments)
+            used = 0
+            while start > 0 and used + self._segment_tokens[start - 1] <= budget:
+                start -= 1
+                used += self._segment_tokens[start]
+            body = "\n\n".join(self._segments[start:])
+
+        if body:
+            parts.append(body)
+        return "\n\n".join(parts)
@@ -0,0 +1,67 @@
+import json
+import os
+import numpy as np
+from typing import Any, Dict, Tuple
+
+STATE_FILE = "state.json"
+
+def _atomic_write(path: str, write):
+    """Writes via a temporary file, fsyncs it and renames it into place."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def save_checkpoint(directory: str, state: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> str:
+    """
+    Writes a checkpoint: text/metadata to `state.json`, arrays to an `.npz` file
+    referenced from the JSON.
+
+    The arrays file is new for every checkpoint and written first, so the JSON
+    (replaced atomically last) always points at a complete arrays file; the
+    previous arrays file is removed afterwards.
+
+    Returns:
+        Path of the written state file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    state_path = os.path.join(directory, STATE_FILE)
+    previous = None
+    checkpoint_id = 0
+    if os.path.exists(state_path):
+        with open(state_path) as f:
+            old = json.load(f)
+        previous = old.get("arrays_file")
+        checkpoint_id = old.get("checkpoint_id", 0) + 1
+
+    arrays_file = f"arrays_{checkpoint_id:06d}.npz"
+    _atomic_write(os.path.join(directory, arrays_file), lambda f: np.savez(f, **arrays))
+
+    state = dict(state, checkpoint_id=checkpoint_id, arrays_file=arrays_file)
+    _atomic_write(state_path, lambda f: f.write(json.dumps(state, indent=2).encode("utf-8")))
+
+    if previous and previous != arrays_file:
+        try:
+            os.remove(os.path.join(directory, previous))
+        except FileNotFoundError:
+            pass
+    return state_path
+
+def load_checkpoint(path: str) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """
+    Loads a checkpoint written by `save_checkpoint`.
+
+    Args:
+        path: Checkpoint directory or its `state.json`.
+
+    Returns:
+        (state, arrays)
+    """
+    directory = path if os.path.isdir(path) else os.path.dirname(path)
+    with open(os.path.join(directory, STATE_FILE)) as f:
+        state = json.load(f)
+    with np.load(os.path.join(directory, state["arrays_file"])) as data:
+        arrays = {key: data[key] for key in data.files}
+    return state, arrays
@@ -0,0 +1,30 @@
+import gzip
+import io
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    zstandard = None
+    HAS_ZSTD = False
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+def open_text(path: str) -> io.TextIOBase:
+    """
+    Opens a UTF-8 text file for reading, transparently decompressing gzip and
+    zstd (detected from the magic bytes, not the file name). Newlines are not
+    translated, so the handle is also suitable for `csv.reader`.
+    """
+    with open(path, "rb") as f:
+        magic = f.read(4)
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    if magic == ZSTD_MAGIC:
+        if not HAS_ZSTD:
+            raise ImportError(f"Reading zstd-compressed {path} requires the 'zstandard' package.")
+        raw = open(path, "rb")
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
@@ -0,0 +1,111 @@
+import csv
+import itertools
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from src.compression import open_text
+
+REQUIRED_FIELDS = ("query", "expert_reference", "domain_configs")
+SUPPORTED_SUFFIXES = (".jsonl", ".jsonl.gz", ".csv", ".csv.gz")
+
+def _is_item_file(path: str) -> bool:
+    return os.path.isfile(path) and path.endswith(SUPPORTED_SUFFIXES)
+
+def _strip_suffix(name: str) -> str:
+    for suffix in sorted(SUPPORTED_SUFFIXES, key=len, reverse=True):
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+def _validate(item: Dict[str, Any], source: str) -> Dict[str, Any]:
+    missing = [field for field in REQUIRED_FIELDS if field not in item]
+    if missing:
+        raise ValueError(f"{source}: benchmark item is missing {missing}.")
+    return item
+
+def iter_jsonl_items(path: str) -> Iterator[Dict[str, Any]]:
+    """Lazily yields benchmark items from a JSONL file (optionally gzipped), one object per line."""
+    with open_text(path) as f:
+        for line_no, line in enumerate(f, start=1):
+            if line.strip():
+                yield _validate(json.loads(line), f"{path}:{line_no}")
+
+def iter_csv_items(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily yields benchmark items from a CSV file (optionally gzipped) with a header row.
+    `domain_configs` holds a JSON-encoded list of agent configs; other columns are kept as strings.
+    """
+    with open_text(path) as f:
+        for line_no, row in enumerate(csv.DictReader(f), start=2):
+            item = dict(row)
+            if "domain_configs" in item:
+                item["domain_configs"] = json.loads(item["domain_configs"])
+            yield _validate(item, f"{path}:{line_no}")
+
+def iter_items(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily yields the items of a benchmark file, or of every supported file in a
+    sharded directory (in sorted file name order).
+    """
+    if os.path.isdir(path):
+        shards = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if _is_item_file(os.path.join(path, name))
+        )
+        for shard in shards:
+            yield from iter_items(shard)
+    elif path.endswith((".csv", ".csv.gz")):
+        yield from iter_csv_items(path)
+    elif path.endswith((".jsonl", ".jsonl.gz")):
+        yield from iter_jsonl_items(path)
+    else:
+        raise ValueError(f"Unsupported benchmark file '{path}'. Expected one of {SUPPORTED_SUFFIXES}.")
+
+def select_items(
+    items: Iterable[Dict[str, Any]],
+    offset: int = 0,
+    limit: Optional[int] = None,
+    shard_index: int = 0,
+    num_shards: int = 1
+) -> Iterator[Dict[str, Any]]:
+    """
+    Windows and shards an item stream without materializing it.
+
+    Items are numbered by their position in the full stream; each yielded item is
+    a copy carrying that position as `index`. `offset`/`limit` select a window,
+    which is then split round-robin so that shard `shard_index` of `num_shards`
+    gets every `num_shards`-th item.
+    """
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError("offset and limit must be non-negative.")
+    if num_shards < 1 or not 0 <= shard_index < num_shards:
+        raise ValueError(f"shard_index must be in [0, {num_shards}).")
+    stop = None if limit is None else offset + limit
+    window = itertools.islice(enumerate(items), offset, stop)
+    for position, (index, item) in enumerate(window):
+        if position % num_shards == shard_index:
+            yield dict(item, index=index)
+
+def load_benchmark(
+    path: str,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    shard_index: int = 0,
+    num_shards: int = 1
+) -> Iterator[Dict[str, Any]]:
+    """Lazily loads one benchmark file or sharded directory; see `select_items`."""
+    return select_items(iter_items(path), offset=offset, limit=limit, shard_index=shard_index, num_shards=num_shards)
+
+def discover_benchmarks(root: str) -> Dict[str, str]:
+    """
+    Maps domain names to benchmark paths under `root`: every supported file
+    (e.g. 'LegalBench.jsonl') and every subdirectory (sharded, e.g. 'MedicalQA/')
+    is one domain named after it.
+    """
+    found = {}
+    for name in sorted(os.listdir(root)):
+        path = os.path.join(root, name)
+        if os.path.isdir(path) or _is_item_file(path):
+            found[_strip_suffix(name)] = path
+    return found
@@ -1,42 +1,295 @@
 import numpy as np
+from typing import Any, Callable, Optional, Sequence, Tuple, Union
+
+from src.schedulers import NoiseScheduler, get_scheduler
+from src.replay_buffer import ReplayBuffer
+from src.score_network import ScoreNetwork
 
 class DiffusionPolicy:
     """
     Core diffusion-based policy for representing multimodal reasoning trajectories.
     """
-    def __init__(self, action_dim=1, horizon=1, num_diffusion_steps=5):
+    def __init__(
+        self,
+        action_dim=1,
+        horizon=1,
+        num_diffusion_steps=5,
+        scheduler: Union[str, NoiseScheduler, None] = None,
+        num_inference_steps: Optional[int] = None,
+        score_network: Optional[ScoreNetwork] = None,
+        trainable: bool = False,
+        update_every: int = 1,
+        batch_size: int = 32,
+        gradient_steps: int = 1,
+        replay_capacity: int = 1024,
+        rng: Optional[np.random.Generator] = None
+    ):
+        """
+        Args:
+            action_dim: Dimensionality of each reasoning action.
+            horizon: Number of actions in a trajectory.
+            num_diffusion_steps: Length of the (training) noise schedule.
+            scheduler: Sampler name ('constant', 'ddpm', 'ddim', 'dpm_solver') or a
+                NoiseScheduler instance. Defaults to the fixed-step 'constant' loop.
+            num_inference_steps: Timesteps visited at sampling time; step-skipping
+                samplers (DDIM, DPM-Solver) use fewer than `num_diffusion_steps`.
+            score_network: Learned noise predictor. If omitted, the analytic mock
+                score is used unless `trainable` is set.
+            trainable: Build a default ScoreNetwork so `update_online` can learn.
+            update_every: Run gradient steps on every n-th `update_online` call.
+            batch_size: Minibatch size for online gradient steps.
+            gradient_steps: Gradient steps per online update.
+            replay_capacity: Maximum number of trajectories kept for online updates. The
+                buffer is allocated on the first `update_online` that needs it.
+            rng: Generator for all sampling, training noise and replay draws. Pass one
+                spawned from a root SeedSequence for reproducible runs; defaults to a
+                freshly seeded generator.
+        """
         self.action_dim = action_dim
         self.horizon = horizon
         self.num_diffusion_steps = num_diffusion_steps
-        
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        if scheduler is None or isinstance(scheduler, str):
+            scheduler = get_scheduler(
+                scheduler or "constant",
+                num_train_timesteps=num_diffusion_steps,
+                num_inference_steps=num_inference_steps
+            )
+        elif num_inference_steps is not None:
+            scheduler.set_timesteps(num_inference_steps)
+        self.scheduler = scheduler
+
+        if score_network is None and trainable:
+            score_network = ScoreNetwork(input_dim=horizon * action_dim, seed=self.rng)
+        self.score_network = score_network
+        self.update_every = update_every
+        self.batch_size = batch_size
+        self.gradient_steps = gradient_steps
+        self.replay_capacity = replay_capacity
+        # Allocated lazily: most policies are sampled only and never store trajectories
+        self.replay: Optional[ReplayBuffer] = None
+        self._online_calls = 0
+
+    def set_inference_steps(self, num_inference_steps: int):
+        """
+        Changes the number of sampling steps without touching the score model.
+        """
+        self.scheduler.set_timesteps(num_inference_steps)
+
     def score_model(self, x, t, conditioning_context):
         """
-        Mock for the actual neural network (score-based model).
-        In a real implementation, this would be a trained U-Net or Transformer.
+        Score-based model: the learned ScoreNetwork when present, otherwise an
+        analytic mock that points towards zero.
+
+        `x` may carry any number of leading batch dimensions, i.e. a single
+        `(horizon, action_dim)` trajectory or a `(..., horizon, action_dim)` stack.
         """
+        if self.score_network is not None:
+            ctx_emb = self.score_network.embed_context(conditioning_context)
+            return self._network_score(x, t, ctx_emb)
         # For now, return a random noise-like gradient towards zero for simple demo
         return -0.1 * x
 
+    def _network_score(self, x, t, ctx_emb, weights=None, biases=None):
+        """
+        Converts the network's noise prediction into a score: -eps / sigma_t.
+        `weights`/`biases` may be stacked parameters of several networks, in
+        which case the leading axis of `x` indexes the networks.
+        """
+        net = self.score_network
+        lead = x.shape[:-2]
+        flat = x.reshape(lead + (-1,))
+        t_emb = net.embed_time(t, self.scheduler.num_train_timesteps)
+        inputs = net.build_inputs(flat, t_emb, ctx_emb)
+        eps = ScoreNetwork.forward_with(
+            net.weights if weights is None else weights,
+            net.biases if biases is None else biases,
+            inputs
+        )
+        return (-eps / self.scheduler.sigmas[t]).reshape(x.shape)
+
     def sample_action(self, conditioning_context):
         """
         Denoising loop to sample "reasoning steps" or "trajectories".
         """
+        return self.sample_batch([conditioning_context], num_samples=1)[0, 0]
+
+    def sample_batch(self, contexts: Sequence[Any], num_samples: int = 1) -> np.ndarray:
+        """
+        Vectorized denoising of several trajectories in a single pass.
+
+        Args:
+            contexts: Conditioning contexts, one per batch entry.
+            num_samples: Number of trajectories to draw for each context.
+
+        Returns:
+            Array of shape (len(contexts), num_samples, horizon, action_dim).
+        """
         # Start from pure noise
-        x = np.random.randn(self.horizon, self.action_dim)
-        
-        # Simple DDIM-like denoising loop (extremely simplified)
-        for t in reversed(range(self.num_diffusion_steps)):
-            # Predict "score" (direction to cleaner sample)
-            score = self.score_model(x, t, conditioning_context)
-            
-            # Step towards the data manifold
-            x = x + 0.1 * score + 0.01 * np.random.randn(*x.shape)
-            
-        return x
-
-    def update_online(self, data):
-        """
-        Placeholder for online policy updates (e.g., reinforcement learning or fine-tuning).
-        """
-        # TODO: Implement online update logic
-        pass
+        x = self.rng.standard_normal((len(contexts), num_samples, self.horizon, self.action_dim))
+        if self.score_network is not None:
+            # Embed each context once; broadcast over samples
+            ctx_emb = self.score_network.embed_contexts(contexts)[:, None, :]
+            return self._denoise(x, lambda x_t, t: self._network_score(x_t, t, ctx_emb))
+        return self._denoise(x, lambda x_t, t: self.score_model(x_t, t, contexts))
+
+    def fusion_key(self) -> Tuple[Any, ...]:
+        """
+        Key identifying policies whose denoising loops can be fused into one pass
+        (same class, trajectory shape and sampler configuration).
+        """
+        network = self.score_network.architecture() if self.score_network is not None else None
+        return (type(self), self.horizon, self.action_dim, self.num_diffusion_steps,
+                self.scheduler.key(), network)
+
+    @classmethod
+    def population_score_fn(
+        cls,
+        policies: Sequence["DiffusionPolicy"],
+        conditioning_context: Any
+    ) -> Callable[[np.ndarray, int], np.ndarray]:
+        """
+        Score function over a stacked population tensor of shape
+        (num_policies, ..., horizon, action_dim).
+
+        The mock score model has no per-policy parameters, so the whole stack is
+        scored in a single call. Learned networks are evaluated together by
+        stacking their parameters once and using batched matmuls.
+        """
+        first = policies[0]
+        if first.score_network is None:
+            return lambda x_t, t: first.score_model(x_t, t, conditioning_context)
+
+        weights, biases = ScoreNetwork.stack_parameters([p.score_network for p in policies])
+        ctx_emb = first.score_network.embed_context(conditioning_context)
+        return lambda x_t, t: first._network_score(x_t, t, ctx_emb, weights, biases)
+
+    @classmethod
+    def sample_population(
+        cls,
+        policies: Sequence["DiffusionPolicy"],
+        conditioning_context: Any,
+        num_samples: int = 1
+    ) -> np.ndarray:
+        """
+        Runs a single fused denoising loop for several policies sharing a fusion key.
+
+        Args:
+            policies: Policies with identical `fusion_key()`.
+            conditioning_context: Context shared by the whole population.
+            num_samples: Number of trajectories to draw per policy.
+
+        Returns:
+            Array of shape (len(policies), num_samples, horizon, action_dim).
+        """
+        if not policies:
+            return np.empty((0, num_samples, 0, 0))
+        keys = {policy.fusion_key() for policy in policies}
+        if len(keys) != 1:
+            raise ValueError("All policies in a fused population must share the same fusion key.")
+
+        first = policies[0]
+
+        # Each policy draws its slice of every noise tensor from its own generator,
+        # so its samples do not depend on which population it is fused into
+        def noise_fn(shape):
+            return np.stack([policy.rng.standard_normal(shape[1:]) for policy in policies])
+
+        x = noise_fn((len(policies), num_samples, first.horizon, first.action_dim))
+        return first._denoise(x, cls.population_score_fn(policies, conditioning_context), noise_fn)
+
+    def _denoise(
+        self,
+        x: np.ndarray,
+        score_fn: Callable[[np.ndarray, int], np.ndarray],
+        noise_fn: Optional[Callable[[Tuple[int, ...]], np.ndarray]] = None
+    ) -> np.ndarray:
+        """
+        Shared denoising loop over a noise tensor of any leading shape,
+        delegated to the configured scheduler.
+        """
+        return self.scheduler.sample(x, score_fn, noise_fn or self.rng.standard_normal)
+
+    def update_online(self, data) -> Optional[float]:
+        """
+        Online policy update from coordinated trajectories.
+
+        `data` is one of:
+            - a ReplayBuffer (e.g. the one an OMADOrchestrator writes into), which
+              is sampled directly;
+            - an array of trajectories, shape (horizon, action_dim) or
+              (n, horizon, action_dim);
+            - a dict with a 'trajectories' array and an optional 'contexts'
+              list / 'context' value.
+        Arrays and dicts are appended to the policy's own replay buffer. Every
+        `update_every` calls the score network takes `gradient_steps` minibatch
+        steps on the denoising objective.
+
+        Returns:
+            The mean minibatch loss if gradient steps were taken, otherwise None.
+        """
+        if isinstance(data, ReplayBuffer):
+            buffer = data
+        else:
+            trajectories, context = self._unpack_online_data(data)
+            if trajectories is None:
+                return None
+            if self.replay is None:
+                self.replay = ReplayBuffer(self.replay_capacity, (self.horizon, self.action_dim))
+            buffer = self.replay
+            if isinstance(context, list):
+                for traj, ctx in zip(trajectories, context):
+                    buffer.add(traj, ctx)
+            else:
+                buffer.add_batch(trajectories, context)
+        self._online_calls += 1
+
+        if self.score_network is None or self._online_calls % self.update_every:
+            return None
+        if len(buffer) < self.batch_size:
+            return None
+
+        losses = []
+        for _ in range(self.gradient_steps):
+            batch = buffer.sample(self.batch_size, rng=self.rng)
+            x0 = batch["trajectories"].reshape(self.batch_size, -1)
+            ctx_emb = self.score_network.embed_contexts(batch["contexts"])
+            losses.append(self._train_on_batch(x0, ctx_emb, batch["weights"]))
+        return float(np.mean(losses))
+
+    def _train_on_batch(self, x0: np.ndarray, ctx_emb: np.ndarray, sample_weights: Optional[np.ndarray] = None) -> float:
+        """
+        One denoising score matching step: noise clean trajectories at random
+        timesteps and regress the network onto the injected noise. Per-row
+        `sample_weights` correct the bias of prioritized replay sampling.
+        """
+        net = self.score_network
+        T = self.scheduler.num_train_timesteps
+        t = self.rng.integers(T, size=len(x0))
+        eps = self.rng.standard_normal(x0.shape)
+        x_t = self.scheduler.alphas[t][:, None] * x0 + self.scheduler.sigmas[t][:, None] * eps
+        inputs = net.build_inputs(x_t, net.embed_time(t, T), ctx_emb)
+        return net.train_step(inputs, eps, sample_weights)
+
+    def _unpack_online_data(self, data) -> Tuple[Optional[np.ndarray], Any]:
+        """
+        Returns (trajectories, context) where context is either one shared
+        context or a list with one context per trajectory.
+        """
+        if isinstance(data, dict):
+            if "trajectories" not in data:
+                return None, None
+            trajectories = data["trajectories"]
+            context = data.get("contexts")
+            if context is None:
+                context = data.get("context", "")
+            else:
+                context = list(context)
+        else:
+            trajectories, context = data, ""
+
+        trajectories = np.asarray(trajectories, dtype=np.float64).reshape(-1, self.horizon, self.action_dim)
+        if isinstance(context, list) and len(context) != len(trajectories):
+            raise ValueError("Expected one context per trajectory.")
+        return trajectories, context
@@ -1,6 +1,11 @@
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+from src.blackboard import Blackboard
+from src.profiling import DISABLED, Profiler
 from src.reasoning_agent import DomainReasoningAgent
+from src.retrieval import RetrievalCache
 from src.omad import OMADOrchestrator
 
 class AgentEnvironment:
@@ -10,10 +15,37 @@ class AgentEnvironment:
     Now supports OMAD coordination.
     """
 
-    def __init__(self, orchestrator: Optional[OMADOrchestrator] = None):
+    def __init__(
+        self,
+        orchestrator: Optional[OMADOrchestrator] = None,
+        blackboard: Optional[Blackboard] = None,
+        parallel_rounds: bool = False,
+        max_concurrency: Optional[int] = None,
+        retrieval_cache: Optional[RetrievalCache] = None,
+        profiler: Optional[Profiler] = None
+    ):
+        """
+        Args:
+            orchestrator: Optional OMAD orchestrator for trajectory coordination.
+            blackboard: Shared Blackboard; configure its retention policies to bound
+                the context passed to agents. Defaults to an unbounded blackboard.
+            parallel_rounds: If True, all agents in an iteration see the same blackboard
+                snapshot and run concurrently; their posts are merged in registration order.
+            max_concurrency: Maximum agents running at once in a parallel round
+                (defaults to the number of agents).
+            retrieval_cache: Cache of retrieved contexts keyed by (domain, retriever, k,
+                normalized query); pass one instance to share it across environments.
+            profiler: Optional profiler timing queries, retrieval and blackboard rendering.
+        """
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
         self.agents: List[DomainReasoningAgent] = []
-        self.blackboard: List[Dict[str, Any]] = []
+        self.blackboard = blackboard if blackboard is not None else Blackboard()
+        self.parallel_rounds = parallel_rounds
+        self.max_concurrency = max_concurrency
+        self.retrieval_cache = retrieval_cache if retrieval_cache is not None else RetrievalCache()
         self.orchestrator = orchestrator
+        self.profiler = profiler if profiler is not None else DISABLED
         self.logger = logging.getLogger(__name__)
 
     def set_orchestrator(self, orchestrator: OMADOrchestrator):
@@ -27,17 +59,22 @@ class AgentEnvironment:
 
     def post_to_blackboard(self, agent_domain: str, content: str):
         """Allows agents to share reasoning steps."""
-        entry = {
-            "agent_domain": agent_domain,
-            "content": content,
-            "timestamp": len(self.blackboard)  # Simple sequence tracker
-        }
-        self.blackboard.append(entry)
+        self.blackboard.post(agent_domain, content)
         self.logger.debug(f"New entry on blackboard from {agent_domain}")
 
+    def clear_blackboard(self):
+        """Empties the blackboard."""
+        self.blackboard.clear()
+
     def get_blackboard_content(self) -> str:
-        """Returns a string representation of the shared blackboard."""
-        return "\n\n".join([f"[{entry['agent_domain']}]: {entry['content']}" for entry in self.blackboard])
+        """Returns a string representation of the retained blackboard entries."""
+        with self.profiler.span("env.blackboard_render"):
+            return self.blackboard.render()
+
+    def get_blackboard_context(self) -> str:
+        """Returns the bounded blackboard view used in agent prompts."""
+        with self.profiler.span("env.blackboard_render"):
+            return self.blackboard.context_view()
 
     def process_query(self, query: str, iterations: int = 1) -> Dict[str, Any]:
         """
@@ -45,34 +82,133 @@ class AgentEnvironment:
         Agents iteratively refine their answers based on shared information.
         If an orchestrator is present, it uses OMAD to coordinate trajectories.
         """
-        self.blackboard = []  # Clear blackboard for a new query
-        
+        with self.profiler.span("env.process_query"):
+            return self._process_query(query, iterations)
+
+    def _process_query(self, query: str, iterations: int) -> Dict[str, Any]:
+        self.clear_blackboard()  # Clear blackboard for a new query
+
         coordination_history = []
+        results = {agent.domain: [] for agent in self.agents}
+        contexts = self._retrieve_contexts(query)
+
+        pool = None
+        if self.parallel_rounds and len(self.agents) > 1:
+            pool = ThreadPoolExecutor(
+                max_workers=self.max_concurrency or len(self.agents),
+                thread_name_prefix="agent-round"
+            )
+
+        try:
+            for i in range(iterations):
+                self._begin_round(query, i, coordination_history)
+
+                if pool is not None:
+                    # Every agent sees the same snapshot; posts are merged in agent order
+                    current_context = self._agent_context(query)
+                    responses = list(pool.map(
+                        lambda agent: agent.generate_response(current_context, contexts[agent.retrieval_key()]),
+                        self.agents
+                    ))
+                    for agent, response in zip(self.agents, responses):
+                        self._record_response(agent, response, results)
+                    continue
+
+                for agent in self.agents:
+                    current_context = self._agent_context(query)
+                    response = agent.generate_response(current_context, contexts[agent.retrieval_key()])
+                    self._record_response(agent, response, results)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True)
+
+        return self._query_result(query, results, coordination_history)
+
+    async def aprocess_query(self, query: str, iterations: int = 1) -> Dict[str, Any]:
+        """
+        Async variant of `process_query`. Agent calls go through the async
+        `agenerate` protocol; in parallel rounds they are awaited together,
+        bounded by `max_concurrency`.
+        """
+        with self.profiler.span("env.process_query"):
+            return await self._aprocess_query(query, iterations)
+
+    async def _aprocess_query(self, query: str, iterations: int) -> Dict[str, Any]:
+        self.clear_blackboard()  # Clear blackboard for a new query
+
+        coordination_history = []
+        results = {agent.domain: [] for agent in self.agents}
+        contexts = self._retrieve_contexts(query)
+        semaphore = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+
+        async def respond(agent: DomainReasoningAgent, context: str) -> str:
+            if semaphore is None:
+                return await agent.agenerate_response(context, contexts[agent.retrieval_key()])
+            async with semaphore:
+                return await agent.agenerate_response(context, contexts[agent.retrieval_key()])
 
         for i in range(iterations):
-            self.logger.info(f"Starting iteration {i+1}")
-            
-            # If we have an orchestrator, perform a coordination step
-            if self.orchestrator:
-                coord_result = self.orchestrator.step(query)
-                coordination_history.append(coord_result)
-                self.logger.info("OMAD coordination step completed.")
+            self._begin_round(query, i, coordination_history)
+
+            if self.parallel_rounds:
+                current_context = self._agent_context(query)
+                responses = await asyncio.gather(*(respond(agent, current_context) for agent in self.agents))
+                for agent, response in zip(self.agents, responses):
+                    self._record_response(agent, response, results)
+                continue
 
             for agent in self.agents:
-                # In a real scenario, we might pass the blackboard content to the agent
-                # For now, let's simulate the interaction by including blackboard in the query if not empty
-                current_context = f"Query: {query}\n\nShared Blackboard:\n{self.get_blackboard_content()}"
-                response = agent.generate_response(current_context)
-                self.post_to_blackboard(agent.domain, response)
+                response = await respond(agent, self._agent_context(query))
+                self._record_response(agent, response, results)
 
-        # Basic consensus/summary - just taking the last entries for now
-        results = {agent.domain: [] for agent in self.agents}
-        for entry in self.blackboard:
-            results[entry['agent_domain']].append(entry['content'])
+        return self._query_result(query, results, coordination_history)
+
+    def _begin_round(self, query: str, i: int, coordination_history: List[Dict[str, Any]]):
+        """Starts an iteration, performing an OMAD coordination step if configured."""
+        self.logger.info(f"Starting iteration {i+1}")
+
+        # If we have an orchestrator, perform a coordination step
+        if self.orchestrator:
+            coord_result = self.orchestrator.step(query)
+            coordination_history.append(coord_result)
+            self.logger.info("OMAD coordination step completed.")
+
+    def _retrieve_contexts(self, query: str) -> Dict[Tuple[str, Optional[int], int], str]:
+        """
+        Retrieves once per `retrieval_key()` (domain, retriever, k) for the bare
+        user query (not the blackboard-laden prompt), so agents sharing a domain
+        index are coalesced into one cached lookup. The user query is fixed for
+        the whole call, so this covers every round.
+        """
+        contexts: Dict[Tuple[str, Optional[int], int], str] = {}
+        with self.profiler.span("env.retrieve"):
+            for agent in self.agents:
+                key = agent.retrieval_key()
+                if key not in contexts:
+                    domain, retriever_id, k = key
+                    contexts[key] = self.retrieval_cache.get_or_retrieve(
+                        domain, query, agent._retrieve_context, retriever_id, k
+                    )
+        return contexts
+
+    def _agent_context(self, query: str) -> str:
+        # In a real scenario, we might pass the blackboard content to the agent
+        # For now, let's simulate the interaction by including blackboard in the query if not empty
+        return f"Query: {query}\n\nShared Blackboard:\n{self.get_blackboard_context()}"
+
+    def _record_response(self, agent: DomainReasoningAgent, response: str, results: Dict[str, List[str]]):
+        self.post_to_blackboard(agent.domain, response)
+        results[agent.domain].append(response)
 
+    def _query_result(
+        self,
+        query: str,
+        results: Dict[str, List[str]],
+        coordination_history: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
         return {
             "query": query,
             "responses": results,
-            "blackboard_history": self.blackboard,
+            "blackboard_history": list(self.blackboard.entries),
             "coordination_history": coordination_history
         }
@@ -2,10 +2,21 @@ import json
 import os
 import logging
 import numpy as np
-from typing import List, Dict, Any, Optional
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from datetime import datetime
 
+from src.datasets import discover_benchmarks, load_benchmark
 from src.integrated_loop import IntegratedAdversarialLoop
+from src.reporting import CODEC_EXTENSIONS, HAS_ZSTD, create_report_writer
+from src.retrieval import RetrievalCache
+
+# IntegratedAdversarialLoop arguments that `_run_task` sets for every task
+RESERVED_LOOP_OPTIONS = (
+    "agent_configs", "expert_reference", "max_iterations", "model_client",
+    "agent_model_client", "retrieval_cache", "seed",
+)
 
 class Evaluator:
     """
@@ -14,17 +25,100 @@ class Evaluator:
     across domain-specific benchmarks.
     """
 
-    def __init__(self, results_dir: str = "results"):
+    def __init__(
+        self,
+        results_dir: str = "results",
+        model_client: Any = None,
+        loop_options: Optional[Dict[str, Any]] = None,
+        max_workers: int = 1,
+        executor: str = "thread",
+        seed: int = 0,
+        report_format: str = "json",
+        report_codec: Optional[str] = None,
+        include_consensus: bool = True,
+        checkpoint_every: int = 16
+    ):
+        """
+        Args:
+            results_dir: Directory for the reports.
+            model_client: Optional client shared by the generator and agents of every
+                loop. Wrap it in `src.response_cache.CachingClient` so re-running an
+                unchanged evaluation is served from the cache.
+            loop_options: Extra keyword arguments for every IntegratedAdversarialLoop,
+                e.g. early-stopping criteria (`gap_threshold`, `patience`, `time_budget`).
+                Arguments in `RESERVED_LOOP_OPTIONS` are set per task and rejected here.
+            max_workers: Number of (item, run) tasks executed concurrently; 1 runs serially.
+            executor: 'thread' (shares clients and caches, suits I/O-bound LLM calls) or
+                'process' (scales CPU-bound work across cores; clients must be picklable
+                and each worker gets its own copy).
+            seed: Root seed from which every task's seed is spawned.
+            report_format: 'json' writes one indented report when the evaluation ends;
+                'jsonl' streams a compact record per finished run and item. Either way
+                the returned report holds one aggregate per item; JSONL mode drops the
+                per-run records from it, so memory grows with items but not with runs.
+            report_codec: Compression for JSONL reports: None, 'gzip' or 'zstd'
+                (only valid with report_format='jsonl').
+            include_consensus: Keep each run's full `final_consensus` text.
+            checkpoint_every: JSONL records between fsync checkpoints.
+        """
+        if report_format not in ("json", "jsonl"):
+            raise ValueError(f"Unknown report format '{report_format}'. Choose 'json' or 'jsonl'.")
+        if report_codec not in CODEC_EXTENSIONS:
+            raise ValueError(f"Unknown report codec '{report_codec}'. Choose from {list(CODEC_EXTENSIONS)}.")
+        if report_codec is not None and report_format != "jsonl":
+            raise ValueError(f"report_codec '{report_codec}' requires report_format='jsonl'.")
+        if report_codec == "zstd" and not HAS_ZSTD:
+            raise ImportError("The 'zstd' report codec requires the 'zstandard' package.")
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown executor '{executor}'. Choose 'thread' or 'process'.")
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1.")
+        reserved = sorted(set(loop_options or {}) & set(RESERVED_LOOP_OPTIONS))
+        if reserved:
+            raise ValueError(
+                f"loop_options cannot set {reserved}: the evaluator supplies them per task "
+                f"(use run_evaluation's max_iterations and the Evaluator's seed)."
+            )
         self.results_dir = results_dir
+        self.model_client = model_client
+        self.loop_options = loop_options or {}
+        self.max_workers = max_workers
+        self.executor = executor
+        self.seed = seed
+        self.report_format = report_format
+        self.report_codec = report_codec
+        self.include_consensus = include_consensus
+        self.checkpoint_every = checkpoint_every
+        # Runs repeat the same queries, so retrieval is shared across all loops
+        self.retrieval_cache = RetrievalCache()
         self.logger = logging.getLogger(__name__)
         if not os.path.exists(self.results_dir):
             os.makedirs(self.results_dir)
 
-    def load_benchmarks(self) -> Dict[str, List[Dict[str, Any]]]:
+    def load_benchmarks(
+        self,
+        benchmark_dir: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        shard_index: int = 0,
+        num_shards: int = 1
+    ) -> Dict[str, Iterable[Dict[str, Any]]]:
         """
-        Loads mock domain-specific benchmarks.
-        Returns a dictionary where keys are domain names and values are lists of benchmark items.
+        Loads domain-specific benchmarks.
+        Returns a dictionary where keys are domain names and values are benchmark items.
+
+        Without `benchmark_dir` the built-in mock benchmarks are returned as lists.
+        Otherwise every item file or sharded subdirectory of `benchmark_dir` is one
+        domain (see `src.datasets.discover_benchmarks`), and its items are streamed
+        lazily, windowed by `offset`/`limit` and split round-robin into `num_shards`
+        shards of which `shard_index` is kept.
         """
+        if benchmark_dir is not None:
+            return {
+                domain: load_benchmark(path, offset=offset, limit=limit, shard_index=shard_index, num_shards=num_shards)
+                for domain, path in discover_benchmarks(benchmark_dir).items()
+            }
+
         benchmarks = {
             "LegalBench": [
                 {
@@ -52,13 +146,18 @@ class Evaluator:
     def run_evaluation(
         self, 
         domain: str, 
-        benchmark_items: List[Dict[str, Any]], 
+        benchmark_items: Iterable[Dict[str, Any]], 
         max_iterations: int = 5,
         target_gap_reduction: float = 0.5,
         num_runs: int = 3
     ) -> Dict[str, Any]:
         """
         Runs the evaluation for a specific domain.
+
+        Every (item, run) pair is an independent task executed on the configured
+        pool; results are aggregated in item/run order regardless of completion order.
+        `benchmark_items` may be a lazy stream (see `load_benchmarks`); it is consumed
+        as tasks are submitted and never materialized.
         
         Args:
             domain: Name of the domain (e.g., 'LegalBench').
@@ -68,72 +167,150 @@ class Evaluator:
             num_runs: Number of independent runs to measure stability.
         """
         self.logger.info(f"Starting evaluation for domain: {domain}")
-        
-        domain_results = []
-        
-        for item in benchmark_items:
-            query = item["query"]
-            expert_ref = item["expert_reference"]
-            configs = item["domain_configs"]
-            
-            item_runs = []
-            for run_id in range(num_runs):
-                loop = IntegratedAdversarialLoop(
-                    agent_configs=configs,
-                    expert_reference=expert_ref,
-                    max_iterations=max_iterations
-                )
-                
-                result = loop.run_iteration(query)
-                history = result["history"]
-                
-                # Calculate metrics for this run
-                initial_gap = history[0]["gap_score"]
-                final_gap = history[-1]["gap_score"]
-                improvement = initial_gap - final_gap
-                
-                # Sample Efficiency: queries required to reach target reduction
-                queries_to_target = None
-                for idx, step in enumerate(history):
-                    reduction = initial_gap - step["gap_score"]
-                    if reduction >= target_gap_reduction:
-                        queries_to_target = idx + 1
-                        break
-                
-                item_runs.append({
-                    "run_id": run_id,
-                    "initial_gap": initial_gap,
-                    "final_gap": final_gap,
-                    "improvement": improvement,
-                    "queries_to_target": queries_to_target,
-                    "final_consensus": history[-1]["consensus_summary"]
-                })
-            
-            # Aggregate metrics across runs for this item
-            improvements = [r["improvement"] for r in item_runs]
-            avg_improvement = float(np.mean(improvements))
-            stability = float(np.var(improvements))
-            
-            sample_efficiencies = [r["queries_to_target"] for r in item_runs if r["queries_to_target"] is not None]
-            avg_sample_efficiency = float(np.mean(sample_efficiencies)) if sample_efficiencies else None
-
-            domain_results.append({
-                "query": query,
-                "avg_accuracy_improvement": avg_improvement,
-                "convergence_stability": stability,
-                "avg_sample_efficiency": avg_sample_efficiency,
-                "runs": item_runs
+        timestamp = datetime.now()
+        specs = self._task_specs(benchmark_items, num_runs, max_iterations, target_gap_reduction)
+
+        writer = None
+        if self.report_format == "jsonl":
+            stem = f"{domain}_eval_{timestamp.strftime('%Y%m%d_%H%M%S')}"
+            writer = create_report_writer(
+                self.results_dir, stem, codec=self.report_codec, checkpoint_every=self.checkpoint_every
+            )
+            writer.write({
+                "type": "header",
+                "domain": domain,
+                "timestamp": timestamp.isoformat(),
+                "num_runs": num_runs,
+                "max_iterations": max_iterations,
+                "target_gap_reduction": target_gap_reduction,
+                "seed": self.seed
             })
 
+        domain_results = []
+        item_runs = []
+        try:
+            # Runs arrive in item/run order, so each item is complete after its last run
+            for spec, run in self._execute(specs):
+                if not self.include_consensus:
+                    run.pop("final_consensus", None)
+                if writer is not None:
+                    writer.write(dict({"type": "run", "item_index": spec["item_index"], "query": spec["query"]}, **run))
+                item_runs.append(run)
+                if len(item_runs) < num_runs:
+                    continue
+
+                item_result = self._aggregate_item(spec["query"], item_runs)
+                item_runs = []
+                if writer is not None:
+                    # Streamed reports keep only the per-item aggregates (not the runs) in memory
+                    item_result.pop("runs")
+                    writer.write(dict({"type": "item", "item_index": spec["item_index"]}, **item_result))
+                domain_results.append(item_result)
+        finally:
+            if writer is not None:
+                writer.close()
+
         report = {
             "domain": domain,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp.isoformat(),
             "results": domain_results
         }
-        
-        self.save_report(domain, report)
+
+        if writer is not None:
+            report["report_path"] = writer.path
+            self.logger.info(f"Report streamed to {writer.path}")
+        else:
+            self.save_report(domain, report)
         return report
 
+    def task_seeds(self, num_tasks: int) -> List[np.random.SeedSequence]:
+        """Independent per-task seed sequences spawned from the evaluator's root seed."""
+        return [self.task_seed(task_idx) for task_idx in range(num_tasks)]
+
+    def task_seed(self, task_idx: int) -> np.random.SeedSequence:
+        """
+        SeedSequence of task `task_idx` (item index * num_runs + run id), equal to
+        the `task_idx`-th child spawned from the root SeedSequence. It is passed to
+        the loop whole, keeping the full root entropy. It depends only on the
+        task's position, so sharded evaluations reproduce unsharded seeds; run
+        records store `task_idx` as their 'seed'.
+        """
+        return np.random.SeedSequence(self.seed, spawn_key=(task_idx,))
+
+    def _task_specs(
+        self,
+        benchmark_items: Iterable[Dict[str, Any]],
+        num_runs: int,
+        max_iterations: int,
+        target_gap_reduction: float
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily yields one spec per (item, run). Items loaded from files carry their
+        position in the full dataset as `index`, which is used for the item index
+        and seeds so that shards of one dataset line up.
+        """
+        for position, item in enumerate(benchmark_items):
+            item_idx = item.get("index", position)
+            for run_id in range(num_runs):
+                task_idx = item_idx * num_runs + run_id
+                yield {
+                    "item_index": item_idx,
+                    "run_id": run_id,
+                    "task_index": task_idx,
+                    "seed": self.task_seed(task_idx),
+                    "query": item["query"],
+                    "expert_reference": item["expert_reference"],
+                    "agent_configs": item["domain_configs"],
+                    "max_iterations": max_iterations,
+                    "target_gap_reduction": target_gap_reduction,
+                    "model_client": self.model_client,
+                    # Caches with locks cannot cross process boundaries; workers build their own
+                    "retrieval_cache": self.retrieval_cache if self.executor != "process" else None,
+                    "loop_options": self.loop_options,
+                }
+
+    def _execute(self, specs: Iterable[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        Runs task specs serially or on a thread/process pool and yields
+        (spec, run) in spec order. At most 2 * max_workers tasks are in flight,
+        so the spec stream is consumed lazily.
+        """
+        if self.max_workers <= 1:
+            for spec in specs:
+                yield spec, _run_task(spec)
+            return
+
+        pool_cls = ProcessPoolExecutor if self.executor == "process" else ThreadPoolExecutor
+        window = 2 * self.max_workers
+        with pool_cls(max_workers=self.max_workers) as pool:
+            pending = deque()
+            for spec in specs:
+                pending.append((spec, pool.submit(_run_task, spec)))
+                if len(pending) >= window:
+                    done_spec, future = pending.popleft()
+                    yield done_spec, future.result()
+            while pending:
+                done_spec, future = pending.popleft()
+                yield done_spec, future.result()
+
+    @staticmethod
+    def _aggregate_item(query: str, item_runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        # Aggregate metrics across runs for this item
+        improvements = [r["improvement"] for r in item_runs]
+        avg_improvement = float(np.mean(improvements))
+        stability = float(np.var(improvements))
+        
+        sample_efficiencies = [r["queries_to_target"] for r in item_runs if r["queries_to_target"] is not None]
+        avg_sample_efficiency = float(np.mean(sample_efficiencies)) if sample_efficiencies else None
+
+        return {
+            "query": query,
+            "avg_accuracy_improvement": avg_improvement,
+            "convergence_stability": stability,
+            "avg_sample_efficiency": avg_sample_efficiency,
+            "runs": item_runs
+        }
+
     def save_report(self, domain: str, report: Dict[str, Any]):
         filename = f"{domain}_eval_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         filepath = os.path.join(self.results_dir, filename)
@@ -141,6 +318,52 @@ class Evaluator:
             json.dump(report, f, indent=4)
         self.logger.info(f"Report saved to {filepath}")
 
+def _run_task(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Runs one (item, run) evaluation task and computes its run metrics.
+    Module-level so it can be pickled for process pools.
+    """
+    loop = IntegratedAdversarialLoop(
+        agent_configs=spec["agent_configs"],
+        expert_reference=spec["expert_reference"],
+        max_iterations=spec["max_iterations"],
+        model_client=spec["model_client"],
+        agent_model_client=spec["model_client"],
+        retrieval_cache=spec["retrieval_cache"],
+        seed=spec["seed"],
+        **spec["loop_options"]
+    )
+    
+    result = loop.run_iteration(spec["query"])
+    history = result["history"]
+    
+    # Calculate metrics for this run
+    initial_gap = history[0]["gap_score"]
+    final_gap = history[-1]["gap_score"]
+    improvement = initial_gap - final_gap
+    
+    # Sample Efficiency: queries required to reach target reduction
+    queries_to_target = None
+    for idx, step in enumerate(history):
+        reduction = initial_gap - step["gap_score"]
+        if reduction >= spec["target_gap_reduction"]:
+            queries_to_target = idx + 1
+            break
+    
+    return {
+        "run_id": spec["run_id"],
+        # With the report's root seed, the spawn key reproduces the task's SeedSequence
+        "seed": spec["task_index"],
+        "initial_gap": initial_gap,
+        "final_gap": final_gap,
+        "improvement": improvement,
+        "queries_to_target": queries_to_target,
+        "iterations": len(history),
+        "stop_reason": result["stop_reason"],
+        "final_consensus": history[-1]["consensus_summary"],
+        "final_trajectory": history[-1]["consensus_path"]
+    }
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     evaluator = Evaluator()
@@ -1,13 +1,26 @@
+import json
 import logging
-from typing import List, Dict, Any, Optional
+import time
+from typing import List, Dict, Any, Optional, Tuple, Union
 import numpy as np
 
 from src.adversarial_gen import AdversarialGenerator
+from src.checkpoint import load_checkpoint, save_checkpoint
 from src.environment import AgentEnvironment
 from src.diffusion import DiffusionPolicy
 from src.omad import OMADOrchestrator
+from src.profiling import DISABLED, Profiler
 from src.grouping import EmbodimentGrouper
 from src.reasoning_agent import DomainReasoningAgent
+from src.replay_buffer import ReplayBuffer
+from src.retrieval import RetrievalCache
+
+def _shape_name(shape: Tuple[int, ...]) -> str:
+    return "x".join(str(d) for d in shape)
+
+def _sub_arrays(arrays: Dict[str, np.ndarray], prefix: str) -> Dict[str, np.ndarray]:
+    """Arrays stored under `prefix`, with the prefix stripped."""
+    return {k[len(prefix):]: v for k, v in arrays.items() if k.startswith(prefix)}
 
 class IntegratedAdversarialLoop:
     """
@@ -20,48 +33,113 @@ class IntegratedAdversarialLoop:
         agent_configs: List[Dict[str, Any]],
         expert_reference: str,
         max_iterations: int = 3,
-        model_client: Any = None
+        model_client: Any = None,
+        consensus_strategy: str = "mean",
+        agent_model_client: Any = None,
+        retrieval_cache: Optional[RetrievalCache] = None,
+        prompt_token_budget: Optional[int] = None,
+        gap_threshold: Optional[float] = None,
+        patience: Optional[int] = None,
+        min_delta: float = 1e-3,
+        time_budget: Optional[float] = None,
+        checkpoint_dir: Optional[str] = None,
+        checkpoint_every: int = 1,
+        seed: Union[int, np.random.SeedSequence, None] = None,
+        profiler: Optional[Profiler] = None
     ):
         """
         Initialize the integrated loop.
 
         Args:
-            agent_configs: Configuration for the reasoning agents.
+            agent_configs: Configuration for the reasoning agents. A config may carry
+                a 'retriever' (src.retrieval.Retriever) for its agent's domain.
             expert_reference: The "ground truth" or expert perspective to aim for.
             max_iterations: Maximum number of refinement iterations.
             model_client: Optional client for LLM calls in the generator.
+            consensus_strategy: OMAD consensus strategy ('mean', 'softmax', 'topk', 'medoid').
+            agent_model_client: Optional client for LLM calls in the reasoning agents.
+            retrieval_cache: Optional retrieval cache shared with other loops.
+            prompt_token_budget: Token budget for agent and generator prompts.
+            gap_threshold: Stop once the gap score is at or below this value.
+            patience: Stop once the best gap score has not improved by more than
+                `min_delta` for this many consecutive iterations.
+            min_delta: Smallest gap-score decrease that counts as an improvement.
+            time_budget: Wall-clock budget in seconds; no new iteration starts after it is spent.
+            checkpoint_dir: If set, loop state is checkpointed to this directory
+                (see `resume_from`).
+            checkpoint_every: Checkpoint after every this many completed iterations
+                (the final state is always written).
+            seed: Root seed (or SeedSequence). Each diffusion policy gets its own
+                Generator spawned from it, so runs with equal seeds are identical.
+            profiler: Optional `src.profiling.Profiler` shared by every component, timing
+                each stage of the loop. Profiling is off by default.
         """
+        if patience is not None and patience < 1:
+            raise ValueError("patience must be at least 1.")
+        if checkpoint_every < 1:
+            raise ValueError("checkpoint_every must be at least 1.")
         self.logger = logging.getLogger(__name__)
         self.expert_reference = expert_reference
         self.max_iterations = max_iterations
+        self.gap_threshold = gap_threshold
+        self.patience = patience
+        self.min_delta = min_delta
+        self.time_budget = time_budget
+        self.checkpoint_dir = checkpoint_dir
+        self.checkpoint_every = checkpoint_every
+        self.profiler = profiler if profiler is not None else DISABLED
         
         # 1. Initialize Components
-        self.generator = AdversarialGenerator(model_client=model_client)
+        self.generator = AdversarialGenerator(
+            model_client=model_client,
+            prompt_token_budget=prompt_token_budget,
+            profiler=self.profiler
+        )
         
         # Initialize agents and their diffusion policies
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        # Children are derived from the spawn key rather than `spawn()`, which would
+        # advance the caller's SeedSequence and make reusing it yield different runs
+        seq = self.seed_sequence
+        policy_seeds = [
+            np.random.SeedSequence(seq.entropy, spawn_key=seq.spawn_key + (i,), pool_size=seq.pool_size)
+            for i in range(len(agent_configs))
+        ]
         self.agent_map = {}
         self.diffusion_agents = {}
-        for config in agent_configs:
+        for config, policy_seed in zip(agent_configs, policy_seeds):
             agent_id = config["id"]
             domain = config.get("domain", "general")
             
             # Create the reasoning agent
-            agent = DomainReasoningAgent(domain=domain)
+            agent = DomainReasoningAgent(
+                domain=domain,
+                model_client=agent_model_client,
+                retriever=config.get("retriever"),
+                prompt_token_budget=prompt_token_budget,
+                profiler=self.profiler
+            )
             self.agent_map[agent_id] = agent
             
             # Create a diffusion policy for this agent
             # Note: In a real system, these might be shared or specialized
-            self.diffusion_agents[agent_id] = DiffusionPolicy()
+            self.diffusion_agents[agent_id] = DiffusionPolicy(rng=np.random.default_rng(policy_seed))
 
         # 2. Setup Orchestration and Environment
         # OMAD Orchestrator handles coordination between diffusion policies
         self.orchestrator = OMADOrchestrator(
             agents=self.diffusion_agents,
-            agent_metadata=agent_configs
+            agent_metadata=agent_configs,
+            consensus_strategy=consensus_strategy,
+            profiler=self.profiler
         )
         
         # Environment manages the blackboard and agent interaction
-        self.env = AgentEnvironment(orchestrator=self.orchestrator)
+        self.env = AgentEnvironment(
+            orchestrator=self.orchestrator,
+            retrieval_cache=retrieval_cache,
+            profiler=self.profiler
+        )
         for agent in self.agent_map.values():
             self.env.register_agent(agent)
 
@@ -81,51 +159,262 @@ class IntegratedAdversarialLoop:
 
     def run_iteration(self, initial_context: str) -> Dict[str, Any]:
         """
-        Runs the full adversarial loop for a set number of iterations.
+        Runs the adversarial loop until a stopping criterion fires or
+        `max_iterations` is reached; the result records the `stop_reason`.
         """
-        current_query = initial_context
-        current_responses = {}
-        
-        iteration_results = []
+        return self._run(initial_context, [], 0)
+
+    async def arun_iteration(self, initial_context: str) -> Dict[str, Any]:
+        """
+        Async variant of `run_iteration`: agent and generator LLM calls use the
+        async `agenerate` protocol, so many loops can share one event loop.
+        """
+        return await self._arun(initial_context, [], 0)
+
+    def resume_from(self, path: str) -> Dict[str, Any]:
+        """
+        Restores a checkpoint and continues the loop from the first iteration it
+        had not completed, so no finished LLM work is redone. A checkpoint of a
+        finished loop returns its result directly.
+
+        Args:
+            path: Checkpoint directory (or its state.json).
+        """
+        current_query, iteration_results, stop_reason = self.restore_checkpoint(path)
+        if stop_reason is not None:
+            return self._finish(current_query, iteration_results, stop_reason)
+        return self._run(current_query, iteration_results, len(iteration_results))
+
+    async def aresume_from(self, path: str) -> Dict[str, Any]:
+        """Async variant of `resume_from`."""
+        current_query, iteration_results, stop_reason = self.restore_checkpoint(path)
+        if stop_reason is not None:
+            return self._finish(current_query, iteration_results, stop_reason)
+        return await self._arun(current_query, iteration_results, len(iteration_results))
+
+    def _run(self, current_query: str, iteration_results: List[Dict[str, Any]], start: int) -> Dict[str, Any]:
+        started = time.monotonic()
+        stop_reason = "max_iterations"
 
-        for i in range(self.max_iterations):
+        for i in range(start, self.max_iterations):
             self.logger.info(f"Starting Integrated Loop Iteration {i+1}/{self.max_iterations}")
             
-            # a. Dispatch current question to the multi-agent environment
-            # This uses OMAD under the hood via AgentEnvironment
-            env_result = self.env.process_query(current_query)
-            current_responses = env_result["responses"]
-            
-            # b. Collect coordinated reasoning responses (Summary for evaluation)
-            # Use the blackboard summary as the primary output
-            consensus_summary = self.env.get_blackboard_content()
-            
-            # c. Evaluate the gap-closing performance
+            with self.profiler.span("loop.iteration"):
+                # a. Dispatch current question to the multi-agent environment
+                # This uses OMAD under the hood via AgentEnvironment
+                env_result = self.env.process_query(current_query)
+                result_entry = self._record_iteration(i, current_query, env_result)
+                iteration_results.append(result_entry)
+
+                # Converged or stalled: skip the generator call for a question nobody will ask
+                reason = self._stop_reason(iteration_results, started)
+                if reason is not None:
+                    stop_reason = reason
+                    break
+
+                # d. Update/Consult the generator with the results for the next iteration
+                # Generates a more challenging question based on the current consensus
+                current_query = self.generator.generate_question(
+                    original_prompt=current_query,
+                    target_response=result_entry["consensus_summary"],
+                    expert_reference=self.expert_reference
+                )
+                self._maybe_checkpoint(current_query, iteration_results)
+
+        return self._finish(current_query, iteration_results, stop_reason)
+
+    async def _arun(self, current_query: str, iteration_results: List[Dict[str, Any]], start: int) -> Dict[str, Any]:
+        started = time.monotonic()
+        stop_reason = "max_iterations"
+
+        for i in range(start, self.max_iterations):
+            self.logger.info(f"Starting Integrated Loop Iteration {i+1}/{self.max_iterations}")
+
+            with self.profiler.span("loop.iteration"):
+                env_result = await self.env.aprocess_query(current_query)
+                result_entry = self._record_iteration(i, current_query, env_result)
+                iteration_results.append(result_entry)
+
+                reason = self._stop_reason(iteration_results, started)
+                if reason is not None:
+                    stop_reason = reason
+                    break
+
+                current_query = await self.generator.agenerate_question(
+                    original_prompt=current_query,
+                    target_response=result_entry["consensus_summary"],
+                    expert_reference=self.expert_reference
+                )
+                self._maybe_checkpoint(current_query, iteration_results)
+
+        return self._finish(current_query, iteration_results, stop_reason)
+
+    def _stop_reason(self, iteration_results: List[Dict[str, Any]], started: float) -> Optional[str]:
+        """
+        Checks the early-stopping criteria after an iteration. Returns
+        'gap_threshold', 'plateau' or 'time_budget', or None to continue.
+        """
+        gaps = [entry["gap_score"] for entry in iteration_results]
+        if self.gap_threshold is not None and gaps[-1] <= self.gap_threshold:
+            return "gap_threshold"
+
+        if self.patience is not None and len(gaps) > self.patience:
+            best_before = min(gaps[:-self.patience])
+            if min(gaps[-self.patience:]) > best_before - self.min_delta:
+                return "plateau"
+
+        if self.time_budget is not None and time.monotonic() - started >= self.time_budget:
+            return "time_budget"
+        return None
+
+    def _record_iteration(self, i: int, query: str, env_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Summarizes and scores one environment pass."""
+        current_responses = env_result["responses"]
+
+        # b. Collect coordinated reasoning responses (Summary for evaluation)
+        # Use the blackboard summary as the primary output
+        consensus_summary = self.env.get_blackboard_content()
+
+        # c. Evaluate the gap-closing performance
+        with self.profiler.span("loop.evaluate"):
             gap_score = self.evaluate_performance(current_responses, self.expert_reference)
-            
-            self.logger.info(f"Iteration {i+1} Gap Score: {gap_score:.4f}")
-            
-            # Record state
-            result_entry = {
-                "iteration": i,
-                "query": current_query,
-                "gap_score": gap_score,
-                "consensus_summary": consensus_summary
-            }
-            iteration_results.append(result_entry)
-            
-            # d. Update/Consult the generator with the results for the next iteration
-            # Generates a more challenging question based on the current consensus
-            current_query = self.generator.generate_question(
-                original_prompt=current_query,
-                target_response=consensus_summary,
-                expert_reference=self.expert_reference
-            )
 
+        self.logger.info(f"Iteration {i+1} Gap Score: {gap_score:.4f}")
+
+        # The last OMAD consensus trajectory (JSON-friendly); it depends on the policies' seeds
+        coordination = env_result.get("coordination_history") or []
+        consensus_path = coordination[-1]["consensus_path"] if coordination else None
+
+        # Record state
+        return {
+            "iteration": i,
+            "query": query,
+            "gap_score": gap_score,
+            "consensus_summary": consensus_summary,
+            "consensus_path": None if consensus_path is None else np.asarray(consensus_path).tolist()
+        }
+
+    def checkpoint_state(
+        self,
+        current_query: str,
+        iteration_results: List[Dict[str, Any]],
+        stop_reason: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        """
+        Snapshot of the loop: JSON-serializable state (history, next query,
+        blackboard, groups, generator states, replay cursors and contexts) and
+        arrays (score-network parameters and Adam state of every policy, and the
+        rows of the policies' and the orchestrator's replay buffers).
+        """
+        state = {
+            "version": 1,
+            "next_iteration": len(iteration_results),
+            "current_query": current_query,
+            "stop_reason": stop_reason,
+            "expert_reference": self.expert_reference,
+            "history": iteration_results,
+            "groups": self.orchestrator.groups,
+            "blackboard": self.env.blackboard.get_state(),
+            # Generator states let a resumed run continue the exact random streams
+            "rng_states": {
+                agent_id: policy.rng.bit_generator.state for agent_id, policy in self.diffusion_agents.items()
+            },
+            # Online-update cadence, so `update_every` stays in phase after a resume
+            "online_calls": {
+                agent_id: policy._online_calls for agent_id, policy in self.diffusion_agents.items()
+                if hasattr(policy, "_online_calls")
+            },
+            "replay": {},
+            "omad_replay": {},
+        }
+        arrays = {}
+        for agent_id, policy in self.diffusion_agents.items():
+            network = getattr(policy, "score_network", None)
+            if network is not None:
+                for key, value in network.get_state().items():
+                    arrays[f"{agent_id}/{key}"] = value
+            replay = getattr(policy, "replay", None)
+            if replay is not None:
+                state["replay"][agent_id], replay_arrays = replay.get_state()
+                for key, value in replay_arrays.items():
+                    arrays[f"replay/{agent_id}/{key}"] = value
+        for shape, buffer in self.orchestrator.replay_buffers.items():
+            name = _shape_name(shape)
+            state["omad_replay"][name], replay_arrays = buffer.get_state()
+            for key, value in replay_arrays.items():
+                arrays[f"omad_replay/{name}/{key}"] = value
+        return state, arrays
+
+    def save_checkpoint(
+        self,
+        current_query: str,
+        iteration_results: List[Dict[str, Any]],
+        stop_reason: Optional[str] = None
+    ) -> str:
+        """Writes the current state to `checkpoint_dir`; returns the state file path."""
+        state, arrays = self.checkpoint_state(current_query, iteration_results, stop_reason)
+        path = save_checkpoint(self.checkpoint_dir, state, arrays)
+        self.logger.info(f"Checkpoint after iteration {len(iteration_results)} written to {path}")
+        return path
+
+    def restore_checkpoint(self, path: str) -> Tuple[str, List[Dict[str, Any]], Optional[str]]:
+        """
+        Loads a checkpoint into this loop, which must be built from the same agent
+        configuration. Returns (current_query, history, stop_reason).
+        """
+        state, arrays = load_checkpoint(path)
+        if state["groups"] != json.loads(json.dumps(self.orchestrator.groups)):
+            raise ValueError("Checkpoint was written for a different agent configuration.")
+
+        for agent_id, policy in self.diffusion_agents.items():
+            network = getattr(policy, "score_network", None)
+            network_state = _sub_arrays(arrays, f"{agent_id}/")
+            if network is not None and network_state:
+                network.set_state(network_state)
+
+            replay_state = state.get("replay", {}).get(agent_id)
+            if replay_state is not None:
+                policy.replay = ReplayBuffer(
+                    replay_state["capacity"],
+                    tuple(replay_state["trajectory_shape"]),
+                    prioritized=replay_state["prioritized"],
+                    priority_exponent=replay_state["priority_exponent"]
+                )
+                policy.replay.set_state(replay_state, _sub_arrays(arrays, f"replay/{agent_id}/"))
+            if agent_id in state.get("online_calls", {}):
+                policy._online_calls = state["online_calls"][agent_id]
+
+        for shape, buffer in self.orchestrator.replay_buffers.items():
+            name = _shape_name(shape)
+            replay_state = state.get("omad_replay", {}).get(name)
+            if replay_state is not None:
+                buffer.set_state(replay_state, _sub_arrays(arrays, f"omad_replay/{name}/"))
+
+        for agent_id, rng_state in state.get("rng_states", {}).items():
+            policy = self.diffusion_agents.get(agent_id)
+            if policy is not None:
+                policy.rng.bit_generator.state = rng_state
+
+        self.env.blackboard.set_state(state["blackboard"])
+        self.history = state["history"]
+        self.logger.info(f"Restored checkpoint at iteration {state['next_iteration']} from {path}")
+        return state["current_query"], state["history"], state["stop_reason"]
+
+    def _maybe_checkpoint(self, current_query: str, iteration_results: List[Dict[str, Any]]):
+        if self.checkpoint_dir and len(iteration_results) % self.checkpoint_every == 0:
+            with self.profiler.span("loop.checkpoint"):
+                self.save_checkpoint(current_query, iteration_results)
+
+    def _finish(self, final_query: str, iteration_results: List[Dict[str, Any]], stop_reason: str) -> Dict[str, Any]:
+        self.logger.info(f"Loop stopped after {len(iteration_results)} iteration(s): {stop_reason}")
+        iteration_results[-1]["stop_reason"] = stop_reason
         self.history = iteration_results
+        if self.checkpoint_dir:
+            self.save_checkpoint(final_query, iteration_results, stop_reason)
         return {
-            "final_query": current_query,
+            "final_query": final_query,
             "final_gap_score": iteration_results[-1]["gap_score"],
+            "stop_reason": stop_reason,
             "history": self.history
         }
 
@@ -1,5 +1,6 @@
 import logging
 import argparse
+import os
 import sys
 import json
 try:
@@ -13,6 +14,8 @@ except ImportError:
 
 from src.evaluation import Evaluator
 from src.integrated_loop import IntegratedAdversarialLoop
+from src.profiling import Profiler
+from src.results_index import ResultsIndex
 from src.visualization import print_terminal_chart, plot_gap_closing, visualize_evaluation
 
 # Set up rich console
@@ -37,7 +40,8 @@ def run_loop_with_rich(args):
     query = args.query or "How do we unify physics?"
     
     console.print(f"Initializing Adversarial Loop...")
-    loop = IntegratedAdversarialLoop(configs, expert_text, max_iterations=args.iterations)
+    profiler = Profiler() if args.profile or args.trace else None
+    loop = IntegratedAdversarialLoop(configs, expert_text, max_iterations=args.iterations, profiler=profiler)
     
     # Actually run the loop
     final_state = loop.run_iteration(query)
@@ -65,10 +69,31 @@ def run_loop_with_rich(args):
         if args.plot_output:
             plot_gap_closing(history, save_path=args.plot_output)
 
+    if profiler is not None:
+        if args.profile:
+            profiler.export_json(args.profile)
+            console.print(f"Stage profile written to {args.profile}")
+        if args.trace:
+            profiler.export_chrome_trace(args.trace)
+            console.print(f"Chrome trace written to {args.trace}")
+
 def run_eval_with_rich(args):
     """Runs the Evaluator with rich display."""
-    evaluator = Evaluator()
-    benchmarks = evaluator.load_benchmarks()
+    evaluator = Evaluator(
+        max_workers=args.workers,
+        executor=args.executor,
+        seed=args.seed,
+        report_format=args.report_format,
+        report_codec=args.report_codec,
+        include_consensus=not args.no_consensus
+    )
+    benchmarks = evaluator.load_benchmarks(
+        benchmark_dir=args.benchmarks,
+        offset=args.offset,
+        limit=args.limit,
+        shard_index=args.shard_index,
+        num_shards=args.num_shards
+    )
     
     domains_to_run = []
     if args.domain:
@@ -108,6 +133,46 @@ def run_eval_with_rich(args):
                 domain_plot_path = f"{base}_{domain}{ext}"
                 visualize_evaluation(report, save_path=domain_plot_path)
 
+def _fmt(value, spec: str = ".4f") -> str:
+    return "-" if value is None else format(value, spec)
+
+def run_results_with_rich(args):
+    """Indexes the results directory and shows aggregated metrics."""
+    if not os.path.isdir(args.results_dir):
+        console.print(f"Error: Results directory {args.results_dir} not found.")
+        return
+    index = ResultsIndex(args.index or os.path.join(args.results_dir, "index.sqlite"))
+    try:
+        ingested = index.ingest(args.results_dir)
+        console.print(f"Indexed {ingested} new or changed report(s); {len(index)} in total.")
+        if args.reports:
+            rows = index.report_summaries(domain=args.domain, limit=args.limit)
+            title = "Evaluation Reports"
+            columns = ["timestamp", "domain", "items", "avg_improvement", "avg_stability", "avg_sample_efficiency"]
+        else:
+            rows = index.domain_summary(domain=args.domain)
+            title = "Results by Domain"
+            columns = ["domain", "reports", "items", "runs", "avg_improvement", "avg_stability", "avg_sample_efficiency"]
+    finally:
+        index.close()
+
+    cells = [
+        [_fmt(row[c]) if isinstance(row[c], float) else _fmt(row[c], "") for c in columns]
+        for row in rows
+    ]
+    if HAS_RICH:
+        table = Table(title=title)
+        for column in columns:
+            table.add_column(column, style="cyan" if column in ("domain", "timestamp") else "green")
+        for row in cells:
+            table.add_row(*row)
+        console.print(table)
+    else:
+        print(f"\n{title}:")
+        print(" | ".join(columns))
+        for row in cells:
+            print(" | ".join(row))
+
 def main():
     parser = argparse.ArgumentParser(description="Adversarial Domain Diffuser CLI")
     
@@ -121,14 +186,35 @@ def main():
     loop_parser.add_argument("--iterations", type=int, default=3, help="Number of iterations")
     loop_parser.add_argument("--visualize", action="store_true", help="Enable terminal visualization")
     loop_parser.add_argument("--plot-output", type=str, help="Path to save plot (e.g., plot.png)")
+    loop_parser.add_argument("--profile", type=str, help="Write per-stage timing statistics to this JSON file")
+    loop_parser.add_argument("--trace", type=str, help="Write a Chrome trace (chrome://tracing) to this file")
     
     # Eval command
     eval_parser = subparsers.add_parser("eval", help="Run domain-specific evaluation")
     eval_parser.add_argument("--domain", type=str, help="Specific domain to evaluate")
     eval_parser.add_argument("--iterations", type=int, default=3, help="Iterations per loop")
+    eval_parser.add_argument("--benchmarks", type=str, help="Directory of benchmark item files (JSONL/CSV) or sharded subdirectories")
+    eval_parser.add_argument("--offset", type=int, default=0, help="Skip this many items per domain")
+    eval_parser.add_argument("--limit", type=int, help="Evaluate at most this many items per domain")
+    eval_parser.add_argument("--shard-index", type=int, default=0, help="Shard evaluated by this node")
+    eval_parser.add_argument("--num-shards", type=int, default=1, help="Number of shards items are split into")
+    eval_parser.add_argument("--workers", type=int, default=1, help="Concurrent (item, run) tasks")
+    eval_parser.add_argument("--executor", choices=["thread", "process"], default="thread", help="Pool type for --workers > 1")
+    eval_parser.add_argument("--seed", type=int, default=0, help="Root seed for per-task seeding")
+    eval_parser.add_argument("--report-format", choices=["json", "jsonl"], default="json", help="Report file format")
+    eval_parser.add_argument("--report-codec", choices=["gzip", "zstd"], help="Compression for JSONL reports (requires --report-format jsonl)")
+    eval_parser.add_argument("--no-consensus", action="store_true", help="Omit final consensus text from reports")
     eval_parser.add_argument("--visualize", action="store_true", help="Enable terminal visualization")
     eval_parser.add_argument("--plot-output", type=str, help="Path to save plot (e.g., eval_plot.png)")
 
+    # Results command
+    results_parser = subparsers.add_parser("results", help="Index and aggregate past evaluation reports")
+    results_parser.add_argument("--results-dir", type=str, default="results", help="Directory of evaluation reports")
+    results_parser.add_argument("--index", type=str, help="SQLite index path (default: <results-dir>/index.sqlite)")
+    results_parser.add_argument("--domain", type=str, help="Only aggregate this domain")
+    results_parser.add_argument("--reports", action="store_true", help="List per-report aggregates instead of per-domain")
+    results_parser.add_argument("--limit", type=int, help="Maximum number of reports listed with --reports")
+
     args = parser.parse_args()
     
     # Setup logging
@@ -146,6 +232,8 @@ def main():
         run_loop_with_rich(args)
     elif args.command == "eval":
         run_eval_with_rich(args)
+    elif args.command == "results":
+        run_results_with_rich(args)
     else:
         parser.print_help()
 
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Executor, Future, TimeoutError as FutureTimeoutError
+from typing import Any, List, Optional, Tuple
+
+class SyncClientAdapter:
+    """
+    Gives a synchronous model client (one that only implements `generate(prompt)`)
+    the async `agenerate(prompt)` protocol by running calls in an executor.
+    """
+
+    def __init__(self, client: Any, executor: Optional[Executor] = None):
+        """
+        Args:
+            client: Object implementing `generate(prompt: str) -> str`.
+            executor: Executor for the blocking calls (defaults to the event loop's).
+        """
+        self.client = client
+        self.executor = executor
+        self.logger = logging.getLogger(__name__)
+
+    def generate(self, prompt: str) -> str:
+        return self.client.generate(prompt)
+
+    async def agenerate(self, prompt: str) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.client.generate, prompt)
+
+def supports_async(client: Any) -> bool:
+    """True if the client natively implements `agenerate`."""
+    return callable(getattr(client, "agenerate", None))
+
+def as_async_client(client: Any, executor: Optional[Executor] = None) -> Any:
+    """
+    Returns a client implementing `agenerate`: the client itself if it already
+    does, otherwise a SyncClientAdapter around it.
+    """
+    if client is None or supports_async(client):
+        return client
+    return SyncClientAdapter(client, executor=executor)
+
+
+class BatchingClient:
+    """
+    Micro-batching wrapper around a model client.
+
+    Prompts submitted by concurrent callers (threads or coroutines) are collected
+    for up to `max_wait` seconds or until `max_batch_size` prompts are pending,
+    dispatched as one `generate_batch(prompts)` call on the wrapped client, and the
+    results are fanned back out to the callers. Clients without `generate_batch`
+    are called once per prompt from the dispatcher thread.
+    """
+
+    _STOP = object()
+
+    def __init__(self, client: Any, max_batch_size: int = 16, max_wait: float = 0.01, timeout: Optional[float] = None):
+        """
+        Args:
+            client: Backend implementing `generate_batch(prompts)` and/or `generate(prompt)`.
+            max_batch_size: Maximum prompts per dispatched batch.
+            max_wait: Seconds to wait for more prompts after the first one arrives.
+            timeout: Default per-request timeout in seconds (None waits forever).
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1.")
+        self.client = client
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self.logger = logging.getLogger(__name__)
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+        self.batches_dispatched = 0
+
+    def submit(self, prompt: str) -> Future:
+        """Queues a prompt and returns a Future for its completion."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BatchingClient is closed.")
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="batching-client", daemon=True)
+                self._worker.start()
+        future: Future = Future()
+        self._queue.put((prompt, future))
+        return future
+
+    def generate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        """Blocking call; raises TimeoutError if no result arrives within the timeout."""
+        future = self.submit(prompt)
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Batched generate timed out after {timeout or self.timeout}s")
+
+    async def agenerate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        """Awaitable call sharing the same batches as `generate`."""
+        future = self.submit(prompt)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Batched agenerate timed out after {timeout or self.timeout}s")
+
+    def generate_batch(self, prompts: List[str]) -> List[str]:
+        """Pass-through for callers that already hold a batch."""
+        return self._dispatch(list(prompts))
+
+    def close(self):
+        """Stops the dispatcher after the pending prompts are served."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            worker = self._worker
+        if worker is not None:
+            self._queue.put(self._STOP)
+            worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _dispatch(self, prompts: List[str]) -> List[str]:
+        if hasattr(self.client, "generate_batch"):
+            results = list(self.client.generate_batch(prompts))
+            if len(results) != len(prompts):
+                raise ValueError(f"generate_batch returned {len(results)} results for {len(prompts)} prompts.")
+            return results
+        return [self.client.generate(prompt) for prompt in prompts]
+
+    def _collect(self, first: Tuple[str, Future]) -> Tuple[List[Tuple[str, Future]], bool]:
+        """Gathers a batch starting from `first`; returns (batch, stop_requested)."""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is self._STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+            batch, stop = self._collect(item)
+
+            # Skip requests whose callers already timed out
+            live = [(prompt, future) for prompt, future in batch if future.set_running_or_notify_cancel()]
+            if not live:
+                continue
+            try:
+                results = self._dispatch([prompt for prompt, _ in live])
+            except Exception as exc:
+                for _, future in live:
+                    future.set_exception(exc)
+                continue
+            self.batches_dispatched += 1
+            for (_, future), result in zip(live, results):
+                future.set_result(result)
@@ -1,8 +1,60 @@
+import os
 import numpy as np
 import logging
-from typing import List, Dict, Any, Optional
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Tuple
 from src.diffusion import DiffusionPolicy
 from src.grouping import EmbodimentGrouper
+from src.profiling import DISABLED, Profiler
+from src.replay_buffer import ReplayBuffer
+
+class CoordinationPlan:
+    """
+    Precompiled index layout used by OMADOrchestrator.coordinate.
+    Group members are laid out contiguously ("slots") so that intra-group
+    reductions over a stacked trajectory tensor become segment reductions.
+    """
+    def __init__(self, groups: Dict[str, List[str]]):
+        """
+        Args:
+            groups: Mapping of group names to the agent IDs they contain.
+        """
+        self.group_names: List[str] = []
+        self.agent_ids: List[str] = []
+        self.agent_index: Dict[str, int] = {}
+
+        slot_index = []
+        slot_group = []
+        for group_name, agent_ids in groups.items():
+            if not agent_ids:
+                continue
+            group_idx = len(self.group_names)
+            self.group_names.append(group_name)
+            for aid in agent_ids:
+                if aid not in self.agent_index:
+                    self.agent_index[aid] = len(self.agent_ids)
+                    self.agent_ids.append(aid)
+                slot_index.append(self.agent_index[aid])
+                slot_group.append(group_idx)
+
+        # slot -> row of the stacked tensor, and slot -> group
+        self.slot_index = np.array(slot_index, dtype=np.intp)
+        self.slot_group = np.array(slot_group, dtype=np.intp)
+        self.group_starts, self.group_counts = self.segments(self.slot_group)
+        # Per-group integer index arrays into the stacked tensor
+        self.group_index = np.split(self.slot_index, self.group_starts[1:])
+
+    @staticmethod
+    def segments(slot_group: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Start offsets and lengths of the contiguous runs in a sorted group-id array.
+        """
+        if len(slot_group) == 0:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+        starts = np.flatnonzero(np.r_[True, slot_group[1:] != slot_group[:-1]])
+        counts = np.diff(np.r_[starts, len(slot_group)])
+        return starts, counts
+
 
 class OMADOrchestrator:
     """
@@ -10,17 +62,57 @@ class OMADOrchestrator:
     Manages coordination between multiple DiffusionPolicy agents using
     entropy-augmented objectives and joint distributional value functions.
     """
-    def __init__(self, agents: Dict[str, DiffusionPolicy], alpha: float = 0.1, agent_metadata: Optional[List[Dict[str, Any]]] = None):
+    CONSENSUS_STRATEGIES = ("mean", "softmax", "topk", "medoid")
+
+    def __init__(
+        self,
+        agents: Dict[str, DiffusionPolicy],
+        alpha: float = 0.1,
+        agent_metadata: Optional[List[Dict[str, Any]]] = None,
+        consensus_strategy: str = "mean",
+        temperature: float = 1.0,
+        top_k: int = 1,
+        replay_capacity: int = 1024,
+        prioritized_replay: bool = False,
+        replay_memmap_dir: Optional[str] = None,
+        online_updates: bool = False,
+        profiler: Optional[Profiler] = None
+    ):
         """
         Initialize the OMAD Orchestrator.
         
         Args:
-            agents: A dictionary mapping agent IDs to their DiffusionPolicy.
+            agents: A dictionary mapping agent IDs to their DiffusionPolicy. Agents with
+                different (horizon, action_dim) shapes are coordinated separately.
             alpha: Entropy augmentation coefficient (exploration bonus).
             agent_metadata: Optional metadata for each agent used for grouping.
+            consensus_strategy: How trajectories are combined within and across groups:
+                'mean' (unweighted), 'softmax' (weighted by value + entropy bonus),
+                'topk' (mean of the `top_k` best-scoring) or 'medoid'.
+            temperature: Softmax temperature for the 'softmax' strategy.
+            top_k: Number of trajectories kept per group by the 'topk' strategy.
+            replay_capacity: Rows per replay buffer recording step() outputs (0 disables recording).
+            prioritized_replay: Sample replay rows proportionally to their trajectory scores.
+            replay_memmap_dir: Optional directory for memory-mapped replay storage.
+            online_updates: Call `update_online` on every policy with its replay buffer after each step.
+            profiler: Optional profiler timing sampling, coordination, replay and updates in `step`.
         """
+        if consensus_strategy not in self.CONSENSUS_STRATEGIES:
+            raise ValueError(
+                f"Unknown consensus strategy '{consensus_strategy}'. "
+                f"Expected one of {self.CONSENSUS_STRATEGIES}."
+            )
+        if temperature <= 0:
+            raise ValueError("temperature must be positive.")
+        if top_k < 1:
+            raise ValueError("top_k must be at least 1.")
+
         self.agents = agents
         self.alpha = alpha
+        self.consensus_strategy = consensus_strategy
+        self.temperature = temperature
+        self.top_k = top_k
+        self.profiler = profiler if profiler is not None else DISABLED
         self.logger = logging.getLogger(__name__)
         
         # Initialize grouper if metadata is provided
@@ -31,6 +123,68 @@ class OMADOrchestrator:
         else:
             self.groups = {"default": list(agents.keys())}
 
+        # Compile group membership into index arrays once
+        self.plan = CoordinationPlan(self.groups)
+        # Consensus averages trajectories elementwise, so each trajectory shape
+        # gets its own plan over the group members of that shape
+        shapes = defaultdict(set)
+        for agent_id, agent in agents.items():
+            shapes[(agent.horizon, agent.action_dim)].add(agent_id)
+        if len(shapes) <= 1:
+            self.shape_plans = {shape: self.plan for shape in shapes}
+        else:
+            self.shape_plans = {
+                shape: CoordinationPlan({
+                    group: [aid for aid in members if aid in agent_ids]
+                    for group, members in self.groups.items()
+                })
+                for shape, agent_ids in shapes.items()
+            }
+
+        # Bucket agents whose policies can share one fused denoising loop (same sampler)
+        self._fusion_keys = None
+        self._refresh_shape_buckets()
+
+        # One replay buffer per trajectory shape, written on every step
+        self.online_updates = online_updates
+        self.replay_buffers: Dict[Tuple[int, int], ReplayBuffer] = {}
+        if replay_capacity > 0:
+            for agent in self.agents.values():
+                shape = (agent.horizon, agent.action_dim)
+                if shape in self.replay_buffers:
+                    continue
+                memmap_dir = None
+                if replay_memmap_dir:
+                    memmap_dir = os.path.join(replay_memmap_dir, f"h{shape[0]}_a{shape[1]}")
+                self.replay_buffers[shape] = ReplayBuffer(
+                    replay_capacity, shape, prioritized=prioritized_replay, memmap_dir=memmap_dir
+                )
+
+    def _build_shape_buckets(self, keys: List[Tuple[Any, ...]]) -> Dict[Tuple[Any, ...], List[str]]:
+        """
+        Groups agent IDs by their policy's fusion key (class, trajectory shape, sampler).
+        """
+        buckets = defaultdict(list)
+        for agent_id, key in zip(self.agents, keys):
+            buckets[key].append(agent_id)
+        return dict(buckets)
+
+    def _refresh_shape_buckets(self):
+        """
+        Rebuilds the shape buckets when a policy's fusion key changed since the
+        last call (e.g. after `set_inference_steps`).
+        """
+        keys = [agent.fusion_key() for agent in self.agents.values()]
+        if keys == self._fusion_keys:
+            return
+        self._fusion_keys = keys
+        self.shape_buckets = self._build_shape_buckets(keys)
+        agent_index = {aid: i for i, aid in enumerate(self.agents)}
+        self._bucket_sources = {
+            key: np.array([agent_index[aid] for aid in agent_ids], dtype=np.int64)
+            for key, agent_ids in self.shape_buckets.items()
+        }
+
     def joint_distributional_value_function(self, joint_trajectories: Dict[str, np.ndarray]) -> float:
         """
         Placeholder for the joint distributional value function.
@@ -52,54 +206,218 @@ class OMADOrchestrator:
         """
         return float(np.var(trajectories) * self.alpha)
 
-    def coordinate(self, agent_trajectories: Dict[str, np.ndarray]) -> np.ndarray:
+    def batched_value(self, stacked: np.ndarray) -> np.ndarray:
+        """
+        Vectorized `joint_distributional_value_function` for each trajectory in a
+        stacked tensor of shape (num_trajectories, ...).
+        """
+        flat = stacked.reshape(len(stacked), -1)
+        return -np.mean(np.square(flat), axis=1)
+
+    def batched_entropy_bonus(self, stacked: np.ndarray) -> np.ndarray:
+        """
+        Vectorized `calculate_entropy_bonus` for each trajectory in a stacked tensor.
+        """
+        flat = stacked.reshape(len(stacked), -1)
+        return np.var(flat, axis=1) * self.alpha
+
+    @staticmethod
+    def _apply_weights(stacked: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        return stacked * weights.reshape((-1,) + (1,) * (stacked.ndim - 1))
+
+    def _consensus_weights(
+        self,
+        stacked: np.ndarray,
+        scores: np.ndarray,
+        starts: np.ndarray,
+        counts: np.ndarray
+    ) -> np.ndarray:
+        """
+        Per-trajectory weights for the configured consensus strategy.
+        Trajectories are laid out in contiguous segments (given by `starts`/`counts`)
+        and the weights of each segment sum to one.
+        """
+        segment = np.repeat(np.arange(len(starts)), counts)
+
+        if self.consensus_strategy == "mean":
+            return 1.0 / counts[segment]
+
+        if self.consensus_strategy == "softmax":
+            z = scores / self.temperature
+            z = z - np.maximum.reduceat(z, starts)[segment]
+            e = np.exp(z)
+            return e / np.add.reduceat(e, starts)[segment]
+
+        if self.consensus_strategy == "topk":
+            # Sort by segment, then by descending score; rank within each segment
+            order = np.lexsort((-scores, segment))
+            rank = np.arange(len(order)) - starts[segment[order]]
+            weights = np.zeros(len(scores))
+            weights[order[rank < self.top_k]] = 1.0
+            return weights / np.minimum(counts, self.top_k)[segment]
+
+        # medoid: the member with the smallest summed distance to its segment peers
+        flat = stacked.reshape(len(stacked), -1)
+        sq_norms = np.einsum("ij,ij->i", flat, flat)
+        sq_dists = sq_norms[:, None] + sq_norms[None, :] - 2.0 * flat @ flat.T
+        dists = np.sqrt(np.maximum(sq_dists, 0.0))
+        dists[segment[:, None] != segment[None, :]] = 0.0
+        order = np.lexsort((dists.sum(axis=1), segment))
+        weights = np.zeros(len(scores))
+        weights[order[starts]] = 1.0
+        return weights
+
+    def coordinate(
+        self,
+        agent_trajectories: Dict[str, np.ndarray],
+        return_scores: bool = False,
+        plan: Optional[CoordinationPlan] = None
+    ):
         """
         Consensus mechanism to find a coordinated reasoning path.
         Coordinates within groups first, then across groups.
+
+        Args:
+            agent_trajectories: Mapping of agent IDs to their sampled trajectories
+                (all of one shape).
+            return_scores: If True, also return the per-group trajectory scores.
+            plan: Coordination plan to use; defaults to the plan over all agents.
+                `step` passes the plan of one trajectory shape from `shape_plans`.
+
+        Returns:
+            The global consensus trajectory, or a `(consensus, group_scores)` tuple
+            when `return_scores` is set. `group_scores` maps each group name to the
+            value + entropy score of its members' trajectories, in member order.
         """
-        if not agent_trajectories:
-            return np.array([])
+        plan = plan if plan is not None else self.plan
+        present = [aid for aid in plan.agent_ids if aid in agent_trajectories]
+        if not present:
+            empty = np.array([])
+            return (empty, {}) if return_scores else empty
 
-        group_consensuses = []
-        
-        # Step 1: Intra-group coordination
-        for group_name, agent_ids in self.groups.items():
-            group_trajs = [agent_trajectories[aid] for aid in agent_ids if aid in agent_trajectories]
-            if not group_trajs:
-                continue
-                
-            # Score trajectories within group
-            group_scores = []
-            for traj in group_trajs:
-                base_value = self.joint_distributional_value_function({"temp": traj})
-                entropy_bonus = self.calculate_entropy_bonus(traj)
-                group_scores.append(base_value + entropy_bonus)
-            
-            # Simple intra-group consensus: average of trajectories in group
-            group_consensus = np.mean(group_trajs, axis=0)
-            group_consensuses.append(group_consensus)
-            self.logger.debug(f"Group {group_name} coordinated consensus calculated.")
+        stacked = np.stack([agent_trajectories[aid] for aid in present]).astype(np.float64, copy=False)
+        if len(present) == len(plan.agent_ids):
+            slot_rows = plan.slot_index
+            slot_group = plan.slot_group
+            starts, counts = plan.group_starts, plan.group_counts
+        else:
+            # Some agents did not report: remap slots onto the rows that exist
+            row_of = np.full(len(plan.agent_ids), -1, dtype=np.intp)
+            row_of[[plan.agent_index[aid] for aid in present]] = np.arange(len(present))
+            rows = row_of[plan.slot_index]
+            keep = rows >= 0
+            slot_rows = rows[keep]
+            slot_group = plan.slot_group[keep]
+            starts, counts = plan.segments(slot_group)
+
+        # Score every trajectory in one pass
+        scores = self.batched_value(stacked) + self.batched_entropy_bonus(stacked)
+
+        # Step 1: Intra-group coordination (weighted segment sums over group slots)
+        slot_trajs = stacked[slot_rows]
+        slot_scores = scores[slot_rows]
+        weights = self._consensus_weights(slot_trajs, slot_scores, starts, counts)
+        group_consensuses = np.add.reduceat(self._apply_weights(slot_trajs, weights), starts, axis=0)
 
         # Step 2: Inter-group coordination (Global consensus)
-        if not group_consensuses:
-            return np.array([])
-            
-        global_consensus = np.mean(group_consensuses, axis=0)
-        return global_consensus
+        # Each group is represented by its consensus and the mean score of its members
+        group_mean_scores = np.add.reduceat(slot_scores, starts) / counts
+        single = np.zeros(1, dtype=np.intp)
+        group_weights = self._consensus_weights(
+            group_consensuses, group_mean_scores, single, np.array([len(starts)])
+        )
+        global_consensus = self._apply_weights(group_consensuses, group_weights).sum(axis=0)
+
+        if not return_scores:
+            return global_consensus
+
+        group_scores = {
+            plan.group_names[slot_group[start]]: member_scores
+            for start, member_scores in zip(starts, np.split(scores[slot_rows], starts[1:]))
+        }
+        return global_consensus, group_scores
 
-    def step(self, env_context: str) -> Dict[str, np.ndarray]:
+    def step(self, env_context: str) -> Dict[str, Any]:
         """
         Perform a coordination step: agents sample, then orchestrator coordinates.
+
+        Returns:
+            Dict with 'individual_trajectories', 'consensus_paths' (one consensus per
+            trajectory shape), 'consensus_path' (the consensus when all agents share
+            one shape, otherwise None) and 'group_scores' (member scores per group,
+            in member order).
         """
-        # Agents generate candidate trajectories
-        agent_trajectories = {}
-        for agent_id, agent in self.agents.items():
-            agent_trajectories[agent_id] = agent.sample_action(env_context)
-            
-        # Coordinate
-        consensus_path = self.coordinate(agent_trajectories)
-        
+        profiler = self.profiler
+        with profiler.span("omad.step"):
+            # Agents generate candidate trajectories, one fused denoising pass per shape bucket
+            self._refresh_shape_buckets()
+            agent_trajectories = {}
+            for key, agent_ids in self.shape_buckets.items():
+                policies = [self.agents[aid] for aid in agent_ids]
+                with profiler.span("omad.sample"):
+                    samples = type(policies[0]).sample_population(policies, env_context)[:, 0]
+                for idx, agent_id in enumerate(agent_ids):
+                    agent_trajectories[agent_id] = samples[idx]
+
+                buffer = self.replay_buffers.get(samples.shape[1:])
+                if buffer is not None:
+                    with profiler.span("omad.replay"):
+                        scores = self.batched_value(samples) + self.batched_entropy_bonus(samples)
+                        buffer.add_batch(samples, env_context, np.exp(scores), self._bucket_sources[key])
+
+            # Coordinate each trajectory shape separately
+            consensus_paths = {}
+            shape_scores = []
+            with profiler.span("omad.coordinate"):
+                for shape, plan in self.shape_plans.items():
+                    consensus_paths[shape], scores = self.coordinate(
+                        agent_trajectories, return_scores=True, plan=plan
+                    )
+                    shape_scores.append((plan, scores))
+            group_scores = self._merge_group_scores(shape_scores)
+
+            # Coordinated trajectories enter the buffer at the highest priority (source -1)
+            for shape, consensus in consensus_paths.items():
+                buffer = self.replay_buffers.get(shape)
+                if buffer is not None:
+                    with profiler.span("omad.replay"):
+                        buffer.add(consensus, env_context)
+
+            if self.online_updates:
+                with profiler.span("omad.update"):
+                    for agent in self.agents.values():
+                        buffer = self.replay_buffers.get((agent.horizon, agent.action_dim))
+                        if buffer is not None:
+                            agent.update_online(buffer)
+
+        if len(consensus_paths) == 1:
+            consensus_path = next(iter(consensus_paths.values()))
+        elif not consensus_paths:
+            consensus_path = np.array([])
+        else:
+            consensus_path = None
         return {
             "individual_trajectories": agent_trajectories,
-            "consensus_path": consensus_path
+            "consensus_paths": consensus_paths,
+            "consensus_path": consensus_path,
+            "group_scores": group_scores
         }
+
+    def _merge_group_scores(self, shape_scores: List[Tuple[CoordinationPlan, Dict[str, np.ndarray]]]) -> Dict[str, np.ndarray]:
+        """
+        Combines the per-shape group scores of `step` into one score array per
+        group, ordered like the group's members.
+        """
+        if len(shape_scores) == 1:
+            return shape_scores[0][1]
+        agent_scores = {}
+        for plan, group_scores in shape_scores:
+            for group, scores in group_scores.items():
+                members = [aid for aid in self.groups[group] if aid in plan.agent_index]
+                agent_scores.update(zip(members, scores))
+        merged = {}
+        for group, members in self.groups.items():
+            scores = [agent_scores[aid] for aid in members if aid in agent_scores]
+            if scores:
+                merged[group] = np.array(scores)
+        return merged
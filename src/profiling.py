@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List
+
+NUM_BUCKETS = 32
+FOLD_EVERY = 4096
+
+class StageStats:
+    """
+    Running statistics of one stage. Durations go into log2 histogram buckets:
+    bucket 0 holds spans under 1 µs, bucket k spans in [2^(k-1), 2^k) µs.
+    """
+
+    __slots__ = ("count", "total_ns", "min_ns", "max_ns", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+        self.buckets = [0] * NUM_BUCKETS
+
+    def add(self, duration_ns: int):
+        self.count += 1
+        self.total_ns += duration_ns
+        if self.min_ns is None or duration_ns < self.min_ns:
+            self.min_ns = duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+        self.buckets[min(NUM_BUCKETS - 1, (duration_ns // 1000).bit_length())] += 1
+
+    def percentile_us(self, q: float) -> float:
+        """Upper edge (µs) of the histogram bucket holding the `q` quantile."""
+        target = q * self.count
+        seen = 0
+        for k, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= target:
+                return float(2 ** k)
+        return float(2 ** (NUM_BUCKETS - 1))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_ms": self.total_ns / 1e6,
+            "mean_us": self.total_ns / self.count / 1e3 if self.count else 0.0,
+            "min_us": (self.min_ns or 0) / 1e3,
+            "max_us": self.max_ns / 1e3,
+            "p50_us": self.percentile_us(0.5),
+            "p90_us": self.percentile_us(0.9),
+            "p99_us": self.percentile_us(0.99),
+            "histogram_us": {f"<{2 ** k}": n for k, n in enumerate(self.buckets) if n},
+        }
+
+class _Span:
+    __slots__ = ("profiler", "name", "start_ns")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start_ns, time.perf_counter_ns())
+        return False
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+class Profiler:
+    """
+    Low-overhead stage profiler. `span(name)` is a context manager timing a
+    stage with the monotonic `perf_counter_ns` clock; durations are aggregated
+    into per-stage histograms and, up to `max_events`, kept as trace events for
+    Chrome's trace viewer (chrome://tracing or Perfetto).
+
+    Finished spans are appended to a deque (atomic, lock-free) and folded into
+    the statistics in batches, keeping the per-span cost to two clock reads and
+    an append. A disabled profiler returns a shared no-op span, so instrumented
+    code costs one attribute check and method call per stage. Thread-safe.
+    """
+
+    def __init__(self, enabled: bool = True, max_events: int = 100_000):
+        """
+        Args:
+            enabled: Record spans; a disabled profiler ignores them.
+            max_events: Maximum trace events retained (stage statistics are always kept).
+        """
+        self.enabled = enabled
+        self.max_events = max_events
+        self.stages: Dict[str, StageStats] = {}
+        self.events: List[tuple] = []
+        self.dropped_events = 0
+        self._origin_ns = time.perf_counter_ns()
+        self._pending = deque()
+        self._lock = threading.Lock()
+
+    def span(self, name: str):
+        """Times the enclosed block as one occurrence of stage `name`."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, name)
+
+    def record(self, name: str, start_ns: int, end_ns: int):
+        """Records a finished span measured with `time.perf_counter_ns`."""
+        self._pending.append((name, start_ns, end_ns - start_ns, threading.get_ident()))
+        if len(self._pending) >= FOLD_EVERY:
+            self.fold()
+
+    def fold(self):
+        """Moves recorded spans into the stage statistics and trace events."""
+        with self._lock:
+            pending = self._pending
+            for _ in range(len(pending)):
+                event = pending.popleft()
+                stats = self.stages.get(event[0])
+                if stats is None:
+                    stats = self.stages[event[0]] = StageStats()
+                stats.add(event[2])
+                if len(self.events) < self.max_events:
+                    self.events.append(event)
+                else:
+                    self.dropped_events += 1
+
+    def reset(self):
+        with self._lock:
+            self._pending.clear()
+            self.stages = {}
+            self.events = []
+            self.dropped_events = 0
+            self._origin_ns = time.perf_counter_ns()
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage statistics, slowest total first."""
+        self.fold()
+        with self._lock:
+            stages = sorted(self.stages.items(), key=lambda item: item[1].total_ns, reverse=True)
+            return {name: stats.to_dict() for name, stats in stages}
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Trace events in the Chrome trace event format (complete 'X' events, µs)."""
+        pid = os.getpid()
+        self.fold()
+        with self._lock:
+            events = [
+                {
+                    "name": name,
+                    "cat": name.split(".", 1)[0],
+                    "ph": "X",
+                    "ts": (start_ns - self._origin_ns) / 1e3,
+                    "dur": duration / 1e3,
+                    "pid": pid,
+                    "tid": tid,
+                }
+                for name, start_ns, duration, tid in self.events
+            ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_json(self, path: str):
+        """Writes the stage summary as JSON."""
+        with open(path, "w") as f:
+            json.dump({"stages": self.summary(), "dropped_events": self.dropped_events}, f, indent=4)
+
+    def export_chrome_trace(self, path: str):
+        """Writes a Chrome trace file."""
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+DISABLED = Profiler(enabled=False)
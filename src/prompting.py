@@ -0,0 +1,196 @@
+import logging
+from string import Formatter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.blackboard import estimate_tokens
+
+TRUNCATION_MARKER = " [...] "
+
+def truncate_to_tokens(
+    text: str,
+    max_tokens: int,
+    token_counter: Callable[[str], int] = estimate_tokens,
+    keep: str = "head"
+) -> str:
+    """
+    Shortens `text` to at most `max_tokens`, marking the cut with TRUNCATION_MARKER.
+
+    Args:
+        text: Text to shorten.
+        max_tokens: Token budget for the result.
+        token_counter: Function measuring tokens.
+        keep: Which part survives: 'head', 'tail' or 'middle' (keeps both ends
+            and elides the middle).
+    """
+    if keep not in ("head", "tail", "middle"):
+        raise ValueError(f"Unknown keep mode '{keep}'.")
+    if token_counter(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+
+    def piece(n: int) -> str:
+        if keep == "head":
+            return text[:n] + TRUNCATION_MARKER
+        if keep == "tail":
+            return TRUNCATION_MARKER + text[len(text) - n:]
+        half = n // 2
+        return text[:half] + TRUNCATION_MARKER + text[len(text) - (n - half):]
+
+    # Largest character count whose truncated form fits the budget
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if token_counter(piece(mid)) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    result = piece(lo)
+    return result if token_counter(result) <= max_tokens else ""
+
+class Slot:
+    """Truncation policy of one template placeholder."""
+
+    def __init__(self, priority: int = 0, keep: str = "head", min_tokens: int = 0):
+        """
+        Args:
+            priority: Lower-priority slots are truncated first.
+            keep: Which part of an over-long value survives ('head', 'tail', 'middle').
+            min_tokens: Tokens the slot keeps before higher-priority slots are cut.
+        """
+        self.priority = priority
+        self.keep = keep
+        self.min_tokens = min_tokens
+
+class AssembledPrompt:
+    """A rendered prompt with its token count and per-slot truncation report."""
+
+    def __init__(self, text: str, token_count: int, truncated: Dict[str, int]):
+        self.text = text
+        self.token_count = token_count
+        self.truncated = truncated
+
+    def __str__(self) -> str:
+        return self.text
+
+class PromptTemplate:
+    """
+    `str.format`-style template compiled once: the static segments are split out
+    and token-counted at construction, so rendering only measures the slot
+    values and concatenates. With a `token_budget`, slot values are truncated in
+    ascending priority until the prompt fits.
+    """
+
+    def __init__(
+        self,
+        template: str,
+        slots: Optional[Dict[str, Slot]] = None,
+        token_counter: Callable[[str], int] = estimate_tokens
+    ):
+        """
+        Args:
+            template: Template text with `{name}` placeholders.
+            slots: Truncation policy per placeholder (defaults to Slot()).
+            token_counter: Function measuring tokens.
+        """
+        self.token_counter = token_counter
+        self.segments: List[Tuple[str, Optional[str]]] = []
+        for literal, field, _, _ in Formatter().parse(template):
+            self.segments.append((literal, field))
+
+        self.static_tokens = sum(token_counter(literal) for literal, _ in self.segments)
+        self.occurrences: Dict[str, int] = {}
+        for _, field in self.segments:
+            if field is not None:
+                self.occurrences[field] = self.occurrences.get(field, 0) + 1
+        slots = slots or {}
+        self.slots = {name: slots.get(name, Slot()) for name in self.occurrences}
+
+    def render(self, values: Dict[str, str], token_budget: Optional[int] = None) -> AssembledPrompt:
+        """
+        Fills the template, fitting it into `token_budget` tokens if given.
+
+        The reported token count is the sum of the per-segment counts, which for
+        the default estimator never undercounts the joined text.
+        """
+        texts = {name: str(values[name]) for name in self.slots}
+        tokens = {name: self.token_counter(text) for name, text in texts.items()}
+        truncated: Dict[str, int] = {}
+
+        def total() -> int:
+            return self.static_tokens + sum(tokens[n] * k for n, k in self.occurrences.items())
+
+        if token_budget is not None and total() > token_budget:
+            order = sorted(self.slots, key=lambda name: self.slots[name].priority)
+            # First pass honours each slot's floor, the second may cut to zero
+            for respect_floor in (True, False):
+                for name in order:
+                    excess = total() - token_budget
+                    if excess <= 0:
+                        break
+                    slot = self.slots[name]
+                    floor = slot.min_tokens if respect_floor else 0
+                    per_copy = -(-excess // self.occurrences[name])
+                    target = max(floor, tokens[name] - per_copy)
+                    if target >= tokens[name]:
+                        continue
+                    texts[name] = truncate_to_tokens(texts[name], target, self.token_counter, slot.keep)
+                    new_tokens = self.token_counter(texts[name])
+                    truncated[name] = truncated.get(name, 0) + tokens[name] - new_tokens
+                    tokens[name] = new_tokens
+            if total() > token_budget:
+                logging.getLogger(__name__).warning(
+                    f"Prompt static text alone exceeds the budget ({total()} > {token_budget} tokens)"
+                )
+
+        text = "".join(literal + (texts[field] if field is not None else "") for literal, field in self.segments)
+        return AssembledPrompt(text, total(), truncated)
+
+COT_PROMPT = PromptTemplate(
+    """
+You are an expert assistant in the {domain} domain.
+Use the following context to help answer the user's query.
+
+Context:
+{context}
+
+User Query:
+{query}
+
+Task:
+Provide a detailed response using Chain-of-Thought reasoning. 
+1. Break down the query into its core components.
+2. Analyze each component based on the provided context and your domain expertise.
+3. Synthesize the findings into a clear, professional answer.
+
+Reasoning:
+""",
+    slots={
+        "domain": Slot(priority=3),
+        # The query may embed the shared blackboard: keep the question and the newest entries
+        "query": Slot(priority=2, keep="middle", min_tokens=64),
+        "context": Slot(priority=1, keep="head", min_tokens=64),
+    }
+)
+
+ADVERSARIAL_PROMPT = PromptTemplate(
+    """
+        Original Prompt: {original_prompt}
+        
+        Target Model Response: {target_response}
+        
+        Expert Model Reference: {expert_reference}
+        
+        Task: Identify the semantic gaps, missing reasoning, or inaccuracies in the Target Model's response 
+        compared to the Expert Model. Then, generate a follow-up "adversarial" question that would 
+        force the model to confront these gaps directly.
+        
+        Adversarial Question:
+        """,
+    slots={
+        "original_prompt": Slot(priority=3, keep="middle", min_tokens=64),
+        "expert_reference": Slot(priority=2, keep="head", min_tokens=64),
+        # The target response is the rendered blackboard: newest entries matter most
+        "target_response": Slot(priority=1, keep="tail", min_tokens=64),
+    }
+)
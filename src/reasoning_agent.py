@@ -1,66 +1,126 @@
 import logging
-from typing import Optional, Any
+from typing import Optional, Any, Tuple
+
+from src.model_client import as_async_client
+from src.profiling import DISABLED, Profiler
+from src.prompting import COT_PROMPT, AssembledPrompt
+from src.retrieval import Retriever
 
 class DomainReasoningAgent:
     """
     An LLM-based agent specialized in a specific domain (e.g., Legal, Medical).
-    Uses Chain-of-Thought (CoT) prompting and placeholder RAG for reasoning.
+    Uses Chain-of-Thought (CoT) prompting and local retrieval (RAG) for reasoning.
     """
 
-    def __init__(self, domain: str, model_client: Optional[Any] = None):
+    def __init__(
+        self,
+        domain: str,
+        model_client: Optional[Any] = None,
+        retriever: Optional[Retriever] = None,
+        retrieval_k: int = 3,
+        prompt_token_budget: Optional[int] = None,
+        profiler: Optional[Profiler] = None
+    ):
         """
         Initialize the agent with a domain and an optional LLM client.
         
         Args:
             domain: The target domain (e.g., 'legal', 'medical').
-            model_client: An object that implements a `generate(prompt: str)` method.
+            model_client: An object that implements a `generate(prompt: str)` method
+                and/or an async `agenerate(prompt: str)` method.
+            retriever: Optional domain index; without one a placeholder context is used.
+            retrieval_k: Number of passages retrieved per query.
+            prompt_token_budget: Maximum prompt size in (estimated) tokens; context and
+                blackboard are truncated by priority to fit. None disables truncation.
+            profiler: Optional profiler timing retrieval, prompt assembly and LLM calls.
         """
         self.domain = domain.lower()
         self.model_client = model_client
+        self.retriever = retriever
+        self.retrieval_k = retrieval_k
+        self.prompt_token_budget = prompt_token_budget
+        self.last_prompt_tokens = 0
+        self.profiler = profiler if profiler is not None else DISABLED
         self.logger = logging.getLogger(__name__)
 
+    def retrieval_key(self) -> Tuple[str, Optional[int], int]:
+        """
+        (domain, retriever id, k): agents with equal keys retrieve the same
+        context for a query, so their lookups can be shared.
+        """
+        retriever_id = self.retriever.cache_id if self.retriever is not None else None
+        return (self.domain, retriever_id, self.retrieval_k)
+
     def _retrieve_context(self, query: str) -> str:
         """
-        Mock placeholder for domain-specific retrieval (RAG).
-        This will be replaced with actual vector store lookups later.
+        Domain-specific retrieval (RAG): the top passages from the agent's
+        retriever, or a placeholder context when none is configured.
         """
         self.logger.info(f"Retrieving context for domain '{self.domain}' and query: {query}")
+        if self.retriever is not None:
+            hits = self.retriever.search(query, self.retrieval_k)
+            if not hits:
+                return f"[NO {self.domain.upper()} PASSAGES FOUND]"
+            return "\n".join(f"[{i + 1}] {passage}" for i, (passage, _) in enumerate(hits))
         return f"[MOCK CONTEXT FOR {self.domain.upper()}]: Related statutes or clinical guidelines for '{query}'."
 
     def _build_cot_prompt(self, query: str, context: str) -> str:
         """
         Constructs a Chain-of-Thought prompt based on the domain and context.
         """
-        return f"""
-You are an expert assistant in the {self.domain} domain.
-Use the following context to help answer the user's query.
-
-Context:
-{context}
+        return self._assemble_cot_prompt(query, context).text
 
-User Query:
-{query}
+    def _assemble_cot_prompt(self, query: str, context: str) -> AssembledPrompt:
+        """Renders the CoT template within `prompt_token_budget`, recording its size."""
+        assembled = COT_PROMPT.render(
+            {"domain": self.domain, "context": context, "query": query},
+            token_budget=self.prompt_token_budget
+        )
+        self.last_prompt_tokens = assembled.token_count
+        if assembled.truncated:
+            self.logger.debug(f"Truncated prompt slots {assembled.truncated} to fit {self.prompt_token_budget} tokens")
+        return assembled
 
-Task:
-Provide a detailed response using Chain-of-Thought reasoning. 
-1. Break down the query into its core components.
-2. Analyze each component based on the provided context and your domain expertise.
-3. Synthesize the findings into a clear, professional answer.
+    def _prepare(self, query: str, context: Optional[str] = None) -> Tuple[str, str]:
+        """Retrieves context (unless given) and builds the prompt; returns (context, prompt)."""
+        if context is None:
+            with self.profiler.span("agent.retrieve"):
+                context = self._retrieve_context(query)
+        with self.profiler.span("agent.prompt"):
+            return context, self._build_cot_prompt(query, context)
 
-Reasoning:
-"""
+    def _mock_response(self, query: str, context: str) -> str:
+        # Fallback/Mock response for testing without a live client
+        return f"Step-by-step reasoning for '{query}' in the {self.domain} domain using context: {context}"
 
-    def generate_response(self, query: str) -> str:
+    def generate_response(self, query: str, context: Optional[str] = None) -> str:
         """
         Generates a reasoning-based response to the user query.
+
+        Args:
+            query: The query (possibly with the shared blackboard embedded).
+            context: Pre-retrieved context; if None, the agent retrieves for `query`.
+        """
+        with self.profiler.span("agent.generate_response"):
+            context, prompt = self._prepare(query, context)
+
+            if self.model_client:
+                # Actual inference
+                with self.profiler.span("agent.llm"):
+                    response = self.model_client.generate(prompt)
+                return response
+            else:
+                return self._mock_response(query, context)
+
+    async def agenerate_response(self, query: str, context: Optional[str] = None) -> str:
+        """
+        Async variant of `generate_response`. Uses the client's `agenerate`,
+        adapting synchronous clients so they run off the event loop.
         """
-        context = self._retrieve_context(query)
-        prompt = self._build_cot_prompt(query, context)
+        with self.profiler.span("agent.generate_response"):
+            context, prompt = self._prepare(query, context)
 
-        if self.model_client:
-            # Actual inference
-            response = self.model_client.generate(prompt)
-            return response
-        else:
-            # Fallback/Mock response for testing without a live client
-            return f"Step-by-step reasoning for '{query}' in the {self.domain} domain using context: {context}"
+            if self.model_client:
+                with self.profiler.span("agent.llm"):
+                    return await as_async_client(self.model_client).agenerate(prompt)
+            return self._mock_response(query, context)
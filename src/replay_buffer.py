@@ -0,0 +1,209 @@
+import os
+import numpy as np
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+class ReplayBuffer:
+    """
+    Fixed-capacity ring buffer of trajectories backed by preallocated NumPy arrays.
+
+    Appends are O(1) per row (a slice write at the cursor), minibatches are
+    drawn with a single vectorized index, and storage can optionally be
+    memory-mapped to `.npy` files so large buffers live outside the heap.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        trajectory_shape: Tuple[int, ...],
+        prioritized: bool = False,
+        priority_exponent: float = 0.6,
+        memmap_dir: Optional[str] = None
+    ):
+        """
+        Args:
+            capacity: Maximum number of stored trajectories; the oldest are overwritten.
+            trajectory_shape: Shape of one trajectory, e.g. (horizon, action_dim).
+            prioritized: Sample proportionally to priority**priority_exponent instead of uniformly.
+            priority_exponent: Strength of prioritization (0 = uniform).
+            memmap_dir: If set, trajectories, priorities and sources are stored in
+                memory-mapped `.npy` files in this directory.
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1.")
+        self.capacity = capacity
+        self.trajectory_shape = tuple(trajectory_shape)
+        self.prioritized = prioritized
+        self.priority_exponent = priority_exponent
+        self.memmap_dir = memmap_dir
+
+        self.trajectories = self._allocate("trajectories", (capacity,) + self.trajectory_shape, np.float64)
+        self.priorities = self._allocate("priorities", (capacity,), np.float64)
+        # Agent index that produced the row; -1 marks a coordinated (consensus) trajectory
+        self.sources = self._allocate("sources", (capacity,), np.int64)
+        # Contexts are arbitrary Python objects and always stay in memory
+        self.contexts = np.empty(capacity, dtype=object)
+
+        self.position = 0
+        self.size = 0
+        self.max_priority = 1.0
+
+    def _allocate(self, name: str, shape: Tuple[int, ...], dtype) -> np.ndarray:
+        if self.memmap_dir is None:
+            return np.zeros(shape, dtype=dtype)
+        os.makedirs(self.memmap_dir, exist_ok=True)
+        path = os.path.join(self.memmap_dir, f"{name}.npy")
+        return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, trajectory: np.ndarray, context: Any = None, priority: Optional[float] = None, source: int = -1):
+        """
+        Appends one trajectory at the cursor, overwriting the oldest row when full.
+        New rows default to the highest priority seen so far.
+        """
+        i = self.position
+        self.trajectories[i] = trajectory
+        self.contexts[i] = context
+        self.priorities[i] = self.max_priority if priority is None else priority
+        self.sources[i] = source
+        if priority is not None:
+            self.max_priority = max(self.max_priority, float(priority))
+
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def add_batch(
+        self,
+        trajectories: np.ndarray,
+        context: Any = None,
+        priorities: Optional[np.ndarray] = None,
+        sources: Optional[Sequence[int]] = None
+    ):
+        """
+        Appends a stack of trajectories with one vectorized (wrapping) write.
+
+        Args:
+            trajectories: Array of shape (n,) + trajectory_shape.
+            context: Context shared by all rows.
+            priorities: Optional per-row priorities.
+            sources: Optional per-row agent indices (defaults to -1).
+        """
+        trajectories = np.asarray(trajectories)
+        n = len(trajectories)
+        if n == 0:
+            return
+        if n > self.capacity:
+            # Only the newest `capacity` rows would survive anyway
+            trajectories = trajectories[-self.capacity:]
+            priorities = None if priorities is None else np.asarray(priorities)[-self.capacity:]
+            sources = None if sources is None else np.asarray(sources)[-self.capacity:]
+            n = self.capacity
+
+        idx = (self.position + np.arange(n)) % self.capacity
+        self.trajectories[idx] = trajectories
+        shared = np.empty(n, dtype=object)
+        shared.fill(context)
+        self.contexts[idx] = shared
+        if priorities is None:
+            self.priorities[idx] = self.max_priority
+        else:
+            priorities = np.asarray(priorities, dtype=np.float64)
+            self.priorities[idx] = priorities
+            self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.sources[idx] = -1 if sources is None else sources
+
+        self.position = int((self.position + n) % self.capacity)
+        self.size = min(self.size + n, self.capacity)
+
+    def sample(self, batch_size: int, rng=None, importance_exponent: float = 0.4) -> Dict[str, np.ndarray]:
+        """
+        Draws a minibatch (with replacement) with one vectorized gather.
+
+        Args:
+            batch_size: Number of rows to draw.
+            rng: A `np.random.Generator`; defaults to the global NumPy RNG.
+            importance_exponent: Exponent of the importance-sampling correction
+                returned as 'weights' for prioritized sampling.
+
+        Returns:
+            Dict with 'indices', 'trajectories', 'contexts', 'sources' and 'weights'.
+        """
+        if self.size == 0:
+            raise ValueError("Cannot sample from an empty replay buffer.")
+        rng = np.random if rng is None else rng
+
+        if self.prioritized:
+            scaled = np.power(self.priorities[:self.size], self.priority_exponent)
+            probs = scaled / scaled.sum()
+            indices = rng.choice(self.size, size=batch_size, p=probs)
+            weights = np.power(self.size * probs[indices], -importance_exponent)
+            weights /= weights.max()
+        else:
+            indices = rng.choice(self.size, size=batch_size)
+            weights = np.ones(batch_size)
+
+        return {
+            "indices": indices,
+            "trajectories": self.trajectories[indices],
+            "contexts": self.contexts[indices],
+            "sources": self.sources[indices],
+            "weights": weights,
+        }
+
+    def update_priorities(self, indices: np.ndarray, priorities: np.ndarray):
+        """Overwrites the priorities of previously sampled rows."""
+        priorities = np.asarray(priorities, dtype=np.float64)
+        self.priorities[indices] = priorities
+        if len(priorities):
+            self.max_priority = max(self.max_priority, float(priorities.max()))
+
+    def get_state(self) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        """
+        Snapshot of the stored rows for checkpointing.
+
+        Returns:
+            (metadata, arrays): JSON-serializable configuration, cursor and
+            contexts (which must themselves be JSON-serializable), and the
+            'trajectories', 'priorities' and 'sources' of the filled rows.
+        """
+        metadata = {
+            "capacity": self.capacity,
+            "trajectory_shape": list(self.trajectory_shape),
+            "prioritized": self.prioritized,
+            "priority_exponent": self.priority_exponent,
+            "position": self.position,
+            "size": self.size,
+            "max_priority": self.max_priority,
+            "contexts": self.contexts[:self.size].tolist(),
+        }
+        arrays = {
+            "trajectories": np.array(self.trajectories[:self.size]),
+            "priorities": np.array(self.priorities[:self.size]),
+            "sources": np.array(self.sources[:self.size]),
+        }
+        return metadata, arrays
+
+    def set_state(self, metadata: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+        """Restores a snapshot produced by `get_state` into this (equally shaped) buffer."""
+        if metadata["capacity"] != self.capacity or tuple(metadata["trajectory_shape"]) != self.trajectory_shape:
+            raise ValueError(
+                f"Replay state of capacity {metadata['capacity']} and shape {tuple(metadata['trajectory_shape'])} "
+                f"does not fit a buffer of capacity {self.capacity} and shape {self.trajectory_shape}."
+            )
+        size = metadata["size"]
+        self.trajectories[:size] = arrays["trajectories"]
+        self.priorities[:size] = arrays["priorities"]
+        self.sources[:size] = arrays["sources"]
+        self.contexts[:] = None
+        for i, context in enumerate(metadata["contexts"]):
+            self.contexts[i] = context
+        self.position = metadata["position"]
+        self.size = size
+        self.max_priority = metadata["max_priority"]
+
+    def flush(self):
+        """Flushes memory-mapped storage to disk (no-op for in-memory buffers)."""
+        for array in (self.trajectories, self.priorities, self.sources):
+            if isinstance(array, np.memmap):
+                array.flush()
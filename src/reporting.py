@@ -0,0 +1,117 @@
+import gzip
+import json
+import logging
+import os
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.compression import HAS_ZSTD, open_text, zstandard
+
+CODEC_EXTENSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+def report_filename(stem: str, codec: Optional[str] = None) -> str:
+    """File name of a JSONL report, e.g. 'LegalBench_eval_20260101_120000.jsonl.gz'."""
+    return f"{stem}.jsonl{CODEC_EXTENSIONS[codec]}"
+
+def create_report_writer(directory: str, stem: str, codec: Optional[str] = None, **kwargs) -> "JSONLReportWriter":
+    """
+    Creates a writer on a new report file in `directory`. If `report_filename(stem)`
+    is taken (e.g. two runs started within the same second), '_1', '_2', ... is
+    appended to the stem. Files are created exclusively, so concurrent runs never
+    share one.
+    """
+    os.makedirs(directory, exist_ok=True)
+    attempt = 0
+    while True:
+        name = report_filename(stem if attempt == 0 else f"{stem}_{attempt}", codec)
+        try:
+            return JSONLReportWriter(os.path.join(directory, name), codec=codec, exclusive=True, **kwargs)
+        except FileExistsError:
+            attempt += 1
+
+class JSONLReportWriter:
+    """
+    Append-only report writer: one compact JSON object per line.
+
+    Uncompressed records are written as they arrive. With a codec, records are
+    buffered and every checkpoint appends them as one self-contained gzip member
+    or zstd frame, so the file is always readable up to the last checkpoint and
+    memory stays bounded by `checkpoint_every` records. Each checkpoint fsyncs.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        codec: Optional[str] = None,
+        checkpoint_every: int = 16,
+        compression_level: int = 6,
+        exclusive: bool = False
+    ):
+        """
+        Args:
+            path: Output file (appended to if it exists, unless `exclusive`).
+            codec: None, 'gzip' or 'zstd' (requires the optional `zstandard` package).
+            checkpoint_every: Records between flush + fsync checkpoints.
+            compression_level: Codec compression level.
+            exclusive: Create `path`, raising FileExistsError if it already exists.
+        """
+        if codec not in CODEC_EXTENSIONS:
+            raise ValueError(f"Unknown codec '{codec}'. Choose from {list(CODEC_EXTENSIONS)}.")
+        if codec == "zstd" and not HAS_ZSTD:
+            raise ImportError("The 'zstd' codec requires the 'zstandard' package.")
+        if checkpoint_every < 1:
+            raise ValueError("checkpoint_every must be at least 1.")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.codec = codec
+        self.checkpoint_every = checkpoint_every
+        self.compression_level = compression_level
+        self.records_written = 0
+        self.logger = logging.getLogger(__name__)
+
+        self._file = open(path, "xb" if exclusive else "ab")
+        self._pending: List[bytes] = []
+
+    def write(self, record: Dict[str, Any]):
+        """Appends one record; every `checkpoint_every` records are made durable."""
+        line = (json.dumps(record, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+        if self.codec is None:
+            self._file.write(line)
+        else:
+            self._pending.append(line)
+        self.records_written += 1
+        if self.records_written % self.checkpoint_every == 0:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Encodes buffered records, flushes and fsyncs the file."""
+        if self._pending:
+            chunk = b"".join(self._pending)
+            self._pending = []
+            if self.codec == "gzip":
+                chunk = gzip.compress(chunk, compresslevel=self.compression_level)
+            elif self.codec == "zstd":
+                chunk = zstandard.ZstdCompressor(level=self.compression_level).compress(chunk)
+            self._file.write(chunk)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.checkpoint()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def read_jsonl_report(path: str) -> Iterator[Dict[str, Any]]:
+    """Lazily yields the records of a (possibly compressed) JSONL report."""
+    with open_text(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,263 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from src.model_client import as_async_client
+
+def cache_key(prompt: str, model_id: str, sampling_params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Content address of a request: SHA-256 over (prompt, model id, sampling params).
+    """
+    payload = json.dumps(
+        {"prompt": prompt, "model": model_id, "params": sampling_params or {}},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LRUCache:
+    """Thread-safe in-memory LRU map with a fixed number of entries."""
+
+    def __init__(self, max_entries: int = 1024):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: str):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+class SQLiteCache:
+    """
+    On-disk cache tier backed by a single SQLite file. When the stored payload
+    exceeds `max_bytes`, the least recently accessed entries are evicted.
+
+    Reads never write: access times of hits are buffered in memory and written
+    in one batch by the next `put`, by `flush`, or once `access_batch_size`
+    hits have accumulated.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, access_batch_size: int = 256):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.access_batch_size = access_batch_size
+        self._pending_access: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access)")
+        self._conn.commit()
+        self.total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._pending_access[key] = time.time()
+            if len(self._pending_access) >= self.access_batch_size:
+                self._write_access_times()
+                self._conn.commit()
+            return row[0]
+
+    def put(self, key: str, value: str):
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            # Eviction must see the latest access times
+            self._write_access_times()
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time())
+            )
+            self.total_bytes += size - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+
+    def flush(self):
+        """Writes buffered access times to disk."""
+        with self._lock:
+            if self._pending_access:
+                self._write_access_times()
+                self._conn.commit()
+
+    def _write_access_times(self):
+        if not self._pending_access:
+            return
+        self._conn.executemany(
+            "UPDATE responses SET last_access = ? WHERE key = ?",
+            [(accessed, key) for key, accessed in self._pending_access.items()]
+        )
+        self._pending_access.clear()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access ASC LIMIT 64"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self.total_bytes <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.total_bytes -= size
+
+    def close(self):
+        with self._lock:
+            self._write_access_times()
+            self._conn.commit()
+            self._conn.close()
+
+class CachingClient:
+    """
+    Caching wrapper around a model client.
+
+    Responses are keyed by a hash of (prompt, model id, sampling params) and looked
+    up in an in-memory LRU tier, then an optional SQLite disk tier; only misses
+    reach the wrapped client. Hit/miss counters are exposed via `stats()`.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        model_id: Optional[str] = None,
+        sampling_params: Optional[Dict[str, Any]] = None,
+        max_entries: int = 1024,
+        disk_path: Optional[str] = None,
+        max_disk_bytes: int = 256 * 1024 * 1024
+    ):
+        """
+        Args:
+            client: Model client implementing `generate` (and optionally `agenerate`
+                and `generate_batch`).
+            model_id: Model identifier for the cache key (defaults to the client's
+                `model_id` attribute or its class name).
+            sampling_params: Sampling parameters for the cache key (defaults to the
+                client's `sampling_params` attribute).
+            max_entries: Capacity of the in-memory LRU tier.
+            disk_path: Path of the SQLite file for the disk tier (None disables it).
+            max_disk_bytes: Size budget of the disk tier.
+        """
+        self.client = client
+        self.model_id = model_id or getattr(client, "model_id", None) or type(client).__name__
+        self.sampling_params = sampling_params if sampling_params is not None else getattr(client, "sampling_params", {})
+        self.memory = LRUCache(max_entries)
+        self.disk = SQLiteCache(disk_path, max_disk_bytes) if disk_path else None
+        self.logger = logging.getLogger(__name__)
+
+        self._stats_lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def key(self, prompt: str) -> str:
+        return cache_key(prompt, self.model_id, self.sampling_params)
+
+    def _lookup(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is not None:
+            with self._stats_lock:
+                self.memory_hits += 1
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.put(key, value)
+                with self._stats_lock:
+                    self.disk_hits += 1
+                return value
+        with self._stats_lock:
+            self.misses += 1
+        return None
+
+    def _store(self, key: str, value: str):
+        self.memory.put(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+    def generate(self, prompt: str) -> str:
+        key = self.key(prompt)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        response = self.client.generate(prompt)
+        self._store(key, response)
+        return response
+
+    async def agenerate(self, prompt: str) -> str:
+        key = self.key(prompt)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        response = await as_async_client(self.client).agenerate(prompt)
+        self._store(key, response)
+        return response
+
+    def generate_batch(self, prompts: List[str]) -> List[str]:
+        """Serves cached prompts and forwards only the misses as one batch."""
+        keys = [self.key(prompt) for prompt in prompts]
+        results: List[Optional[str]] = [self._lookup(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            miss_prompts = [prompts[i] for i in missing]
+            if hasattr(self.client, "generate_batch"):
+                responses = list(self.client.generate_batch(miss_prompts))
+            else:
+                responses = [self.client.generate(prompt) for prompt in miss_prompts]
+            for i, response in zip(missing, responses):
+                results[i] = response
+                self._store(keys[i], response)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / total if total else 0.0,
+            "memory_entries": len(self.memory),
+        }
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
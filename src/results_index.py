@@ -0,0 +1,216 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.reporting import read_jsonl_report
+
+REPORT_SUFFIXES = (".json", ".jsonl", ".jsonl.gz", ".jsonl.zst")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS reports ("
+    "report_id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, size INTEGER NOT NULL, mtime REAL NOT NULL, "
+    "domain TEXT, timestamp TEXT)",
+    "CREATE TABLE IF NOT EXISTS items ("
+    "report_id INTEGER NOT NULL, item_index INTEGER NOT NULL, query TEXT, "
+    "avg_accuracy_improvement REAL, convergence_stability REAL, avg_sample_efficiency REAL, "
+    "PRIMARY KEY (report_id, item_index))",
+    "CREATE TABLE IF NOT EXISTS runs ("
+    "report_id INTEGER NOT NULL, item_index INTEGER NOT NULL, run_id INTEGER NOT NULL, seed INTEGER, "
+    "initial_gap REAL, final_gap REAL, improvement REAL, queries_to_target INTEGER, iterations INTEGER, "
+    "stop_reason TEXT, PRIMARY KEY (report_id, item_index, run_id))",
+    "CREATE INDEX IF NOT EXISTS reports_domain ON reports(domain, timestamp)",
+)
+
+_ITEM_COLUMNS = ("avg_accuracy_improvement", "convergence_stability", "avg_sample_efficiency")
+_RUN_COLUMNS = ("seed", "initial_gap", "final_gap", "improvement", "queries_to_target", "iterations", "stop_reason")
+
+def _parse_json_report(path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    with open(path) as f:
+        report = json.load(f)
+    items, runs = [], []
+    for item_idx, result in enumerate(report.get("results", [])):
+        items.append(dict(result, item_index=item_idx))
+        runs.extend(dict(run, item_index=item_idx) for run in result.get("runs", []))
+    return {"domain": report.get("domain"), "timestamp": report.get("timestamp")}, items, runs
+
+def _parse_jsonl_report(path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    header, items, runs = {}, [], []
+    for record in read_jsonl_report(path):
+        kind = record.get("type")
+        if kind == "header":
+            header = record
+        elif kind == "item":
+            items.append(record)
+        elif kind == "run":
+            runs.append(record)
+    return {"domain": header.get("domain"), "timestamp": header.get("timestamp")}, items, runs
+
+class ResultsIndex:
+    """
+    SQLite catalog of evaluation reports with per-item and per-run metrics as
+    columns, so comparisons across many historical reports are single queries
+    instead of loading every report file.
+
+    `ingest` is incremental: a report is (re)parsed only when its size or
+    modification time changed since it was indexed, which also picks up JSONL
+    reports that are still being streamed.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+    @staticmethod
+    def report_files(results_dir: str) -> Iterator[str]:
+        """Report files in `results_dir` (JSON and, possibly compressed, JSONL)."""
+        for name in sorted(os.listdir(results_dir)):
+            path = os.path.join(results_dir, name)
+            if name.endswith(REPORT_SUFFIXES) and os.path.isfile(path):
+                yield path
+
+    def ingest(self, results_dir: str) -> int:
+        """
+        Indexes new and changed reports in `results_dir` and drops reports whose
+        files were removed. Unreadable reports are skipped with a warning.
+
+        Returns:
+            Number of reports (re)indexed.
+        """
+        paths = list(self.report_files(results_dir))
+        with self._lock:
+            known = {
+                row["path"]: (row["report_id"], row["size"], row["mtime"])
+                for row in self._conn.execute("SELECT report_id, path, size, mtime FROM reports")
+            }
+        ingested = 0
+        for path in paths:
+            stat = os.stat(path)
+            previous = known.get(path)
+            if previous is not None and previous[1:] == (stat.st_size, stat.st_mtime):
+                continue
+            if self.ingest_file(path, stat.st_size, stat.st_mtime):
+                ingested += 1
+
+        present = {os.path.abspath(path) for path in paths}
+        root = os.path.abspath(results_dir)
+        removed = [
+            report_id for path, (report_id, _, _) in known.items()
+            if os.path.dirname(os.path.abspath(path)) == root and os.path.abspath(path) not in present
+        ]
+        if removed:
+            with self._lock, self._conn:
+                for report_id in removed:
+                    self._delete(report_id)
+        return ingested
+
+    def ingest_file(self, path: str, size: Optional[int] = None, mtime: Optional[float] = None) -> bool:
+        """Parses one report and replaces its rows in the index. Returns False if it is unreadable."""
+        if size is None or mtime is None:
+            stat = os.stat(path)
+            size, mtime = stat.st_size, stat.st_mtime
+        parse = _parse_json_report if path.endswith(".json") else _parse_jsonl_report
+        try:
+            meta, items, runs = parse(path)
+        except (OSError, EOFError, ValueError, zlib.error) as e:
+            # Includes JSONL reports cut off mid-record while still being written
+            self.logger.warning(f"Skipping unreadable report {path}: {e}")
+            return False
+
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT report_id FROM reports WHERE path = ?", (path,)).fetchone()
+            if row is not None:
+                self._delete(row["report_id"])
+            report_id = self._conn.execute(
+                "INSERT INTO reports (path, size, mtime, domain, timestamp) VALUES (?, ?, ?, ?, ?)",
+                (path, size, mtime, meta["domain"], meta["timestamp"])
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO items (report_id, item_index, query, "
+                f"{', '.join(_ITEM_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (report_id, item["item_index"], item.get("query"), *(item.get(c) for c in _ITEM_COLUMNS))
+                    for item in items
+                ]
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO runs (report_id, item_index, run_id, "
+                f"{', '.join(_RUN_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (report_id, run["item_index"], run["run_id"], *(run.get(c) for c in _RUN_COLUMNS))
+                    for run in runs
+                ]
+            )
+        return True
+
+    def _delete(self, report_id: int):
+        for table in ("runs", "items", "reports"):
+            self._conn.execute(f"DELETE FROM {table} WHERE report_id = ?", (report_id,))
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def domain_summary(self, domain: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Aggregates per domain: number of reports, items and runs, mean per-run
+        improvement and final gap, and mean per-item stability and sample efficiency.
+        """
+        where, params = ("WHERE r.domain = ?", (domain,)) if domain else ("", ())
+        return self._query(
+            "SELECT r.domain AS domain, COUNT(DISTINCT r.report_id) AS reports, "
+            "COUNT(i.item_index) AS items, SUM(i.num_runs) AS runs, "
+            "SUM(i.sum_improvement) / SUM(i.num_runs) AS avg_improvement, "
+            "SUM(i.sum_final_gap) / SUM(i.num_runs) AS avg_final_gap, "
+            "AVG(i.convergence_stability) AS avg_stability, "
+            "AVG(i.avg_sample_efficiency) AS avg_sample_efficiency "
+            "FROM reports r LEFT JOIN ("
+            "  SELECT it.report_id, it.item_index, it.convergence_stability, it.avg_sample_efficiency, "
+            "  COUNT(ru.run_id) AS num_runs, SUM(ru.improvement) AS sum_improvement, SUM(ru.final_gap) AS sum_final_gap "
+            "  FROM items it LEFT JOIN runs ru ON ru.report_id = it.report_id AND ru.item_index = it.item_index "
+            "  GROUP BY it.report_id, it.item_index"
+            f") i ON i.report_id = r.report_id {where} "
+            "GROUP BY r.domain ORDER BY r.domain",
+            params
+        )
+
+    def report_summaries(self, domain: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Per-report aggregates, newest first, for comparing evaluations over time."""
+        sql = (
+            "SELECT r.path AS path, r.domain AS domain, r.timestamp AS timestamp, "
+            "COUNT(i.item_index) AS items, "
+            "AVG(i.avg_accuracy_improvement) AS avg_improvement, "
+            "AVG(i.convergence_stability) AS avg_stability, "
+            "AVG(i.avg_sample_efficiency) AS avg_sample_efficiency "
+            "FROM reports r LEFT JOIN items i ON i.report_id = r.report_id "
+        )
+        params: Tuple = ()
+        if domain:
+            sql += "WHERE r.domain = ? "
+            params = (domain,)
+        sql += "GROUP BY r.report_id ORDER BY r.timestamp DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (limit,)
+        return self._query(sql, params)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,357 @@
+import itertools
+import json
+import os
+import re
+import zlib
+import logging
+import threading
+import numpy as np
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.response_cache import LRUCache
+
+_TOKEN = re.compile(r"\w+")
+# Process-unique retriever ids; unlike id(), never reused after garbage collection
+_RETRIEVER_IDS = itertools.count()
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens."""
+    return _TOKEN.findall(text.lower())
+
+def normalize_query(text: str) -> str:
+    """Canonical form of a query for cache keys: lowercased, punctuation-free words."""
+    return " ".join(tokenize(text))
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores, best first, via argpartition."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part], kind="stable")]
+
+def _save_array(directory: str, name: str, array: np.ndarray):
+    np.save(os.path.join(directory, f"{name}.npy"), array)
+
+def _load_array(directory: str, name: str, mmap: bool) -> np.ndarray:
+    return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r" if mmap else None)
+
+class PassageStore:
+    """
+    Passages stored as one UTF-8 byte blob plus an offsets array, so millions of
+    passages can be memory-mapped and fetched by index without loading them all.
+    """
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_passages(cls, passages: Sequence[str]) -> "PassageStore":
+        encoded = [p.encode("utf-8") for p in passages]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(data, offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return bytes(self.data[start:end]).decode("utf-8")
+
+    def save(self, directory: str):
+        _save_array(directory, "passages", self.data)
+        _save_array(directory, "passage_offsets", self.offsets)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "PassageStore":
+        return cls(_load_array(directory, "passages", mmap), _load_array(directory, "passage_offsets", mmap))
+
+class BM25Index:
+    """
+    BM25 inverted index in CSR layout: `indptr[t]:indptr[t+1]` slices the
+    postings (document ids and precomputed BM25 impacts) of term t. A query is
+    scored with one gather over its postings and one `np.bincount`.
+    """
+
+    def __init__(
+        self,
+        vocabulary: Dict[str, int],
+        indptr: np.ndarray,
+        doc_ids: np.ndarray,
+        impacts: np.ndarray,
+        num_docs: int
+    ):
+        self.vocabulary = vocabulary
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.impacts = impacts
+        self.num_docs = num_docs
+
+    @classmethod
+    def build(cls, passages: Iterable[str], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        """
+        Args:
+            passages: Passage texts.
+            k1: Term-frequency saturation.
+            b: Length normalization strength.
+        """
+        vocabulary: Dict[str, int] = {}
+        term_chunks = []
+        lengths = []
+        for text in passages:
+            ids = [vocabulary.setdefault(token, len(vocabulary)) for token in tokenize(text)]
+            term_chunks.append(np.asarray(ids, dtype=np.int64))
+            lengths.append(len(ids))
+
+        num_docs = len(lengths)
+        lengths = np.asarray(lengths, dtype=np.float64)
+        terms = np.concatenate(term_chunks) if term_chunks else np.zeros(0, dtype=np.int64)
+        docs = np.repeat(np.arange(num_docs, dtype=np.int64), lengths.astype(np.int64))
+
+        # One posting per distinct (term, doc) pair, sorted by term then doc
+        keys, tf = np.unique(terms * max(num_docs, 1) + docs, return_counts=True)
+        post_terms = keys // max(num_docs, 1)
+        post_docs = keys % max(num_docs, 1)
+
+        df = np.bincount(post_terms, minlength=len(vocabulary))
+        indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(df, out=indptr[1:])
+
+        idf = np.log1p((num_docs - df + 0.5) / (df + 0.5))
+        avgdl = lengths.mean() if num_docs else 1.0
+        norm = k1 * (1.0 - b + b * lengths[post_docs] / max(avgdl, 1e-12))
+        impacts = idf[post_terms] * tf * (k1 + 1.0) / (tf + norm)
+
+        return cls(vocabulary, indptr, post_docs.astype(np.int32), impacts.astype(np.float32), num_docs)
+
+    def scores(self, query: str) -> np.ndarray:
+        """
+        BM25 score of every document, shape (num_docs,); documents sharing no
+        query term score 0. The postings are accumulated with one `np.bincount`
+        (linear in the posting count, no sort).
+        """
+        term_ids = sorted({self.vocabulary[t] for t in tokenize(query) if t in self.vocabulary})
+        if not term_ids:
+            return np.zeros(self.num_docs)
+        positions = np.concatenate([np.arange(self.indptr[t], self.indptr[t + 1]) for t in term_ids])
+        return np.bincount(self.doc_ids[positions], weights=self.impacts[positions], minlength=self.num_docs)
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[int, float]]:
+        scores = self.scores(query)
+        # Impacts are positive, so zero scores are documents without a query term
+        return [(int(i), float(scores[i])) for i in _top_k(scores, k) if scores[i] > 0]
+
+    def save(self, directory: str):
+        _save_array(directory, "bm25_indptr", self.indptr)
+        _save_array(directory, "bm25_doc_ids", self.doc_ids)
+        _save_array(directory, "bm25_impacts", self.impacts)
+        with open(os.path.join(directory, "bm25_vocabulary.json"), "w") as f:
+            json.dump({"num_docs": self.num_docs, "vocabulary": self.vocabulary}, f)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "BM25Index":
+        with open(os.path.join(directory, "bm25_vocabulary.json")) as f:
+            meta = json.load(f)
+        return cls(
+            meta["vocabulary"],
+            _load_array(directory, "bm25_indptr", mmap),
+            _load_array(directory, "bm25_doc_ids", mmap),
+            _load_array(directory, "bm25_impacts", mmap),
+            meta["num_docs"]
+        )
+
+class HashingEmbedder:
+    """
+    Dependency-free text embedder: L2-normalized hashed bag of words
+    (the same scheme as the score network's context embedding).
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                out[row, zlib.crc32(token.encode("utf-8")) % self.dim] += 1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+class DenseIndex:
+    """
+    Dense embedding matrix (float32, rows L2-normalized) searched by one
+    matrix-vector product; the matrix may be a memory-mapped `.npy` file.
+    """
+
+    def __init__(self, embeddings: np.ndarray, embedder: Optional[HashingEmbedder] = None):
+        self.embeddings = embeddings
+        self.embedder = embedder or HashingEmbedder(embeddings.shape[1])
+
+    @classmethod
+    def build(
+        cls,
+        passages: Sequence[str],
+        embedder: Optional[HashingEmbedder] = None,
+        path: Optional[str] = None,
+        chunk_size: int = 4096
+    ) -> "DenseIndex":
+        """
+        Args:
+            passages: Passage texts.
+            embedder: Object with `dim` and `embed(texts) -> (n, dim)`; defaults to HashingEmbedder.
+            path: If set, the matrix is written in chunks to this memory-mapped `.npy` file.
+            chunk_size: Passages embedded per chunk.
+        """
+        embedder = embedder or HashingEmbedder()
+        shape = (len(passages), embedder.dim)
+        if path is None:
+            embeddings = np.zeros(shape, dtype=np.float32)
+        else:
+            embeddings = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=shape)
+        for start in range(0, len(passages), chunk_size):
+            embeddings[start:start + chunk_size] = embedder.embed(passages[start:start + chunk_size])
+        if isinstance(embeddings, np.memmap):
+            embeddings.flush()
+        return cls(embeddings, embedder)
+
+    def scores(self, query: str) -> np.ndarray:
+        """Cosine similarity of the query against every passage."""
+        return self.embeddings @ self.embedder.embed([query])[0]
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[int, float]]:
+        scores = self.scores(query)
+        return [(int(i), float(scores[i])) for i in _top_k(scores, k)]
+
+    def save(self, directory: str):
+        _save_array(directory, "dense_embeddings", np.asarray(self.embeddings))
+
+    @classmethod
+    def load(cls, directory: str, embedder: Optional[HashingEmbedder] = None, mmap: bool = True) -> "DenseIndex":
+        return cls(_load_array(directory, "dense_embeddings", mmap), embedder)
+
+class Retriever:
+    """
+    Local retrieval for one domain over a BM25 index, a dense index, or both
+    (fused by reciprocal rank).
+    """
+
+    def __init__(
+        self,
+        passages: PassageStore,
+        bm25: Optional[BM25Index] = None,
+        dense: Optional[DenseIndex] = None,
+        rrf_k: int = 60
+    ):
+        """
+        Args:
+            passages: Store holding the passage texts.
+            bm25: Optional sparse index.
+            dense: Optional dense index.
+            rrf_k: Reciprocal-rank-fusion constant for hybrid search.
+        """
+        if bm25 is None and dense is None:
+            raise ValueError("Retriever needs a BM25 and/or a dense index.")
+        self.passages = passages
+        self.bm25 = bm25
+        self.dense = dense
+        self.rrf_k = rrf_k
+        self.cache_id = next(_RETRIEVER_IDS)
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_passages(
+        cls,
+        passages: Sequence[str],
+        use_bm25: bool = True,
+        use_dense: bool = False,
+        embedder: Optional[HashingEmbedder] = None
+    ) -> "Retriever":
+        """Ingests a corpus into the requested in-memory indexes."""
+        passages = list(passages)
+        return cls(
+            PassageStore.from_passages(passages),
+            bm25=BM25Index.build(passages) if use_bm25 else None,
+            dense=DenseIndex.build(passages, embedder) if use_dense else None
+        )
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[str, float]]:
+        """Returns up to k (passage, score) pairs, best first."""
+        if self.bm25 is not None and self.dense is not None:
+            # Reciprocal rank fusion over a deeper candidate list from each index
+            fused: Dict[int, float] = {}
+            for hits in (self.bm25.search(query, 4 * k), self.dense.search(query, 4 * k)):
+                for rank, (doc, _) in enumerate(hits):
+                    fused[doc] = fused.get(doc, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+            ranked = sorted(fused.items(), key=lambda item: -item[1])[:k]
+        else:
+            ranked = (self.bm25 or self.dense).search(query, k)
+        return [(self.passages[doc], score) for doc, score in ranked if score > 0]
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.passages.save(directory)
+        if self.bm25 is not None:
+            self.bm25.save(directory)
+        if self.dense is not None:
+            self.dense.save(directory)
+
+    @classmethod
+    def load(cls, directory: str, embedder: Optional[HashingEmbedder] = None, mmap: bool = True) -> "Retriever":
+        """Loads a saved retriever; arrays are memory-mapped by default."""
+        bm25 = BM25Index.load(directory, mmap) if os.path.exists(os.path.join(directory, "bm25_indptr.npy")) else None
+        dense = None
+        if os.path.exists(os.path.join(directory, "dense_embeddings.npy")):
+            dense = DenseIndex.load(directory, embedder, mmap)
+        return cls(PassageStore.load(directory, mmap), bm25=bm25, dense=dense)
+
+class RetrievalCache:
+    """
+    LRU cache of retrieved contexts keyed by (domain, retriever, k, normalized
+    query), shared by every agent that retrieves through it.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.entries = LRUCache(max_entries)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(domain: str, query: str, retriever_id: Optional[int] = None, k: Optional[int] = None) -> str:
+        return f"{domain.lower()}\x00{retriever_id}\x00{k}\x00{normalize_query(query)}"
+
+    def get_or_retrieve(
+        self,
+        domain: str,
+        query: str,
+        retrieve: Callable[[str], str],
+        retriever_id: Optional[int] = None,
+        k: Optional[int] = None
+    ) -> str:
+        """
+        Returns the cached context, calling `retrieve(query)` only on a miss.
+
+        Args:
+            domain: Domain of the retrieving agent.
+            query: User query; cached under its normalized form.
+            retrieve: Callable performing the lookup on a miss.
+            retriever_id: `Retriever.cache_id` of the index searched (None for placeholder contexts).
+            k: Number of passages retrieved.
+        """
+        key = self.key(domain, query, retriever_id, k)
+        context = self.entries.get(key)
+        with self._lock:
+            if context is not None:
+                self.hits += 1
+                return context
+            self.misses += 1
+        context = retrieve(query)
+        self.entries.put(key, context)
+        return context
+
+    def clear(self):
+        self.entries.clear()
@@ -0,0 +1,277 @@
+import warnings
+import numpy as np
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+ScoreFn = Callable[[np.ndarray, int], np.ndarray]
+NoiseFn = Callable[[Tuple[int, ...]], np.ndarray]
+
+class NoiseScheduler:
+    """
+    Base class for the denoising samplers used by DiffusionPolicy.
+
+    Precomputes the noise schedule tables once:
+        alphas_cumprod[t] = prod_{s<=t} (1 - beta_s)
+        alphas[t]         = sqrt(alphas_cumprod[t])      (signal scale)
+        sigmas[t]         = sqrt(1 - alphas_cumprod[t])  (noise scale)
+        lambdas[t]        = log(alphas[t] / sigmas[t])   (half log-SNR)
+
+    The score model predicts grad log p(x_t), so the implied noise prediction is
+    eps = -sigmas[t] * score and the implied clean sample is
+    x0 = (x_t - sigmas[t] * eps) / alphas[t].
+    """
+
+    def __init__(
+        self,
+        num_train_timesteps: int = 5,
+        num_inference_steps: Optional[int] = None,
+        beta_start: float = 1e-4,
+        beta_end: float = 0.02,
+        beta_schedule: str = "linear",
+        max_beta: float = 0.2
+    ):
+        """
+        Args:
+            num_train_timesteps: Length of the training noise schedule.
+            num_inference_steps: Timesteps visited when sampling (defaults to all of them).
+                Only step-skipping samplers honour values below `num_train_timesteps`.
+            beta_start: First beta of the schedule (expressed for a 1000-step schedule).
+            beta_end: Last beta of the schedule (expressed for a 1000-step schedule).
+            beta_schedule: 'linear' or 'cosine'.
+            max_beta: Upper bound on every beta. Short schedules are rescaled
+                towards this bound rather than collapsing the signal at a single step.
+        """
+        if num_train_timesteps < 1:
+            raise ValueError("num_train_timesteps must be at least 1.")
+        self.num_train_timesteps = num_train_timesteps
+        self.beta_start = beta_start
+        self.beta_end = beta_end
+        self.beta_schedule = beta_schedule
+        self.max_beta = max_beta
+
+        self.betas = self._make_betas()
+        self.alphas_cumprod = np.cumprod(1.0 - self.betas)
+        self.alphas = np.sqrt(self.alphas_cumprod)
+        self.sigmas = np.sqrt(1.0 - self.alphas_cumprod)
+        self.lambdas = np.log(self.alphas) - np.log(self.sigmas)
+
+        self.set_timesteps(num_train_timesteps if num_inference_steps is None else num_inference_steps)
+
+    def _make_betas(self) -> np.ndarray:
+        T = self.num_train_timesteps
+        if self.beta_schedule == "linear":
+            # Rescale short schedules towards a 1000-step noise level, but never past
+            # max_beta: clipping betas to ~1 would destroy the signal (alpha_bar ~ 0)
+            # and make x0 predictions explode at sampling time
+            scale = min(1000.0 / T, self.max_beta / self.beta_end)
+            return np.linspace(scale * self.beta_start, scale * self.beta_end, T)
+        if self.beta_schedule == "cosine":
+            s = 0.008
+            steps = np.linspace(0, T, T + 1) / T
+            f = np.cos((steps + s) / (1 + s) * np.pi / 2) ** 2
+            return np.clip(1.0 - f[1:] / f[:-1], 0.0, self.max_beta)
+        raise ValueError(f"Unknown beta schedule '{self.beta_schedule}'.")
+
+    def set_timesteps(self, num_inference_steps: int):
+        """
+        Selects the (descending) timesteps visited when sampling and precomputes
+        the per-step update coefficients. Samplers that cannot skip timesteps
+        warn and visit all of them.
+        """
+        if num_inference_steps < 1:
+            raise ValueError("num_inference_steps must be at least 1.")
+        self.num_inference_steps = min(num_inference_steps, self.num_train_timesteps)
+        self.timesteps = self._select_timesteps()
+        if len(self.timesteps) != self.num_inference_steps:
+            warnings.warn(
+                f"{type(self).__name__} cannot skip timesteps; ignoring num_inference_steps="
+                f"{num_inference_steps} and visiting all {len(self.timesteps)}.",
+                stacklevel=2
+            )
+            self.num_inference_steps = len(self.timesteps)
+        # Previous timestep for each step; -1 denotes the clean sample
+        self.prev_timesteps = np.r_[self.timesteps[1:], -1]
+        self._precompute()
+
+    def _select_timesteps(self) -> np.ndarray:
+        return np.arange(self.num_train_timesteps)[::-1]
+
+    def _precompute(self):
+        """Hook for subclasses to build per-step coefficient tables."""
+
+    def _table(self, table: np.ndarray, timesteps: np.ndarray, clean_value: float) -> np.ndarray:
+        """Looks up a schedule table, using `clean_value` for the t = -1 (clean) entries."""
+        return np.where(timesteps >= 0, table[np.maximum(timesteps, 0)], clean_value)
+
+    def key(self) -> Tuple[Any, ...]:
+        """Hashable description of the sampler; policies sharing it can be fused."""
+        return (type(self), self.num_train_timesteps, self.beta_schedule,
+                self.beta_start, self.beta_end, self.max_beta, tuple(self.timesteps))
+
+    def sample(self, x: np.ndarray, score_fn: ScoreFn, noise_fn: NoiseFn) -> np.ndarray:
+        """
+        Denoises `x` (pure noise of any shape) by walking `self.timesteps`.
+
+        Args:
+            x: Initial noise tensor.
+            score_fn: Callable `(x_t, t) -> score`.
+            noise_fn: Callable `shape -> standard normal noise`.
+        """
+        raise NotImplementedError
+
+
+class ConstantStepScheduler(NoiseScheduler):
+    """
+    The original fixed-coefficient Langevin-style loop:
+    x <- x + step_size * score + noise_scale * noise at every timestep.
+    """
+
+    def __init__(self, num_train_timesteps: int = 5, step_size: float = 0.1, noise_scale: float = 0.01, **kwargs):
+        self.step_size = step_size
+        self.noise_scale = noise_scale
+        super().__init__(num_train_timesteps=num_train_timesteps, **kwargs)
+
+    def key(self) -> Tuple[Any, ...]:
+        return super().key() + (self.step_size, self.noise_scale)
+
+    def sample(self, x: np.ndarray, score_fn: ScoreFn, noise_fn: NoiseFn) -> np.ndarray:
+        for t in self.timesteps:
+            score = score_fn(x, int(t))
+            x = x + self.step_size * score + self.noise_scale * noise_fn(x.shape)
+        return x
+
+
+class DDPMScheduler(NoiseScheduler):
+    """
+    Ancestral DDPM sampler. Visits every training timestep using the
+    precomputed posterior q(x_{t-1} | x_t, x0) coefficients.
+    """
+
+    def _precompute(self):
+        t = self.timesteps
+        abar = self.alphas_cumprod[t]
+        abar_prev = self._table(self.alphas_cumprod, self.prev_timesteps, 1.0)
+        beta = 1.0 - abar / abar_prev
+        # Posterior mean: coef_x0 * x0 + coef_xt * x_t
+        self.coef_x0 = np.sqrt(abar_prev) * beta / (1.0 - abar)
+        self.coef_xt = np.sqrt(1.0 - beta) * (1.0 - abar_prev) / (1.0 - abar)
+        self.posterior_std = np.sqrt(beta * (1.0 - abar_prev) / (1.0 - abar))
+        self.step_alphas = self.alphas[t]
+        self.step_sigmas = self.sigmas[t]
+
+    def sample(self, x: np.ndarray, score_fn: ScoreFn, noise_fn: NoiseFn) -> np.ndarray:
+        for i, t in enumerate(self.timesteps):
+            score = score_fn(x, int(t))
+            sigma = self.step_sigmas[i]
+            x0 = (x + sigma * sigma * score) / self.step_alphas[i]
+            x = self.coef_x0[i] * x0 + self.coef_xt[i] * x
+            if self.prev_timesteps[i] >= 0:
+                x = x + self.posterior_std[i] * noise_fn(x.shape)
+        return x
+
+
+class DDIMScheduler(NoiseScheduler):
+    """
+    DDIM sampler with strided step-skipping. `eta=0` gives the deterministic
+    sampler, `eta=1` recovers DDPM-like stochasticity on the strided schedule.
+    """
+
+    def __init__(self, num_train_timesteps: int = 5, num_inference_steps: Optional[int] = None, eta: float = 0.0, **kwargs):
+        self.eta = eta
+        super().__init__(num_train_timesteps=num_train_timesteps, num_inference_steps=num_inference_steps, **kwargs)
+
+    def key(self) -> Tuple[Any, ...]:
+        return super().key() + (self.eta,)
+
+    def _select_timesteps(self) -> np.ndarray:
+        stride = self.num_train_timesteps / self.num_inference_steps
+        # Always include the noisiest timestep
+        steps = self.num_train_timesteps - 1 - np.floor(np.arange(self.num_inference_steps) * stride)
+        return steps.astype(np.intp)
+
+    def _precompute(self):
+        t = self.timesteps
+        abar = self.alphas_cumprod[t]
+        abar_prev = self._table(self.alphas_cumprod, self.prev_timesteps, 1.0)
+        self.step_alphas = np.sqrt(abar)
+        self.step_sigmas = np.sqrt(1.0 - abar)
+        self.noise_std = self.eta * np.sqrt((1.0 - abar_prev) / (1.0 - abar) * (1.0 - abar / abar_prev))
+        self.coef_x0 = np.sqrt(abar_prev)
+        self.coef_eps = np.sqrt(np.maximum(1.0 - abar_prev - self.noise_std ** 2, 0.0))
+
+    def sample(self, x: np.ndarray, score_fn: ScoreFn, noise_fn: NoiseFn) -> np.ndarray:
+        for i, t in enumerate(self.timesteps):
+            score = score_fn(x, int(t))
+            eps = -self.step_sigmas[i] * score
+            x0 = (x - self.step_sigmas[i] * eps) / self.step_alphas[i]
+            x = self.coef_x0[i] * x0 + self.coef_eps[i] * eps
+            if self.noise_std[i] > 0:
+                x = x + self.noise_std[i] * noise_fn(x.shape)
+        return x
+
+
+class DPMSolverScheduler(NoiseScheduler):
+    """
+    Deterministic few-step sampler in the style of DPM-Solver++ (2M):
+    a second-order multistep update in log-SNR (lambda) time using the
+    data prediction, falling back to first order on the first step.
+    """
+
+    def __init__(self, num_train_timesteps: int = 5, num_inference_steps: Optional[int] = None, solver_order: int = 2, **kwargs):
+        if solver_order not in (1, 2):
+            raise ValueError("solver_order must be 1 or 2.")
+        self.solver_order = solver_order
+        super().__init__(num_train_timesteps=num_train_timesteps, num_inference_steps=num_inference_steps, **kwargs)
+
+    def key(self) -> Tuple[Any, ...]:
+        return super().key() + (self.solver_order,)
+
+    def _select_timesteps(self) -> np.ndarray:
+        steps = np.linspace(self.num_train_timesteps - 1, 0, self.num_inference_steps)
+        return np.unique(np.round(steps).astype(np.intp))[::-1]
+
+    def _precompute(self):
+        t = self.timesteps
+        prev = self.prev_timesteps
+        self.step_alphas = self.alphas[t]
+        self.step_sigmas = self.sigmas[t]
+        lam = self.lambdas[t]
+        # The final step jumps to the clean sample and uses the data prediction directly
+        has_prev = prev >= 0
+        safe_prev = np.maximum(prev, 0)
+        self.h = np.where(has_prev, self.lambdas[safe_prev] - lam, np.inf)
+        self.sigma_ratio = np.where(has_prev, self.sigmas[safe_prev] / self.sigmas[t], 0.0)
+        self.coef_x0 = np.where(has_prev, -self.alphas[safe_prev] * np.expm1(-np.where(has_prev, self.h, 0.0)), 1.0)
+        # Ratio of consecutive step sizes for the multistep correction
+        h_finite = np.where(has_prev, self.h, 1.0)
+        self.r = np.full(len(t), np.nan)
+        self.r[1:] = h_finite[:-1] / h_finite[1:]
+
+    def sample(self, x: np.ndarray, score_fn: ScoreFn, noise_fn: NoiseFn) -> np.ndarray:
+        prev_x0 = None
+        for i, t in enumerate(self.timesteps):
+            score = score_fn(x, int(t))
+            sigma = self.step_sigmas[i]
+            x0 = (x + sigma * sigma * score) / self.step_alphas[i]
+            d = x0
+            if self.solver_order == 2 and prev_x0 is not None and self.prev_timesteps[i] >= 0:
+                r = self.r[i]
+                d = (1.0 + 0.5 / r) * x0 - (0.5 / r) * prev_x0
+            x = self.sigma_ratio[i] * x + self.coef_x0[i] * d
+            prev_x0 = x0
+        return x
+
+
+SCHEDULERS: Dict[str, Type[NoiseScheduler]] = {
+    "constant": ConstantStepScheduler,
+    "ddpm": DDPMScheduler,
+    "ddim": DDIMScheduler,
+    "dpm_solver": DPMSolverScheduler,
+}
+
+def get_scheduler(name: str, **kwargs) -> NoiseScheduler:
+    """
+    Instantiates a scheduler by name ('constant', 'ddpm', 'ddim', 'dpm_solver').
+    """
+    if name not in SCHEDULERS:
+        raise ValueError(f"Unknown scheduler '{name}'. Expected one of {tuple(SCHEDULERS)}.")
+    return SCHEDULERS[name](**kwargs)
@@ -0,0 +1,263 @@
+import zlib
+from collections import OrderedDict
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+def _silu(z: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    s = 1.0 / (1.0 + np.exp(-z))
+    return z * s, s
+
+class ScoreNetwork:
+    """
+    Small CPU-only MLP noise predictor written in pure NumPy.
+
+    Input is the flattened noisy trajectory concatenated with a sinusoidal
+    timestep embedding and a hashed bag-of-words context embedding:
+        [x_t, emb(t), emb(context)] -> (Linear -> SiLU) x num_layers -> Linear -> eps
+
+    Parameters are trained with Adam on the denoising score matching objective
+    ||eps_theta(x_t, t, c) - eps||^2.
+    """
+
+    def __init__(
+        self,
+        input_dim: int,
+        hidden_dim: int = 64,
+        num_layers: int = 2,
+        time_embed_dim: int = 16,
+        context_dim: int = 32,
+        learning_rate: float = 1e-3,
+        max_grad_norm: Optional[float] = 1.0,
+        max_cached_contexts: int = 1024,
+        seed: Union[int, np.random.Generator, None] = None
+    ):
+        """
+        Args:
+            input_dim: Size of a flattened trajectory (horizon * action_dim).
+            hidden_dim: Width of the hidden layers.
+            num_layers: Number of hidden layers.
+            time_embed_dim: Size of the sinusoidal timestep embedding (even).
+            context_dim: Number of hashing buckets for the context embedding.
+            learning_rate: Adam step size.
+            max_grad_norm: Gradients are rescaled to at most this global L2 norm
+                before each step (None disables clipping).
+            max_cached_contexts: Capacity of the LRU cache of context embeddings.
+            seed: Seed or Generator for weight initialization.
+        """
+        if time_embed_dim % 2:
+            raise ValueError("time_embed_dim must be even.")
+        self.input_dim = input_dim
+        self.hidden_dim = hidden_dim
+        self.num_layers = num_layers
+        self.time_embed_dim = time_embed_dim
+        self.context_dim = context_dim
+        self.learning_rate = learning_rate
+        self.max_grad_norm = max_grad_norm
+        self.max_cached_contexts = max_cached_contexts
+
+        rng = np.random.default_rng(seed)
+        sizes = [input_dim + time_embed_dim + context_dim] + [hidden_dim] * num_layers + [input_dim]
+        self.weights: List[np.ndarray] = []
+        self.biases: List[np.ndarray] = []
+        for i, (fan_in, fan_out) in enumerate(zip(sizes[:-1], sizes[1:])):
+            is_output = i == len(sizes) - 2
+            # Zero-initialized output layer: an untrained network predicts no noise
+            scale = 0.0 if is_output else np.sqrt(2.0 / fan_in)
+            self.weights.append(rng.standard_normal((fan_in, fan_out)) * scale)
+            self.biases.append(np.zeros(fan_out))
+
+        self._adam_m = [np.zeros_like(p) for p in self.parameters()]
+        self._adam_v = [np.zeros_like(p) for p in self.parameters()]
+        self._adam_t = 0
+        # Bumped on every parameter change; `stack_parameters` uses it to reuse stacked copies
+        self.version = 0
+        self._stack_cache = None
+
+        half = time_embed_dim // 2
+        self._freqs = np.exp(-np.log(10000.0) * np.arange(half) / half)
+        self._context_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+    def architecture(self) -> Tuple[int, ...]:
+        """Shape signature; networks with equal signatures can be evaluated stacked."""
+        return (self.input_dim, self.hidden_dim, self.num_layers, self.time_embed_dim, self.context_dim)
+
+    def parameters(self) -> List[np.ndarray]:
+        return self.weights + self.biases
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """
+        Returns the parameters and the Adam state as a flat dict of arrays:
+        `w{i}`/`b{i}` parameters, `m{i}`/`v{i}` moments aligned with
+        `parameters()` and the step count `adam_t`.
+        """
+        state = {f"w{i}": w for i, w in enumerate(self.weights)}
+        state.update({f"b{i}": b for i, b in enumerate(self.biases)})
+        state.update({f"m{i}": m for i, m in enumerate(self._adam_m)})
+        state.update({f"v{i}": v for i, v in enumerate(self._adam_v)})
+        state["adam_t"] = np.array(self._adam_t)
+        return state
+
+    def set_state(self, state: Dict[str, np.ndarray]):
+        """
+        Loads a state produced by `get_state`. States without the Adam entries
+        (parameters only) reset the optimizer.
+        """
+        self.weights = [np.array(state[f"w{i}"]) for i in range(len(self.weights))]
+        self.biases = [np.array(state[f"b{i}"]) for i in range(len(self.biases))]
+        params = self.parameters()
+        if "adam_t" in state:
+            self._adam_m = [np.array(state[f"m{i}"]) for i in range(len(params))]
+            self._adam_v = [np.array(state[f"v{i}"]) for i in range(len(params))]
+            self._adam_t = int(state["adam_t"])
+        else:
+            self._adam_m = [np.zeros_like(p) for p in params]
+            self._adam_v = [np.zeros_like(p) for p in params]
+            self._adam_t = 0
+        self.version += 1
+
+    def embed_time(self, t: np.ndarray, num_train_timesteps: int) -> np.ndarray:
+        """Sinusoidal embedding of integer timesteps, shape (..., time_embed_dim)."""
+        angles = (np.asarray(t, dtype=np.float64)[..., None] / num_train_timesteps * 1000.0) * self._freqs
+        return np.concatenate([np.sin(angles), np.cos(angles)], axis=-1)
+
+    def embed_context(self, context: Any) -> np.ndarray:
+        """
+        Hashed bag-of-words embedding of a context (anything with a str() form).
+        The most recently used `max_cached_contexts` results are cached.
+        """
+        key = context if isinstance(context, str) else repr(context)
+        cached = self._context_cache.get(key)
+        if cached is not None:
+            self._context_cache.move_to_end(key)
+            return cached
+        emb = np.zeros(self.context_dim)
+        for token in key.lower().split():
+            emb[zlib.crc32(token.encode("utf-8")) % self.context_dim] += 1.0
+        norm = np.linalg.norm(emb)
+        if norm > 0:
+            emb /= norm
+        self._context_cache[key] = emb
+        if len(self._context_cache) > self.max_cached_contexts:
+            self._context_cache.popitem(last=False)
+        return emb
+
+    def embed_contexts(self, contexts: Sequence[Any]) -> np.ndarray:
+        """Stacks `embed_context` over a sequence, shape (len(contexts), context_dim)."""
+        if len(contexts) == 0:
+            return np.zeros((0, self.context_dim))
+        return np.stack([self.embed_context(c) for c in contexts])
+
+    @staticmethod
+    def stack_parameters(networks: Sequence["ScoreNetwork"]) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        """
+        Stacks the parameters of same-architecture networks along a leading axis,
+        with biases shaped (num_networks, 1, dim) for batched matmul.
+
+        The result is cached on the first network and reused until any member's
+        `version` changes. Callers must not modify the returned arrays.
+        """
+        networks = tuple(networks)
+        versions = tuple(n.version for n in networks)
+        cached = networks[0]._stack_cache
+        if cached is not None:
+            members, cached_versions, stacked = cached
+            if cached_versions == versions and len(members) == len(networks) \
+                    and all(a is b for a, b in zip(members, networks)):
+                return stacked
+        weights = [np.stack(ws) for ws in zip(*(n.weights for n in networks))]
+        biases = [np.stack(bs)[:, None, :] for bs in zip(*(n.biases for n in networks))]
+        # Holding the members keeps their identities from being reused while cached
+        stacked = (weights, biases)
+        networks[0]._stack_cache = (networks, versions, stacked)
+        return stacked
+
+    @staticmethod
+    def forward_with(weights: Sequence[np.ndarray], biases: Sequence[np.ndarray], inputs: np.ndarray) -> np.ndarray:
+        """
+        Forward pass with explicit parameters. Works for a single network
+        (inputs (..., in)) and for stacked networks (inputs (P, M, in)).
+        """
+        h = inputs
+        for w, b in zip(weights[:-1], biases[:-1]):
+            h, _ = _silu(np.matmul(h, w) + b)
+        return np.matmul(h, weights[-1]) + biases[-1]
+
+    def forward(self, inputs: np.ndarray) -> np.ndarray:
+        return self.forward_with(self.weights, self.biases, inputs)
+
+    def build_inputs(self, x_flat: np.ndarray, t_emb: np.ndarray, ctx_emb: np.ndarray) -> np.ndarray:
+        """Concatenates trajectory, time and context features, broadcasting leading dims."""
+        lead = x_flat.shape[:-1]
+        return np.concatenate([
+            x_flat,
+            np.broadcast_to(t_emb, lead + t_emb.shape[-1:]),
+            np.broadcast_to(ctx_emb, lead + ctx_emb.shape[-1:]),
+        ], axis=-1)
+
+    def train_step(self, inputs: np.ndarray, target: np.ndarray, sample_weights: Optional[np.ndarray] = None) -> float:
+        """
+        One Adam step on the mean squared error between `forward(inputs)` and `target`.
+
+        Args:
+            inputs: Array of shape (batch, in).
+            target: Array of shape (batch, input_dim).
+            sample_weights: Optional per-row loss weights of shape (batch,), e.g.
+                importance-sampling corrections from a prioritized replay buffer.
+
+        Returns:
+            The minibatch loss before the update.
+        """
+        # Forward, keeping activations for backprop
+        activations = [inputs]
+        gates = []
+        pre = []
+        h = inputs
+        for w, b in zip(self.weights[:-1], self.biases[:-1]):
+            z = h @ w + b
+            h, s = _silu(z)
+            pre.append(z)
+            gates.append(s)
+            activations.append(h)
+        out = h @ self.weights[-1] + self.biases[-1]
+
+        diff = out - target
+        delta = 2.0 * diff / diff.size
+        if sample_weights is not None:
+            w = np.asarray(sample_weights, dtype=np.float64)[:, None]
+            loss = float(np.mean(w * np.square(diff)))
+            delta = delta * w
+        else:
+            loss = float(np.mean(np.square(diff)))
+
+        # Backward
+        grad_w = [None] * len(self.weights)
+        grad_b = [None] * len(self.biases)
+        for layer in reversed(range(len(self.weights))):
+            grad_w[layer] = activations[layer].T @ delta
+            grad_b[layer] = delta.sum(axis=0)
+            if layer > 0:
+                dh = delta @ self.weights[layer].T
+                z, s = pre[layer - 1], gates[layer - 1]
+                delta = dh * (s + z * s * (1.0 - s))
+
+        grads = grad_w + grad_b
+        if self.max_grad_norm is not None:
+            # Noisy minibatches at high-noise timesteps occasionally spike the gradient
+            norm = np.sqrt(sum(float(np.sum(np.square(g))) for g in grads))
+            if norm > self.max_grad_norm:
+                grads = [g * (self.max_grad_norm / norm) for g in grads]
+        self._adam_update(grads)
+        return loss
+
+    def _adam_update(self, grads: List[np.ndarray], beta1: float = 0.9, beta2: float = 0.999, eps: float = 1e-8):
+        self._adam_t += 1
+        params = self.parameters()
+        bias1 = 1.0 - beta1 ** self._adam_t
+        bias2 = 1.0 - beta2 ** self._adam_t
+        for param, grad, m, v in zip(params, grads, self._adam_m, self._adam_v):
+            m *= beta1
+            m += (1.0 - beta1) * grad
+            v *= beta2
+            v += (1.0 - beta2) * np.square(grad)
+            param -= self.learning_rate * (m / bias1) / (np.sqrt(v / bias2) + eps)
+        self.version += 1
@@ -0,0 +1,33 @@
+from benchmarks import harness
+from benchmarks.harness import compare, measure
+
+def test_measure_calibrates_calls_per_repeat():
+    calls = []
+    stats = measure(lambda: calls.append(1), repeat=3, min_time=0.001)
+    assert stats["number"] >= 1 and stats["repeat"] == 3
+    assert stats["min"] <= stats["median"]
+    # Warm-up and calibration calls come on top of the timed ones
+    assert len(calls) > 1 + stats["number"] * 3
+
+def test_registered_cases_expand_parameter_grid(monkeypatch):
+    monkeypatch.setattr(harness, "REGISTRY", {})
+
+    @harness.benchmark("toy.sum", n=[10, 100], squared=[False, True])
+    def toy(n, squared):
+        values = list(range(n))
+        return lambda: sum(v * v if squared else v for v in values)
+
+    ids = [case["id"] for case in harness.cases()]
+    assert ids == [
+        "toy.sum[n=10,squared=False]", "toy.sum[n=10,squared=True]",
+        "toy.sum[n=100,squared=False]", "toy.sum[n=100,squared=True]",
+    ]
+    document = harness.run("n=10,", repeat=2, min_time=0.001, log=lambda line: None)
+    assert set(document["results"]) == {"toy.sum[n=10,squared=False]", "toy.sum[n=10,squared=True]"}
+    assert "numpy" in document["environment"]
+
+def test_compare_flags_regressions():
+    baseline = {"results": {"a": {"min": 1.0}, "b": {"min": 1.0}, "c": {"min": 1.0}, "gone": {"min": 1.0}}}
+    current = {"results": {"a": {"min": 1.1}, "b": {"min": 1.5}, "c": {"min": 0.5}, "added": {"min": 1.0}}}
+    status = {row["id"]: row["status"] for row in compare(current, baseline, threshold=0.25)}
+    assert status == {"a": "ok", "b": "regression", "c": "improvement", "gone": "missing", "added": "new"}
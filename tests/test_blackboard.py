@@ -0,0 +1,108 @@
+import pytest
+from src.blackboard import Blackboard, FirstSentenceSummarizer, estimate_tokens
+from src.environment import AgentEnvironment
+from src.reasoning_agent import DomainReasoningAgent
+
+def test_unbounded_blackboard_keeps_everything():
+    board = Blackboard()
+    for i in range(5):
+        board.post("legal", f"entry {i}")
+    assert len(board) == 5
+    assert board[0]["timestamp"] == 0
+    assert board.context_view() == board.render()
+
+def test_last_n_per_agent():
+    board = Blackboard(max_entries_per_agent=2)
+    for i in range(4):
+        board.post("legal", f"legal {i}")
+        board.post("medical", f"medical {i}")
+
+    assert [e["content"] for e in board] == ["legal 2", "medical 2", "legal 3", "medical 3"]
+    # Timestamps keep increasing across evictions
+    assert board[-1]["timestamp"] == 7
+    assert board.render() == "[legal]: legal 2\n\n[medical]: medical 2\n\n[legal]: legal 3\n\n[medical]: medical 3"
+
+def test_token_budget_keeps_newest():
+    board = Blackboard(token_budget=20)
+    for i in range(10):
+        board.post("legal", "x" * 40)
+
+    assert board.total_tokens <= 20
+    assert len(board) >= 1
+    assert board[-1]["timestamp"] == 9
+
+def test_summarizer_compacts_evicted_entries():
+    board = Blackboard(max_entries_per_agent=1, summarizer=FirstSentenceSummarizer())
+    board.post("legal", "Contracts need consideration. Long elaboration follows here.")
+    board.post("legal", "Capacity matters too.")
+
+    assert len(board) == 1
+    assert board.summary == "[legal] Contracts need consideration."
+    view = board.context_view()
+    assert view.startswith("[summary of earlier discussion]:")
+    assert view.endswith("[legal]: Capacity matters too.")
+
+def test_summarizer_is_bounded():
+    summarizer = FirstSentenceSummarizer(max_tokens=10)
+    summary = None
+    for i in range(20):
+        summary = summarizer(summary, [{"agent_domain": "a", "content": f"Sentence number {i}."}])
+    assert estimate_tokens(summary) <= 10
+    assert summary.endswith("Sentence number 19.")
+
+def test_context_view_respects_explicit_budget():
+    board = Blackboard()
+    for i in range(10):
+        board.post("legal", "y" * 40)
+    view = board.context_view(token_budget=30)
+    assert estimate_tokens(view) <= 30
+    assert view
+
+def test_environment_uses_bounded_view():
+    env = AgentEnvironment(blackboard=Blackboard(max_entries_per_agent=1))
+    env.register_agent(DomainReasoningAgent(domain="legal"))
+    env.register_agent(DomainReasoningAgent(domain="medical"))
+
+    result = env.process_query("Query", iterations=3)
+
+    # All responses are reported, but only the last entry per agent is retained
+    assert len(result["responses"]["legal"]) == 3
+    assert len(result["blackboard_history"]) == 2
+
+def test_state_roundtrip_preserves_rendering():
+    board = Blackboard(max_entries_per_agent=1, summarizer=FirstSentenceSummarizer())
+    board.post("law", "First. Detail.")
+    board.post("law", "Second.")
+    board.post("med", "Third.")
+
+    restored = Blackboard()
+    restored.set_state(board.get_state())
+    assert restored.render() == board.render()
+    assert restored.summary == board.summary
+    assert restored.post("med", "Fourth.")["timestamp"] == 3
+
+class CountingSegments(list):
+    """Segment list that counts how many segments are sliced out for rendering."""
+    sliced = 0
+
+    def __getitem__(self, index):
+        result = super().__getitem__(index)
+        if isinstance(index, slice):
+            self.sliced += len(result)
+        return result
+
+@pytest.mark.parametrize("policy", [{"token_budget": 60}, {"max_entries_per_agent": 3}])
+def test_render_is_incremental_under_active_retention(policy):
+    board = Blackboard(**policy)
+    for i in range(10):
+        board.post(f"agent{i % 2}", f"message number {i} " * 3)
+    board.render()
+    board._segments = CountingSegments(board._segments)
+
+    for i in range(10, 60):
+        board.post(f"agent{i % 2}", f"message number {i} " * 3)
+        view = board.context_view()
+        assert view == "\n\n".join(board.render_entry(e) for e in board)
+    # Every post evicted an entry, yet each render only joined the new segment
+    assert board[0]["timestamp"] > 10
+    assert board._segments.sliced == 50
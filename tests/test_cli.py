@@ -2,6 +2,7 @@ import pytest
 import subprocess
 import sys
 import os
+import json
 
 def test_cli_help():
     """Verify the CLI help command works."""
@@ -42,3 +43,16 @@ def test_cli_eval_basic():
     )
     assert result.returncode == 0
     assert "Evaluation Results: MedicalQA" in result.stdout
+
+def test_cli_results(tmp_path):
+    """Verify the results command indexes and aggregates reports."""
+    report = {"domain": "MedicalQA", "timestamp": "2026-01-01T00:00:00", "results": []}
+    (tmp_path / "MedicalQA_eval_20260101_000000.json").write_text(json.dumps(report))
+    result = subprocess.run(
+        [sys.executable, "-m", "src.main", "results", "--results-dir", str(tmp_path)],
+        capture_output=True,
+        text=True
+    )
+    assert result.returncode == 0
+    assert "MedicalQA" in result.stdout
+    assert os.path.exists(tmp_path / "index.sqlite")
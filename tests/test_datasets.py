@@ -0,0 +1,80 @@
+import csv
+import gzip
+import json
+import pytest
+
+from src.datasets import discover_benchmarks, iter_items, load_benchmark, select_items
+
+def make_item(i):
+    return {
+        "query": f"Question {i}",
+        "expert_reference": f"Reference {i}",
+        "domain_configs": [{"id": "agent", "domain": "law"}]
+    }
+
+ITEMS = [make_item(i) for i in range(7)]
+
+def write_jsonl(path, items, compress=False):
+    opener = gzip.open if compress else open
+    with opener(path, "wt") as f:
+        for item in items:
+            f.write(json.dumps(item) + "\n")
+
+def write_csv(path, items):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["query", "expert_reference", "domain_configs"])
+        writer.writeheader()
+        for item in items:
+            writer.writerow(dict(item, domain_configs=json.dumps(item["domain_configs"])))
+
+def test_jsonl_csv_and_gzip_files(tmp_path):
+    write_jsonl(tmp_path / "a.jsonl", ITEMS)
+    write_jsonl(tmp_path / "b.jsonl.gz", ITEMS, compress=True)
+    write_csv(tmp_path / "c.csv", ITEMS)
+    for name in ("a.jsonl", "b.jsonl.gz", "c.csv"):
+        assert list(iter_items(str(tmp_path / name))) == ITEMS
+
+def test_gzipped_csv_keeps_quoted_newlines(tmp_path):
+    items = [dict(make_item(0), expert_reference="Line one\r\nLine two")]
+    write_csv(tmp_path / "plain.csv", items)
+    with open(tmp_path / "plain.csv", "rb") as src, gzip.open(tmp_path / "d.csv.gz", "wb") as dst:
+        dst.write(src.read())
+    assert list(iter_items(str(tmp_path / "d.csv.gz"))) == items
+
+def test_sharded_directory_is_read_in_file_order(tmp_path):
+    shard_dir = tmp_path / "MedicalQA"
+    shard_dir.mkdir()
+    write_jsonl(shard_dir / "part-000.jsonl", ITEMS[:3])
+    write_csv(shard_dir / "part-001.csv", ITEMS[3:])
+    (shard_dir / "README.txt").write_text("ignored")
+    write_jsonl(tmp_path / "LegalBench.jsonl", ITEMS)
+
+    found = discover_benchmarks(str(tmp_path))
+    assert sorted(found) == ["LegalBench", "MedicalQA"]
+    assert list(iter_items(found["MedicalQA"])) == ITEMS
+
+def test_offset_limit_and_shards_partition_the_window():
+    selected = list(select_items(iter(ITEMS), offset=1, limit=5))
+    assert [item["index"] for item in selected] == [1, 2, 3, 4, 5]
+
+    shards = [list(select_items(iter(ITEMS), offset=1, limit=5, shard_index=k, num_shards=2)) for k in range(2)]
+    assert [item["index"] for item in shards[0]] == [1, 3, 5]
+    assert [item["index"] for item in shards[1]] == [2, 4]
+
+def test_load_benchmark_is_lazy(tmp_path):
+    path = tmp_path / "items.jsonl"
+    write_jsonl(path, ITEMS)
+    with open(path, "a") as f:
+        f.write("not json\n")
+    # The malformed trailing line is never read when the limit stops early
+    assert len(list(load_benchmark(str(path), limit=3))) == 3
+    with pytest.raises(json.JSONDecodeError):
+        list(load_benchmark(str(path)))
+
+def test_missing_fields_and_bad_shard(tmp_path):
+    path = tmp_path / "bad.jsonl"
+    write_jsonl(path, [{"query": "q"}])
+    with pytest.raises(ValueError):
+        list(iter_items(str(path)))
+    with pytest.raises(ValueError):
+        list(select_items(iter(ITEMS), shard_index=2, num_shards=2))
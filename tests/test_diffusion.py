@@ -34,3 +34,74 @@ def test_online_update_placeholder():
     policy = DiffusionPolicy()
     # Should not raise error
     policy.update_online({"dummy": "data"})
+
+def test_sample_batch_shape():
+    policy = DiffusionPolicy(action_dim=2, horizon=3)
+    contexts = ["legal", "medical", "ethics"]
+
+    samples = policy.sample_batch(contexts, num_samples=4)
+
+    assert samples.shape == (3, 4, 3, 2)
+    # Independent noise per sample
+    assert not np.array_equal(samples[0, 0], samples[0, 1])
+
+def test_sample_batch_empty_contexts():
+    policy = DiffusionPolicy(action_dim=2, horizon=3)
+    samples = policy.sample_batch([], num_samples=2)
+    assert samples.shape == (0, 2, 3, 2)
+
+def test_trainable_policy_update_online():
+    policy = DiffusionPolicy(action_dim=2, horizon=3, num_diffusion_steps=10,
+                             trainable=True, batch_size=8, gradient_steps=2)
+    assert policy.score_network is not None
+    # No replay storage until trajectories arrive
+    assert policy.replay is None
+
+    trajectories = np.ones((16, 3, 2))
+    loss = policy.update_online({"trajectories": trajectories, "context": "legal"})
+
+    assert isinstance(loss, float)
+    assert len(policy.replay) == 16
+    assert policy.sample_batch(["legal"], num_samples=2).shape == (1, 2, 3, 2)
+
+def test_update_online_frequency():
+    policy = DiffusionPolicy(action_dim=1, horizon=2, trainable=True, batch_size=1, update_every=2)
+    assert policy.update_online(np.zeros((2, 1))) is None
+    assert policy.update_online(np.zeros((2, 1))) is not None
+
+@pytest.mark.parametrize("seed", range(5))
+def test_update_online_learns_target(seed):
+    policy = DiffusionPolicy(action_dim=1, horizon=2, num_diffusion_steps=20, scheduler="ddim",
+                             num_inference_steps=10, trainable=True, batch_size=64,
+                             rng=np.random.default_rng(seed))
+    policy.score_network.learning_rate = 1e-2
+    target = np.array([[1.0], [-1.0]])
+    for _ in range(300):
+        policy.update_online({"trajectories": target[None], "context": "q"})
+
+    samples = policy.sample_batch(["q"], num_samples=32)[0]
+    assert np.allclose(samples.mean(axis=0), target, atol=0.3)
+
+def test_population_sampling_with_networks():
+    policies = [DiffusionPolicy(action_dim=2, horizon=3, trainable=True) for _ in range(3)]
+    samples = DiffusionPolicy.sample_population(policies, "ctx", num_samples=2)
+    assert samples.shape == (3, 2, 3, 2)
+    assert policies[0].fusion_key() != DiffusionPolicy(action_dim=2, horizon=3).fusion_key()
+
+def test_equal_generators_give_identical_samples():
+    def make():
+        return DiffusionPolicy(action_dim=2, horizon=3, trainable=True, rng=np.random.default_rng(42))
+    a, b = make(), make()
+    np.testing.assert_array_equal(a.sample_batch(["ctx"], num_samples=4), b.sample_batch(["ctx"], num_samples=4))
+    a.update_online(np.ones((40, 3, 2)))
+    b.update_online(np.ones((40, 3, 2)))
+    np.testing.assert_array_equal(a.score_network.weights[0], b.score_network.weights[0])
+
+def test_population_sample_independent_of_fusion():
+    def make(seed):
+        return DiffusionPolicy(action_dim=1, horizon=2, rng=np.random.default_rng(seed))
+    fused = DiffusionPolicy.sample_population([make(1), make(2)], "ctx", num_samples=3)
+    alone = DiffusionPolicy.sample_population([make(2)], "ctx", num_samples=3)
+    single = make(2).sample_batch(["ctx"], num_samples=3)
+    np.testing.assert_array_equal(fused[1], alone[0])
+    np.testing.assert_array_equal(alone[0], single[0])
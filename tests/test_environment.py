@@ -1,6 +1,7 @@
 import pytest
 from src.environment import AgentEnvironment
 from src.reasoning_agent import DomainReasoningAgent
+from src.retrieval import Retriever
 
 def test_agent_registration():
     env = AgentEnvironment()
@@ -42,3 +43,110 @@ def test_process_query_cycle():
     assert "medical" in result["responses"]
     # 2 agents * 1 iteration = 2 blackboard entries
     assert len(result["blackboard_history"]) == 2
+
+def test_incremental_blackboard_rendering():
+    env = AgentEnvironment()
+    env.post_to_blackboard("legal", "first")
+    assert env.get_blackboard_content() == "[legal]: first"
+
+    env.post_to_blackboard("medical", "second")
+    env.post_to_blackboard("legal", "third")
+    expected = "[legal]: first\n\n[medical]: second\n\n[legal]: third"
+    assert env.get_blackboard_content() == expected
+    # Cached rendering is reused when nothing changed
+    assert env.get_blackboard_content() is env.get_blackboard_content()
+
+    env.clear_blackboard()
+    assert env.get_blackboard_content() == ""
+    env.post_to_blackboard("ethics", "fresh")
+    assert env.get_blackboard_content() == "[ethics]: fresh"
+
+class SlowEchoClient:
+    """Records the prompts it sees and the peak number of concurrent calls."""
+    def __init__(self, delay=0.05):
+        import threading
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.prompts = []
+
+    def generate(self, prompt):
+        import time
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.prompts.append(prompt)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        return f"answer ({len(prompt)} chars)"
+
+def test_parallel_round_snapshot_and_order():
+    client = SlowEchoClient()
+    env = AgentEnvironment(parallel_rounds=True)
+    for domain in ["legal", "medical", "ethics", "physics"]:
+        env.register_agent(DomainReasoningAgent(domain=domain, model_client=client))
+
+    result = env.process_query("Shared question", iterations=2)
+
+    assert client.peak > 1
+    # Posts are merged in registration order each round
+    domains = [entry["agent_domain"] for entry in result["blackboard_history"]]
+    assert domains == ["legal", "medical", "ethics", "physics"] * 2
+    # All agents in a round saw the same (empty) blackboard snapshot
+    first_round_prompts = client.prompts[:4]
+    assert all("Shared Blackboard:\n\n" in p for p in first_round_prompts)
+
+def test_parallel_round_max_concurrency():
+    client = SlowEchoClient(delay=0.02)
+    env = AgentEnvironment(parallel_rounds=True, max_concurrency=2)
+    for domain in ["a", "b", "c", "d"]:
+        env.register_agent(DomainReasoningAgent(domain=domain, model_client=client))
+
+    env.process_query("Question", iterations=1)
+
+    assert client.peak <= 2
+
+class CountingRetrievalAgent(DomainReasoningAgent):
+    def __init__(self, domain, log):
+        super().__init__(domain=domain)
+        self.log = log
+
+    def _retrieve_context(self, query):
+        self.log.append((self.domain, query))
+        return f"passages for {query}"
+
+def test_retrieval_coalesced_per_domain_and_cached():
+    log = []
+    env = AgentEnvironment()
+    for domain in ("legal", "legal", "medical"):
+        env.register_agent(CountingRetrievalAgent(domain, log))
+
+    result = env.process_query("What is a contract?", iterations=2)
+    # One lookup per domain, on the bare user query rather than the blackboard prompt
+    assert sorted(log) == [("legal", "What is a contract?"), ("medical", "What is a contract?")]
+    assert "passages for What is a contract?" in result["responses"]["legal"][0]
+
+    env.process_query("what is a contract", iterations=1)
+    assert len(log) == 2
+    assert env.retrieval_cache.hits == 2
+
+def test_retrieval_not_coalesced_across_retrievers_or_k():
+    corpus = ["alpha contract clause", "beta contract terms", "gamma unrelated"]
+    shared = Retriever.from_passages(corpus)
+    agents = [
+        DomainReasoningAgent("legal", retriever=shared, retrieval_k=1),
+        DomainReasoningAgent("legal", retriever=shared, retrieval_k=1),
+        DomainReasoningAgent("legal", retriever=shared, retrieval_k=2),
+        DomainReasoningAgent("legal", retriever=Retriever.from_passages(corpus[1:]), retrieval_k=1),
+    ]
+    env = AgentEnvironment()
+    for agent in agents:
+        env.register_agent(agent)
+
+    contexts = env._retrieve_contexts("contract")
+    assert len(contexts) == 3
+    assert env.retrieval_cache.misses == 3
+    assert contexts[agents[0].retrieval_key()] != contexts[agents[2].retrieval_key()]
+    assert agents[3].retrieval_key() != agents[0].retrieval_key()
@@ -1,7 +1,10 @@
+import json
 import os
 import shutil
+import numpy as np
 import pytest
 from src.evaluation import Evaluator
+from src.reporting import read_jsonl_report
 
 @pytest.fixture
 def evaluator():
@@ -54,3 +57,98 @@ def test_report_saving(evaluator):
     
     files = os.listdir(evaluator.results_dir)
     assert any(f.startswith(domain) and f.endswith(".json") for f in files)
+
+PARALLEL_ITEMS = [
+    {
+        "query": f"Query {i}",
+        "expert_reference": "Reference",
+        "domain_configs": [{"id": "a1", "domain": "law"}, {"id": "a2", "domain": "ethics"}]
+    }
+    for i in range(3)
+]
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_parallel_evaluation_matches_serial(evaluator, executor):
+    serial = evaluator.run_evaluation("Serial", PARALLEL_ITEMS, max_iterations=2, num_runs=2)
+    parallel_evaluator = Evaluator(results_dir=evaluator.results_dir, max_workers=3, executor=executor)
+    parallel = parallel_evaluator.run_evaluation("Parallel", PARALLEL_ITEMS, max_iterations=2, num_runs=2)
+
+    assert parallel["results"] == serial["results"]
+    assert [r["query"] for r in parallel["results"]] == ["Query 0", "Query 1", "Query 2"]
+    assert [run["run_id"] for run in parallel["results"][0]["runs"]] == [0, 1]
+
+    # The sampled consensus trajectories depend on each task's seed: equal across
+    # executors, distinct between tasks and changed by a different root seed
+    trajectories = [run["final_trajectory"] for r in parallel["results"] for run in r["runs"]]
+    assert trajectories == [run["final_trajectory"] for r in serial["results"] for run in r["runs"]]
+    assert len({repr(t) for t in trajectories}) == len(trajectories)
+    reseeded = Evaluator(results_dir=evaluator.results_dir, max_workers=3, executor=executor, seed=1)
+    other = reseeded.run_evaluation("Reseeded", PARALLEL_ITEMS, max_iterations=2, num_runs=2)
+    assert [run["final_trajectory"] for r in other["results"] for run in r["runs"]] != trajectories
+
+def test_task_seeds_are_distinct_and_reproducible(evaluator):
+    results_dir = evaluator.results_dir
+    def states(seed):
+        return [tuple(s.generate_state(4)) for s in Evaluator(results_dir=results_dir, seed=seed).task_seeds(4)]
+
+    seeds = states(7)
+    assert len(set(seeds)) == 4
+    assert seeds == states(7)
+    assert seeds != states(8)
+    # The loop receives the SeedSequence itself, not a 32-bit reduction of it
+    child = Evaluator(results_dir=results_dir, seed=7).task_seed(2)
+    assert isinstance(child, np.random.SeedSequence)
+    assert child.spawn_key == (2,)
+
+def test_invalid_executor():
+    with pytest.raises(ValueError):
+        Evaluator(results_dir="test_results", executor="gpu")
+
+def test_codec_requires_jsonl_format():
+    with pytest.raises(ValueError, match="jsonl"):
+        Evaluator(results_dir="test_results", report_codec="gzip")
+
+@pytest.mark.parametrize("option", ["seed", "max_iterations"])
+def test_reserved_loop_options_rejected(option):
+    with pytest.raises(ValueError, match=option):
+        Evaluator(loop_options={option: 3, "patience": 2})
+
+def test_streaming_jsonl_report(evaluator):
+    streaming = Evaluator(
+        results_dir=evaluator.results_dir,
+        report_format="jsonl",
+        report_codec="gzip",
+        include_consensus=False,
+        checkpoint_every=2
+    )
+    report = streaming.run_evaluation("Stream", PARALLEL_ITEMS, max_iterations=2, num_runs=2)
+    serial = evaluator.run_evaluation("Serial", PARALLEL_ITEMS, max_iterations=2, num_runs=2)
+
+    assert report["report_path"].endswith(".jsonl.gz")
+    records = list(read_jsonl_report(report["report_path"]))
+    assert [r["type"] for r in records] == ["header"] + ["run", "run", "item"] * 3
+    runs = [r for r in records if r["type"] == "run"]
+    assert all("final_consensus" not in r for r in runs)
+    assert [r["improvement"] for r in runs] == [
+        run["improvement"] for item in serial["results"] for run in item["runs"]
+    ]
+    # Only the aggregates are kept in memory
+    assert "runs" not in report["results"][0]
+    assert report["results"][0]["avg_accuracy_improvement"] == serial["results"][0]["avg_accuracy_improvement"]
+
+def test_sharded_evaluation_matches_full_run(evaluator, tmp_path):
+    path = tmp_path / "Parallel.jsonl"
+    with open(path, "w") as f:
+        for item in PARALLEL_ITEMS:
+            f.write(json.dumps(item) + "\n")
+
+    full = evaluator.run_evaluation("Full", PARALLEL_ITEMS, max_iterations=2, num_runs=2)
+    shards = [
+        evaluator.load_benchmarks(benchmark_dir=str(tmp_path), shard_index=k, num_shards=2)["Parallel"]
+        for k in range(2)
+    ]
+    shard_reports = [evaluator.run_evaluation(f"Shard{k}", shard, max_iterations=2, num_runs=2) for k, shard in enumerate(shards)]
+
+    # Items 0 and 2 land on shard 0, item 1 on shard 1, with the seeds of the full run
+    assert [r["query"] for r in shard_reports[0]["results"]] == [PARALLEL_ITEMS[0]["query"], PARALLEL_ITEMS[2]["query"]]
+    assert shard_reports[1]["results"][0]["runs"] == full["results"][1]["runs"]
@@ -35,5 +35,71 @@ def test_hierarchical_coordination():
     expected_consensus = np.array([[6.0], [6.0]])
     assert np.allclose(consensus, expected_consensus)
 
+def test_coordination_plan_group_index_arrays():
+    metadata = [
+        {"id": "m1", "morphology": "math"},
+        {"id": "c1", "morphology": "coding"},
+        {"id": "m2", "morphology": "math"},
+    ]
+    agents = {m["id"]: DiffusionPolicy(action_dim=1, horizon=2) for m in metadata}
+    orchestrator = OMADOrchestrator(agents, agent_metadata=metadata)
+    plan = orchestrator.plan
+
+    assert plan.group_names == ["math", "coding"]
+    assert [plan.agent_ids[i] for i in plan.group_index[0]] == ["m1", "m2"]
+    assert [plan.agent_ids[i] for i in plan.group_index[1]] == ["c1"]
+
+def test_coordinate_returns_group_scores():
+    agents = {
+        "m1": DiffusionPolicy(action_dim=1, horizon=2),
+        "m2": DiffusionPolicy(action_dim=1, horizon=2),
+        "c1": DiffusionPolicy(action_dim=1, horizon=2),
+    }
+    metadata = [
+        {"id": "m1", "morphology": "math"},
+        {"id": "m2", "morphology": "math"},
+        {"id": "c1", "morphology": "coding"},
+    ]
+    orchestrator = OMADOrchestrator(agents, agent_metadata=metadata)
+    trajectories = {
+        "m1": np.array([[1.0], [2.0]]),
+        "m2": np.array([[3.0], [3.0]]),
+        "c1": np.array([[10.0], [-10.0]]),
+    }
+
+    consensus, group_scores = orchestrator.coordinate(trajectories, return_scores=True)
+
+    assert consensus.shape == (2, 1)
+    assert set(group_scores) == {"math", "coding"}
+    for group_name, agent_ids in orchestrator.groups.items():
+        expected = [
+            orchestrator.joint_distributional_value_function({"temp": trajectories[aid]})
+            + orchestrator.calculate_entropy_bonus(trajectories[aid])
+            for aid in agent_ids
+        ]
+        assert np.allclose(group_scores[group_name], expected)
+
+def test_coordinate_with_missing_agents():
+    agents = {
+        "m1": DiffusionPolicy(action_dim=1, horizon=2),
+        "m2": DiffusionPolicy(action_dim=1, horizon=2),
+        "c1": DiffusionPolicy(action_dim=1, horizon=2),
+    }
+    metadata = [
+        {"id": "m1", "morphology": "math"},
+        {"id": "m2", "morphology": "math"},
+        {"id": "c1", "morphology": "coding"},
+    ]
+    orchestrator = OMADOrchestrator(agents, agent_metadata=metadata)
+
+    # Only the math group reports
+    consensus, group_scores = orchestrator.coordinate(
+        {"m1": np.array([[1.0], [1.0]]), "m2": np.array([[3.0], [3.0]])},
+        return_scores=True
+    )
+
+    assert np.allclose(consensus, 2.0)
+    assert list(group_scores) == ["math"]
+
 if __name__ == "__main__":
     test_hierarchical_coordination()
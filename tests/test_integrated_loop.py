@@ -1,5 +1,9 @@
+import asyncio
+import os
+import numpy as np
 import pytest
 from src.integrated_loop import IntegratedAdversarialLoop
+from src.score_network import ScoreNetwork
 
 def test_integrated_loop_initialization():
     agent_configs = [
@@ -56,3 +60,177 @@ def test_evaluation_logic():
     
     assert isinstance(score, float)
     assert 0.0 <= score <= 1.0
+
+class ScriptedGapLoop(IntegratedAdversarialLoop):
+    """Replays a fixed sequence of gap scores."""
+
+    def __init__(self, gaps, **kwargs):
+        super().__init__([{"id": "a1", "domain": "test"}], "Ref", **kwargs)
+        self.gaps = list(gaps)
+        self.questions = 0
+        generate = self.generator.generate_question
+
+        def counting_generate(**kw):
+            self.questions += 1
+            return generate(**kw)
+        self.generator.generate_question = counting_generate
+
+    def evaluate_performance(self, agent_responses, expert_ref):
+        return self.gaps.pop(0)
+
+def test_runs_all_iterations_without_criteria():
+    loop = ScriptedGapLoop([0.5, 0.5, 0.5], max_iterations=3)
+    result = loop.run_iteration("q")
+    assert len(result["history"]) == 3
+    assert result["stop_reason"] == "max_iterations"
+    assert result["history"][-1]["stop_reason"] == "max_iterations"
+    assert loop.questions == 3
+
+def test_stops_at_gap_threshold_without_generating():
+    loop = ScriptedGapLoop([0.9, 0.2, 0.1], max_iterations=3, gap_threshold=0.25)
+    result = loop.run_iteration("q")
+    assert len(result["history"]) == 2
+    assert result["stop_reason"] == "gap_threshold"
+    # The question for the skipped iteration is never generated
+    assert loop.questions == 1
+    assert result["final_query"] == result["history"][-1]["query"]
+
+def test_stops_on_plateau():
+    loop = ScriptedGapLoop([0.9, 0.5, 0.5, 0.4999, 0.1], max_iterations=5, patience=2, min_delta=0.01)
+    result = loop.run_iteration("q")
+    assert [h["gap_score"] for h in result["history"]] == [0.9, 0.5, 0.5, 0.4999]
+    assert result["stop_reason"] == "plateau"
+
+def test_stops_on_time_budget():
+    loop = ScriptedGapLoop([0.9, 0.8, 0.7], max_iterations=3, time_budget=0.0)
+    result = loop.run_iteration("q")
+    assert len(result["history"]) == 1
+    assert result["stop_reason"] == "time_budget"
+
+def test_async_loop_honours_stopping_criteria():
+    loop = ScriptedGapLoop([0.9, 0.1, 0.1], max_iterations=3, gap_threshold=0.2)
+    result = asyncio.run(loop.arun_iteration("q"))
+    assert len(result["history"]) == 2
+    assert result["stop_reason"] == "gap_threshold"
+
+def test_invalid_patience():
+    with pytest.raises(ValueError):
+        IntegratedAdversarialLoop([{"id": "a1"}], "Ref", patience=0)
+
+class PreemptedGenerator:
+    """Fails on the n-th question, simulating a job killed mid-run."""
+
+    def __init__(self, generator, fail_on):
+        self.generator = generator
+        self.fail_on = fail_on
+        self.calls = 0
+
+    def generate_question(self, **kwargs):
+        self.calls += 1
+        if self.calls == self.fail_on:
+            raise RuntimeError("preempted")
+        return self.generator.generate_question(**kwargs)
+
+def test_resume_continues_from_last_checkpoint(tmp_path):
+    configs = [{"id": "a1", "domain": "test"}, {"id": "a2", "domain": "other"}]
+    loop = IntegratedAdversarialLoop(configs, "Ref", max_iterations=3, checkpoint_dir=str(tmp_path))
+    loop.generator = PreemptedGenerator(loop.generator, fail_on=2)
+    with pytest.raises(RuntimeError):
+        loop.run_iteration("Initial question?")
+
+    resumed = IntegratedAdversarialLoop(configs, "Ref", max_iterations=3, checkpoint_dir=str(tmp_path))
+    processed = []
+    process_query = resumed.env.process_query
+    resumed.env.process_query = lambda q: processed.append(q) or process_query(q)
+    result = resumed.resume_from(str(tmp_path))
+
+    # Only the iterations that had not completed are re-run
+    assert len(processed) == 2
+    assert [h["iteration"] for h in result["history"]] == [0, 1, 2]
+    assert result["history"][0]["query"] == "Initial question?"
+    assert result["stop_reason"] == "max_iterations"
+    assert len([f for f in os.listdir(tmp_path) if f.endswith(".npz")]) == 1
+
+    # A finished checkpoint resumes without any work
+    again = IntegratedAdversarialLoop(configs, "Ref", max_iterations=3)
+    again.env.process_query = None
+    assert again.resume_from(str(tmp_path))["history"] == result["history"]
+
+def test_checkpoint_roundtrips_networks_and_blackboard(tmp_path):
+    configs = [{"id": "a1", "domain": "test"}]
+    loop = IntegratedAdversarialLoop(configs, "Ref", checkpoint_dir=str(tmp_path))
+    loop.diffusion_agents["a1"].score_network = ScoreNetwork(input_dim=1, seed=0)
+    loop.env.post_to_blackboard("test", "Shared finding.")
+    loop.save_checkpoint("next?", [{"iteration": 0, "query": "q", "gap_score": 0.5, "consensus_summary": ""}])
+
+    restored = IntegratedAdversarialLoop(configs, "Ref")
+    restored.diffusion_agents["a1"].score_network = ScoreNetwork(input_dim=1, seed=1)
+    query, history, stop_reason = restored.restore_checkpoint(str(tmp_path))
+
+    assert query == "next?"
+    assert stop_reason is None
+    assert len(history) == 1
+    for a, b in zip(loop.diffusion_agents["a1"].score_network.weights, restored.diffusion_agents["a1"].score_network.weights):
+        np.testing.assert_array_equal(a, b)
+    assert restored.env.blackboard[0]["content"] == "Shared finding."
+
+    other = IntegratedAdversarialLoop([{"id": "zz", "domain": "test"}], "Ref")
+    with pytest.raises(ValueError):
+        other.restore_checkpoint(str(tmp_path))
+
+def test_equal_seeds_give_identical_coordination():
+    configs = [{"id": "a1", "domain": "law"}, {"id": "a2", "domain": "ethics"}]
+
+    def consensus(seed):
+        loop = IntegratedAdversarialLoop(configs, "Ref", max_iterations=1, seed=seed)
+        return loop.env.orchestrator.step("ctx")["consensus_path"]
+
+    np.testing.assert_array_equal(consensus(3), consensus(3))
+    assert not np.array_equal(consensus(3), consensus(4))
+
+    # A SeedSequence seed is not advanced by the loop, so reusing it repeats the run
+    sequence = np.random.SeedSequence(3, spawn_key=(5,))
+    np.testing.assert_array_equal(consensus(sequence), consensus(sequence))
+    assert not np.array_equal(consensus(sequence), consensus(np.random.SeedSequence(3, spawn_key=(6,))))
+
+def test_checkpoint_restores_generator_state(tmp_path):
+    configs = [{"id": "a1", "domain": "test"}]
+    loop = IntegratedAdversarialLoop(configs, "Ref", checkpoint_dir=str(tmp_path), seed=0)
+    loop.diffusion_agents["a1"].rng.standard_normal(5)
+    loop.save_checkpoint("q", [{"iteration": 0, "query": "q", "gap_score": 0.5, "consensus_summary": ""}])
+    expected = loop.diffusion_agents["a1"].rng.standard_normal(3)
+
+    restored = IntegratedAdversarialLoop(configs, "Ref", seed=99)
+    restored.restore_checkpoint(str(tmp_path))
+    np.testing.assert_array_equal(restored.diffusion_agents["a1"].rng.standard_normal(3), expected)
+
+def test_resumed_policy_continues_online_updates(tmp_path):
+    configs = [{"id": "a1", "domain": "test"}]
+    batches = np.random.default_rng(0).standard_normal((4, 3, 1, 1))
+
+    def make(network_seed):
+        loop = IntegratedAdversarialLoop(configs, "Ref", checkpoint_dir=str(tmp_path), seed=0)
+        policy = loop.diffusion_agents["a1"]
+        policy.score_network = ScoreNetwork(input_dim=1, seed=network_seed)
+        policy.batch_size, policy.update_every = 4, 2
+        return loop, policy
+
+    loop, policy = make(0)
+    loop.env.orchestrator.step("ctx")
+    for batch in batches[:3]:
+        policy.update_online({"trajectories": batch, "context": "ctx"})
+    loop.save_checkpoint("q", [{"iteration": 0, "query": "q", "gap_score": 0.5, "consensus_summary": ""}])
+    expected_loss = policy.update_online({"trajectories": batches[3], "context": "ctx"})
+
+    restored, resumed = make(1)
+    restored.restore_checkpoint(str(tmp_path))
+    assert len(resumed.replay) == 9
+    assert len(restored.orchestrator.replay_buffers[(1, 1)]) == len(loop.orchestrator.replay_buffers[(1, 1)]) > 0
+    assert resumed.replay.contexts[0] == "ctx"
+
+    # The first update after resuming trains with the saved moments, replay rows and cadence
+    loss = resumed.update_online({"trajectories": batches[3], "context": "ctx"})
+    assert loss is not None and loss == expected_loss
+    assert resumed.score_network._adam_t == policy.score_network._adam_t == 2
+    for a, b in zip(policy.score_network.get_state().values(), resumed.score_network.get_state().values()):
+        np.testing.assert_array_equal(a, b)
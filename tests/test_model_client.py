@@ -0,0 +1,137 @@
+import asyncio
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from src.model_client import BatchingClient, SyncClientAdapter, as_async_client, supports_async
+from src.reasoning_agent import DomainReasoningAgent
+from src.adversarial_gen import AdversarialGenerator
+from src.environment import AgentEnvironment
+from src.integrated_loop import IntegratedAdversarialLoop
+
+class SyncClient:
+    def generate(self, prompt):
+        return "sync answer"
+
+class AsyncClient:
+    """Native async client that tracks how many calls are in flight."""
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+    async def agenerate(self, prompt):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return "async answer"
+
+def test_as_async_client_wraps_sync_clients():
+    sync = SyncClient()
+    adapted = as_async_client(sync)
+    assert isinstance(adapted, SyncClientAdapter)
+    assert adapted.generate("p") == "sync answer"
+    assert asyncio.run(adapted.agenerate("p")) == "sync answer"
+
+    native = AsyncClient()
+    assert supports_async(native)
+    assert as_async_client(native) is native
+    assert as_async_client(None) is None
+
+def test_agent_and_generator_async_variants():
+    agent = DomainReasoningAgent(domain="legal", model_client=SyncClient())
+    assert asyncio.run(agent.agenerate_response("q")) == "sync answer"
+
+    mock_agent = DomainReasoningAgent(domain="legal")
+    assert asyncio.run(mock_agent.agenerate_response("q")) == mock_agent.generate_response("q")
+
+    generator = AdversarialGenerator(model_client=AsyncClient())
+    assert asyncio.run(generator.agenerate_question("a", "b", "c")) == "async answer"
+
+def test_aprocess_query_parallel_round():
+    client = AsyncClient()
+    env = AgentEnvironment(parallel_rounds=True, max_concurrency=3)
+    for domain in ["a", "b", "c", "d", "e"]:
+        env.register_agent(DomainReasoningAgent(domain=domain, model_client=client))
+
+    result = asyncio.run(env.aprocess_query("Question", iterations=2))
+
+    assert 1 < client.peak <= 3
+    assert [e["agent_domain"] for e in result["blackboard_history"]] == ["a", "b", "c", "d", "e"] * 2
+
+def test_aprocess_query_sequential_matches_sync():
+    env = AgentEnvironment()
+    env.register_agent(DomainReasoningAgent(domain="legal"))
+    env.register_agent(DomainReasoningAgent(domain="medical"))
+
+    sync_result = env.process_query("Q", iterations=2)
+    async_result = asyncio.run(env.aprocess_query("Q", iterations=2))
+
+    assert async_result["responses"] == sync_result["responses"]
+
+def test_arun_iteration():
+    loop = IntegratedAdversarialLoop(
+        agent_configs=[{"id": "a1", "domain": "test"}],
+        expert_reference="Ref",
+        max_iterations=2,
+        model_client=AsyncClient()
+    )
+    result = asyncio.run(loop.arun_iteration("Start"))
+
+    assert len(result["history"]) == 2
+    assert result["history"][1]["query"] == "async answer"
+    assert result["final_query"] == "async answer"
+
+class BatchBackend:
+    """Backend with a native batch API that records batch sizes."""
+    def __init__(self, delay=0.0):
+        self.batch_sizes = []
+        self.delay = delay
+
+    def generate_batch(self, prompts):
+        time.sleep(self.delay)
+        self.batch_sizes.append(len(prompts))
+        return [f"echo: {p}" for p in prompts]
+
+def test_batching_client_groups_concurrent_threads():
+    backend = BatchBackend()
+    with BatchingClient(backend, max_batch_size=8, max_wait=0.05) as client:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(client.generate, [f"p{i}" for i in range(8)]))
+
+    assert results == [f"echo: p{i}" for i in range(8)]
+    assert sum(backend.batch_sizes) == 8
+    assert max(backend.batch_sizes) > 1
+    assert max(backend.batch_sizes) <= 8
+
+def test_batching_client_async_callers():
+    backend = BatchBackend()
+    client = BatchingClient(backend, max_batch_size=4, max_wait=0.05)
+
+    async def run():
+        return await asyncio.gather(*(client.agenerate(f"q{i}") for i in range(6)))
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        client.close()
+
+    assert results == [f"echo: q{i}" for i in range(6)]
+    assert max(backend.batch_sizes) <= 4
+
+def test_batching_client_falls_back_to_generate():
+    with BatchingClient(SyncClient(), max_wait=0.0) as client:
+        assert client.generate("p") == "sync answer"
+
+def test_batching_client_timeout():
+    with BatchingClient(BatchBackend(delay=0.2), max_wait=0.0) as client:
+        with pytest.raises(TimeoutError):
+            client.generate("slow", timeout=0.01)
+
+def test_batching_client_propagates_errors():
+    class Broken:
+        def generate_batch(self, prompts):
+            raise RuntimeError("backend down")
+
+    with BatchingClient(Broken(), max_wait=0.0) as client:
+        with pytest.raises(RuntimeError, match="backend down"):
+            client.generate("p")
@@ -70,3 +70,126 @@ def test_environment_integration():
     assert len(result["coordination_history"]) == 1
     assert "consensus_path" in result["coordination_history"][0]
     assert result["coordination_history"][0]["consensus_path"].shape == (3, 1)
+
+def test_step_buckets_agents_by_sampler():
+    agents = {
+        "a1": DiffusionPolicy(action_dim=2, horizon=4),
+        "a2": DiffusionPolicy(action_dim=2, horizon=4),
+        "b1": DiffusionPolicy(action_dim=2, horizon=4, scheduler="ddim", num_inference_steps=2),
+    }
+    orchestrator = OMADOrchestrator(agents)
+
+    assert len(orchestrator.shape_buckets) == 2
+    assert sorted(orchestrator.shape_buckets[agents["a1"].fusion_key()]) == ["a1", "a2"]
+
+    samples = DiffusionPolicy.sample_population([agents["a1"], agents["a2"]], "ctx", num_samples=3)
+    assert samples.shape == (2, 3, 4, 2)
+
+    # Every bucket is sampled and coordinated in one step
+    result = orchestrator.step("ctx")
+    assert set(result["individual_trajectories"]) == set(agents)
+    assert result["consensus_path"].shape == (4, 2)
+    assert len(orchestrator.replay_buffers[(4, 2)]) == 4
+
+def test_step_rebuilds_buckets_after_inference_steps_change():
+    agents = {f"a{i}": DiffusionPolicy(num_diffusion_steps=10, scheduler="ddim", num_inference_steps=5)
+              for i in range(3)}
+    orchestrator = OMADOrchestrator(agents)
+    orchestrator.step("ctx")
+
+    agents["a0"].set_inference_steps(2)
+    result = orchestrator.step("ctx")
+
+    assert len(orchestrator.shape_buckets) == 2
+    assert set(result["individual_trajectories"]) == set(agents)
+
+def test_step_coordinates_each_shape_bucket():
+    metadata = [
+        {"id": "a1", "morphology": "math"},
+        {"id": "a2", "morphology": "math"},
+        {"id": "b1", "morphology": "math"},
+        {"id": "b2", "morphology": "coding"},
+    ]
+    agents = {
+        "a1": DiffusionPolicy(action_dim=1, horizon=2),
+        "a2": DiffusionPolicy(action_dim=1, horizon=2),
+        "b1": DiffusionPolicy(action_dim=2, horizon=3),
+        "b2": DiffusionPolicy(action_dim=2, horizon=3),
+    }
+    orchestrator = OMADOrchestrator(agents, agent_metadata=metadata, replay_capacity=8)
+
+    result = orchestrator.step("ctx")
+
+    assert result["consensus_path"] is None
+    paths = result["consensus_paths"]
+    assert set(paths) == {(2, 1), (3, 2)}
+    trajs = result["individual_trajectories"]
+    # Each shape's consensus only involves agents of that shape
+    assert np.allclose(paths[(2, 1)], (trajs["a1"] + trajs["a2"]) / 2)
+    assert np.allclose(paths[(3, 2)], (trajs["b1"] + trajs["b2"]) / 2)
+    assert [len(result["group_scores"][g]) for g in sorted(result["group_scores"])] == [1, 3]
+    # Two sampled rows plus one consensus per shape
+    assert len(orchestrator.replay_buffers[(2, 1)]) == 3
+    assert len(orchestrator.replay_buffers[(3, 2)]) == 3
+
+def test_sample_population_rejects_mixed_shapes():
+    with pytest.raises(ValueError):
+        DiffusionPolicy.sample_population(
+            [DiffusionPolicy(horizon=2), DiffusionPolicy(horizon=3)], "ctx"
+        )
+
+def test_step_fused_sampling_shapes():
+    agents = {f"agent{i}": DiffusionPolicy(action_dim=2, horizon=5) for i in range(6)}
+    orchestrator = OMADOrchestrator(agents)
+
+    result = orchestrator.step("query")
+
+    assert set(result["individual_trajectories"]) == set(agents)
+    for traj in result["individual_trajectories"].values():
+        assert traj.shape == (5, 2)
+    assert result["consensus_path"].shape == (5, 2)
+
+def _grouped_orchestrator(**kwargs):
+    metadata = [
+        {"id": "m1", "morphology": "math"},
+        {"id": "m2", "morphology": "math"},
+        {"id": "m3", "morphology": "math"},
+        {"id": "c1", "morphology": "coding"},
+    ]
+    agents = {m["id"]: DiffusionPolicy(action_dim=1, horizon=2) for m in metadata}
+    return OMADOrchestrator(agents, agent_metadata=metadata, alpha=0.0, **kwargs)
+
+GROUPED_TRAJECTORIES = {
+    "m1": np.array([[0.1], [0.1]]),
+    "m2": np.array([[1.0], [1.0]]),
+    "m3": np.array([[3.0], [3.0]]),
+    "c1": np.array([[0.5], [0.5]]),
+}
+
+def test_unknown_consensus_strategy():
+    with pytest.raises(ValueError):
+        OMADOrchestrator({}, consensus_strategy="vote")
+
+def test_topk_consensus():
+    orchestrator = _grouped_orchestrator(consensus_strategy="topk", top_k=1)
+    consensus = orchestrator.coordinate(GROUPED_TRAJECTORIES)
+
+    # Highest value (closest to zero) wins in each group: m1 and c1.
+    # The coding group scores higher, so it alone forms the global consensus.
+    assert np.allclose(consensus, 0.5)
+
+def test_softmax_consensus_favours_high_scores():
+    mean_consensus = _grouped_orchestrator().coordinate(GROUPED_TRAJECTORIES)
+    softmax_consensus = _grouped_orchestrator(
+        consensus_strategy="softmax", temperature=0.5
+    ).coordinate(GROUPED_TRAJECTORIES)
+
+    # Down-weighting the poorly scoring m3 pulls the consensus towards zero
+    assert np.all(np.abs(softmax_consensus) < np.abs(mean_consensus))
+
+def test_medoid_consensus():
+    orchestrator = _grouped_orchestrator(consensus_strategy="medoid")
+    consensus = orchestrator.coordinate(GROUPED_TRAJECTORIES)
+
+    # Group medoids are m2 (1.0) and c1 (0.5); between two groups the first wins the tie
+    assert np.allclose(consensus, 1.0)
@@ -0,0 +1,61 @@
+import json
+import threading
+
+from src.integrated_loop import IntegratedAdversarialLoop
+from src.profiling import DISABLED, Profiler
+
+def test_span_statistics_and_histogram():
+    profiler = Profiler()
+    for start, end in [(0, 500), (0, 1_500), (0, 3_000_000)]:
+        profiler.record("stage", start, end)
+    stats = profiler.summary()["stage"]
+    assert stats["count"] == 3
+    assert stats["min_us"] == 0.5 and stats["max_us"] == 3000.0
+    assert stats["histogram_us"] == {"<1": 1, "<2": 1, "<4096": 1}
+    assert stats["p50_us"] == 2.0
+
+def test_disabled_profiler_records_nothing():
+    with DISABLED.span("noop"):
+        pass
+    assert DISABLED.summary() == {}
+
+def test_spans_from_threads_and_event_cap():
+    profiler = Profiler(max_events=10)
+
+    def work():
+        for _ in range(50):
+            with profiler.span("worker"):
+                pass
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert profiler.summary()["worker"]["count"] == 200
+    assert len(profiler.chrome_trace()["traceEvents"]) == 10
+    assert profiler.dropped_events == 190
+
+def test_loop_stages_and_exports(tmp_path):
+    profiler = Profiler()
+    configs = [{"id": "a1", "domain": "law"}, {"id": "a2", "domain": "ethics"}]
+    IntegratedAdversarialLoop(configs, "Reference", max_iterations=2, profiler=profiler).run_iteration("Query")
+
+    summary = profiler.summary()
+    assert summary["loop.iteration"]["count"] == 2
+    assert summary["agent.generate_response"]["count"] == 4
+    assert summary["generator.generate_question"]["count"] == 2
+    for stage in ("omad.step", "omad.sample", "omad.coordinate", "env.process_query", "env.retrieve", "env.blackboard_render"):
+        assert stage in summary
+
+    profiler.export_json(str(tmp_path / "profile.json"))
+    profiler.export_chrome_trace(str(tmp_path / "trace.json"))
+    with open(tmp_path / "profile.json") as f:
+        assert "loop.iteration" in json.load(f)["stages"]
+    with open(tmp_path / "trace.json") as f:
+        events = json.load(f)["traceEvents"]
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in events)
+    # Nested spans lie within their parent iteration
+    iteration = next(e for e in events if e["name"] == "loop.iteration")
+    step = next(e for e in events if e["name"] == "omad.step")
+    assert iteration["ts"] <= step["ts"] and step["ts"] + step["dur"] <= iteration["ts"] + iteration["dur"]
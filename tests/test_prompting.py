@@ -0,0 +1,120 @@
+import pytest
+
+from src.adversarial_gen import AdversarialGenerator
+from src.blackboard import estimate_tokens
+from src.prompting import COT_PROMPT, TRUNCATION_MARKER, PromptTemplate, Slot, truncate_to_tokens
+from src.reasoning_agent import DomainReasoningAgent
+
+def test_truncate_keep_modes():
+    text = "HEAD " + "x" * 400 + " TAIL"
+    head = truncate_to_tokens(text, 20, keep="head")
+    tail = truncate_to_tokens(text, 20, keep="tail")
+    middle = truncate_to_tokens(text, 20, keep="middle")
+    for result in (head, tail, middle):
+        assert estimate_tokens(result) <= 20
+        assert TRUNCATION_MARKER in result
+    assert head.startswith("HEAD")
+    assert tail.endswith("TAIL")
+    assert middle.startswith("HEAD") and middle.endswith("TAIL")
+    assert truncate_to_tokens("short", 20) == "short"
+    with pytest.raises(ValueError):
+        truncate_to_tokens(text, 20, keep="sides")
+
+def test_static_segments_are_counted_once():
+    template = PromptTemplate("Intro text. {a} middle {b} end.")
+    assert [field for _, field in template.segments] == ["a", "b", None]
+    assert template.static_tokens == sum(estimate_tokens(lit) for lit, _ in template.segments)
+    assembled = template.render({"a": "alpha", "b": "beta"})
+    assert assembled.text == "Intro text. alpha middle beta end."
+    assert assembled.token_count == template.static_tokens + estimate_tokens("alpha") + estimate_tokens("beta")
+    assert assembled.truncated == {}
+
+def test_lowest_priority_slot_truncated_first():
+    template = PromptTemplate(
+        "{important}\n{filler}",
+        slots={"important": Slot(priority=2), "filler": Slot(priority=1)}
+    )
+    important = "keep me intact " * 10
+    assembled = template.render({"important": important, "filler": "y" * 2000}, token_budget=100)
+    assert assembled.token_count <= 100
+    assert important in assembled.text
+    assert set(assembled.truncated) == {"filler"}
+
+def test_floors_are_released_when_needed():
+    template = PromptTemplate(
+        "{a}{b}",
+        slots={"a": Slot(priority=1, min_tokens=50), "b": Slot(priority=2, min_tokens=50)}
+    )
+    assembled = template.render({"a": "a" * 800, "b": "b" * 800}, token_budget=60)
+    assert assembled.token_count <= 60
+
+def test_agent_prompt_fits_budget_and_keeps_question():
+    agent = DomainReasoningAgent(domain="legal", prompt_token_budget=300)
+    blackboard = "\n\n".join(f"[law]: entry {i} " + "words " * 40 for i in range(50))
+    query = f"Query: What is consideration?\n\nShared Blackboard:\n{blackboard}"
+    prompt = agent._build_cot_prompt(query, "retrieved context " * 200)
+
+    assert agent.last_prompt_tokens <= 300
+    assert "What is consideration?" in prompt
+    assert "entry 49" in prompt
+    assert "Chain-of-Thought" in prompt
+
+def test_unbudgeted_prompts_are_untruncated():
+    agent = DomainReasoningAgent(domain="medical")
+    prompt = agent._build_cot_prompt("q" * 5000, "context")
+    assert "q" * 5000 in prompt
+    assert agent.last_prompt_tokens == COT_PROMPT.render(
+        {"domain": "medical", "context": "context", "query": "q" * 5000}
+    ).token_count
+
+def test_generator_truncates_target_response_first():
+    generator = AdversarialGenerator(prompt_token_budget=200)
+    prompt = generator._build_adversarial_prompt("Original?", "old " * 1000 + "newest entry", "Expert view.")
+    assert generator.last_prompt_tokens <= 200
+    assert "Original?" in prompt
+    assert "Expert view." in prompt
+    assert "newest entry" in prompt
+
+# Pre-template prompt text, spelled out line by line so trailing spaces are explicit
+BASELINE_COT = "\n".join([
+    "",
+    "You are an expert assistant in the legal domain.",
+    "Use the following context to help answer the user's query.",
+    "",
+    "Context:",
+    "CTX",
+    "",
+    "User Query:",
+    "Q?",
+    "",
+    "Task:",
+    "Provide a detailed response using Chain-of-Thought reasoning. ",
+    "1. Break down the query into its core components.",
+    "2. Analyze each component based on the provided context and your domain expertise.",
+    "3. Synthesize the findings into a clear, professional answer.",
+    "",
+    "Reasoning:",
+    "",
+])
+
+BASELINE_ADVERSARIAL = "\n".join([
+    "",
+    "        Original Prompt: P",
+    "        ",
+    "        Target Model Response: T",
+    "        ",
+    "        Expert Model Reference: E",
+    "        ",
+    "        Task: Identify the semantic gaps, missing reasoning, or inaccuracies in the Target Model's response ",
+    "        compared to the Expert Model. Then, generate a follow-up \"adversarial\" question that would ",
+    "        force the model to confront these gaps directly.",
+    "        ",
+    "        Adversarial Question:",
+    "        ",
+])
+
+def test_templates_match_baseline_prompts_byte_for_byte():
+    cot = DomainReasoningAgent("legal")._build_cot_prompt("Q?", "CTX")
+    adversarial = AdversarialGenerator()._build_adversarial_prompt("P", "T", "E")
+    assert cot.encode("utf-8") == BASELINE_COT.encode("utf-8")
+    assert adversarial.encode("utf-8") == BASELINE_ADVERSARIAL.encode("utf-8")
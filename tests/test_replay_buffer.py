@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+from src.replay_buffer import ReplayBuffer
+from src.omad import OMADOrchestrator
+from src.diffusion import DiffusionPolicy
+
+def test_add_and_wraparound():
+    buffer = ReplayBuffer(capacity=3, trajectory_shape=(2, 1))
+    for i in range(5):
+        buffer.add(np.full((2, 1), i), context=f"ctx{i}")
+
+    assert len(buffer) == 3
+    # Rows 0 and 1 were overwritten by trajectories 3 and 4
+    assert sorted(buffer.trajectories[:, 0, 0].tolist()) == [2.0, 3.0, 4.0]
+    assert set(buffer.contexts) == {"ctx2", "ctx3", "ctx4"}
+
+def test_add_batch_wraps_in_one_write():
+    buffer = ReplayBuffer(capacity=4, trajectory_shape=(1,))
+    buffer.add_batch(np.arange(3).reshape(3, 1), context="a", sources=[0, 1, 2])
+    buffer.add_batch(np.arange(3, 6).reshape(3, 1), context="b")
+
+    assert len(buffer) == 4
+    assert buffer.position == 2
+    assert sorted(buffer.trajectories[:, 0].tolist()) == [2.0, 3.0, 4.0, 5.0]
+    assert buffer.sources[2] == 2
+    assert buffer.sources[0] == -1
+
+def test_uniform_sample_shapes():
+    buffer = ReplayBuffer(capacity=10, trajectory_shape=(3, 2))
+    buffer.add_batch(np.random.randn(6, 3, 2), context="q")
+    batch = buffer.sample(8, rng=np.random.default_rng(0))
+
+    assert batch["trajectories"].shape == (8, 3, 2)
+    assert np.all(batch["indices"] < 6)
+    assert list(batch["contexts"]) == ["q"] * 8
+    assert np.all(batch["weights"] == 1.0)
+
+def test_prioritized_sampling_prefers_high_priority():
+    buffer = ReplayBuffer(capacity=4, trajectory_shape=(1,), prioritized=True, priority_exponent=1.0)
+    buffer.add_batch(np.arange(4).reshape(4, 1), priorities=[1e-6, 1e-6, 1e-6, 1.0])
+    batch = buffer.sample(50, rng=np.random.default_rng(0))
+    assert np.all(batch["indices"] == 3)
+
+    buffer.update_priorities(np.array([3]), np.array([1e-6]))
+    buffer.update_priorities(np.array([0]), np.array([1.0]))
+    assert np.all(buffer.sample(50, rng=np.random.default_rng(0))["indices"] == 0)
+
+def test_empty_sample_raises():
+    with pytest.raises(ValueError):
+        ReplayBuffer(capacity=2, trajectory_shape=(1,)).sample(1)
+
+def test_memmap_storage(tmp_path):
+    buffer = ReplayBuffer(capacity=4, trajectory_shape=(2,), memmap_dir=str(tmp_path))
+    buffer.add_batch(np.ones((2, 2)))
+    buffer.flush()
+
+    stored = np.load(tmp_path / "trajectories.npy", mmap_mode="r")
+    assert stored.shape == (4, 2)
+    assert np.all(stored[:2] == 1.0)
+
+def test_state_round_trip_after_wraparound():
+    buffer = ReplayBuffer(capacity=4, trajectory_shape=(1,), prioritized=True)
+    buffer.add_batch(np.arange(3).reshape(3, 1), context="a", priorities=[1, 2, 3], sources=[0, 1, 2])
+    buffer.add_batch(np.arange(3, 6).reshape(3, 1), context="a", priorities=[4, 5, 6])
+    metadata, arrays = buffer.get_state()
+
+    restored = ReplayBuffer(capacity=4, trajectory_shape=(1,), prioritized=True)
+    restored.set_state(metadata, arrays)
+    assert (restored.position, restored.size, restored.max_priority) == (2, 4, 6.0)
+    np.testing.assert_array_equal(restored.trajectories, buffer.trajectories)
+    np.testing.assert_array_equal(restored.sources, buffer.sources)
+    assert list(restored.contexts) == ["a"] * 4
+
+    with pytest.raises(ValueError):
+        ReplayBuffer(capacity=8, trajectory_shape=(1,)).set_state(metadata, arrays)
+
+def test_orchestrator_records_steps():
+    agents = {f"a{i}": DiffusionPolicy(action_dim=2, horizon=3) for i in range(3)}
+    orchestrator = OMADOrchestrator(agents, replay_capacity=16)
+
+    orchestrator.step("query")
+    orchestrator.step("query")
+
+    buffer = orchestrator.replay_buffers[(3, 2)]
+    # 3 individual trajectories + 1 consensus per step
+    assert len(buffer) == 8
+    assert np.sum(buffer.sources[:8] == -1) == 2
+
+def test_orchestrator_online_updates():
+    agents = {f"a{i}": DiffusionPolicy(action_dim=1, horizon=2, trainable=True, batch_size=4) for i in range(2)}
+    orchestrator = OMADOrchestrator(agents, replay_capacity=32, online_updates=True)
+
+    before = [agent.score_network.weights[-1].copy() for agent in agents.values()]
+    for _ in range(3):
+        orchestrator.step("query")
+
+    for agent, weights in zip(agents.values(), before):
+        assert not np.array_equal(agent.score_network.weights[-1], weights)
@@ -0,0 +1,57 @@
+import gzip
+import pytest
+
+from src.reporting import JSONLReportWriter, create_report_writer, read_jsonl_report, report_filename
+
+RECORDS = [{"type": "run", "run_id": i, "final_gap": 0.5 - i / 100} for i in range(10)]
+
+@pytest.mark.parametrize("codec", [None, "gzip", "zstd"])
+def test_roundtrip(tmp_path, codec):
+    if codec == "zstd":
+        pytest.importorskip("zstandard")
+    path = str(tmp_path / report_filename("Test_eval", codec))
+    with JSONLReportWriter(path, codec=codec, checkpoint_every=3) as writer:
+        for record in RECORDS:
+            writer.write(record)
+    assert list(read_jsonl_report(path)) == RECORDS
+
+def test_records_are_compact_single_lines(tmp_path):
+    path = str(tmp_path / "report.jsonl")
+    with JSONLReportWriter(path) as writer:
+        writer.write({"a": 1, "b": [1, 2]})
+    with open(path) as f:
+        assert f.read() == '{"a":1,"b":[1,2]}\n'
+
+def test_report_writers_never_share_a_file(tmp_path):
+    first = create_report_writer(str(tmp_path), "Test_eval_20260101_120000")
+    second = create_report_writer(str(tmp_path), "Test_eval_20260101_120000")
+    assert first.path != second.path
+    assert second.path.endswith("Test_eval_20260101_120000_1.jsonl")
+    with first, second:
+        first.write({"run": 1})
+        second.write({"run": 2})
+    assert list(read_jsonl_report(first.path)) == [{"run": 1}]
+    assert list(read_jsonl_report(second.path)) == [{"run": 2}]
+
+    with pytest.raises(FileExistsError):
+        JSONLReportWriter(first.path, exclusive=True)
+
+def test_partial_gzip_report_readable_after_checkpoint(tmp_path):
+    path = str(tmp_path / "partial.jsonl.gz")
+    writer = JSONLReportWriter(path, codec="gzip", checkpoint_every=4)
+    for record in RECORDS[:6]:
+        writer.write(record)
+    # Only the first checkpointed chunk is on disk while the writer is open
+    assert list(read_jsonl_report(path)) == RECORDS[:4]
+    writer.close()
+    assert list(read_jsonl_report(path)) == RECORDS[:6]
+
+    # Appending adds another gzip member to the same file
+    with JSONLReportWriter(path, codec="gzip") as writer:
+        writer.write(RECORDS[6])
+    with gzip.open(path, "rt") as f:
+        assert len(f.readlines()) == 7
+
+def test_unknown_codec(tmp_path):
+    with pytest.raises(ValueError):
+        JSONLReportWriter(str(tmp_path / "x.jsonl"), codec="brotli")
@@ -0,0 +1,122 @@
+import asyncio
+import shutil
+import pytest
+
+from src.evaluation import Evaluator
+from src.response_cache import CachingClient, LRUCache, SQLiteCache, cache_key
+
+class CountingClient:
+    model_id = "mock-model"
+
+    def __init__(self):
+        self.calls = 0
+        self.batch_sizes = []
+
+    def generate(self, prompt):
+        self.calls += 1
+        return f"response to {len(prompt)} chars"
+
+    def generate_batch(self, prompts):
+        self.batch_sizes.append(len(prompts))
+        return [self.generate(p) for p in prompts]
+
+def test_cache_key_depends_on_model_and_params():
+    base = cache_key("prompt", "model-a", {"temperature": 0.0})
+    assert base == cache_key("prompt", "model-a", {"temperature": 0.0})
+    assert base != cache_key("prompt", "model-b", {"temperature": 0.0})
+    assert base != cache_key("prompt", "model-a", {"temperature": 0.7})
+    assert base != cache_key("other", "model-a", {"temperature": 0.0})
+
+def test_lru_evicts_least_recently_used():
+    lru = LRUCache(max_entries=2)
+    lru.put("a", "1")
+    lru.put("b", "2")
+    assert lru.get("a") == "1"
+    lru.put("c", "3")
+    assert lru.get("b") is None
+    assert lru.get("a") == "1"
+    assert len(lru) == 2
+
+def test_caching_client_counts_hits_and_misses():
+    backend = CountingClient()
+    client = CachingClient(backend, sampling_params={"temperature": 0.0})
+
+    assert client.generate("hello") == client.generate("hello")
+    assert backend.calls == 1
+    stats = client.stats()
+    assert stats["misses"] == 1
+    assert stats["memory_hits"] == 1
+    assert stats["hit_rate"] == 0.5
+
+    assert asyncio.run(client.agenerate("hello")) == "response to 5 chars"
+    assert backend.calls == 1
+
+def test_generate_batch_forwards_only_misses():
+    backend = CountingClient()
+    client = CachingClient(backend)
+    client.generate("a")
+    results = client.generate_batch(["a", "bb", "ccc"])
+    assert results == ["response to 1 chars", "response to 2 chars", "response to 3 chars"]
+    assert backend.batch_sizes == [2]
+
+def test_disk_tier_persists_and_evicts_by_size(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    backend = CountingClient()
+    client = CachingClient(backend, disk_path=path)
+    client.generate("persisted prompt")
+    client.close()
+
+    # A fresh client (empty memory tier) is served from disk
+    reopened = CachingClient(backend, disk_path=path)
+    reopened.generate("persisted prompt")
+    assert backend.calls == 1
+    assert reopened.stats()["disk_hits"] == 1
+    reopened.close()
+
+    disk = SQLiteCache(str(tmp_path / "small.sqlite"), max_bytes=10)
+    disk.put("old", "12345678")
+    disk.put("new", "abcdefgh")
+    assert disk.get("old") is None
+    assert disk.get("new") == "abcdefgh"
+    assert disk.total_bytes <= 10
+    disk.close()
+
+def test_disk_hits_batch_access_time_writes(tmp_path):
+    disk = SQLiteCache(str(tmp_path / "cache.sqlite"), max_bytes=20, access_batch_size=2)
+    disk.put("a", "12345678")
+    disk.put("b", "abcdefgh")
+    changes = disk._conn.total_changes
+    assert disk.get("a") == "12345678"
+    assert disk.get("a") == "12345678"
+    # Hits are buffered, not written
+    assert disk._conn.total_changes == changes
+
+    # The buffered access still protects "a" from eviction
+    disk.put("c", "ABCDEFGH")
+    assert disk.get("b") is None
+    assert disk.get("a") == "12345678"
+
+    # A full batch of distinct keys is written at once
+    disk.get("c")
+    assert disk._pending_access == {}
+    disk.close()
+
+def test_rerunning_evaluation_is_served_from_cache():
+    results_dir = "test_cache_results"
+    backend = CountingClient()
+    evaluator = Evaluator(results_dir=results_dir, model_client=CachingClient(backend))
+    items = [{
+        "query": "Test query",
+        "expert_reference": "Test reference",
+        "domain_configs": [{"id": "agent1", "domain": "test"}]
+    }]
+    try:
+        first = evaluator.run_evaluation("CacheDomain", items, max_iterations=2, num_runs=1)
+        calls_after_first = backend.calls
+        assert calls_after_first > 0
+
+        second = evaluator.run_evaluation("CacheDomain", items, max_iterations=2, num_runs=1)
+        assert backend.calls == calls_after_first
+        assert second["results"][0]["runs"] == first["results"][0]["runs"]
+    finally:
+        shutil.rmtree(results_dir, ignore_errors=True)
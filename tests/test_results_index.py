@@ -0,0 +1,73 @@
+import json
+import os
+import pytest
+
+from src.reporting import JSONLReportWriter
+from src.results_index import ResultsIndex
+
+def make_report(domain, improvements):
+    runs = [
+        {"run_id": i, "seed": i, "initial_gap": 0.8, "final_gap": 0.8 - imp, "improvement": imp,
+         "queries_to_target": 2, "iterations": 3, "stop_reason": "max_iterations"}
+        for i, imp in enumerate(improvements)
+    ]
+    return {
+        "domain": domain,
+        "timestamp": f"2026-01-0{len(improvements)}T00:00:00",
+        "results": [{
+            "query": "q",
+            "avg_accuracy_improvement": sum(improvements) / len(improvements),
+            "convergence_stability": 0.01,
+            "avg_sample_efficiency": 2.0,
+            "runs": runs
+        }]
+    }
+
+@pytest.fixture
+def results_dir(tmp_path):
+    with open(tmp_path / "Legal_eval_1.json", "w") as f:
+        json.dump(make_report("Legal", [0.2, 0.4]), f)
+    report = make_report("Legal", [0.1, 0.3, 0.5])
+    with JSONLReportWriter(str(tmp_path / "Legal_eval_2.jsonl.gz"), codec="gzip") as writer:
+        writer.write({"type": "header", "domain": "Legal", "timestamp": report["timestamp"]})
+        item = report["results"][0]
+        for run in item.pop("runs"):
+            writer.write(dict(run, type="run", item_index=0))
+        writer.write(dict(item, type="item", item_index=0))
+    with open(tmp_path / "Medical_eval_1.json", "w") as f:
+        json.dump(make_report("Medical", [0.6]), f)
+    return tmp_path
+
+def test_ingest_and_aggregate(results_dir):
+    index = ResultsIndex(str(results_dir / "index.sqlite"))
+    assert index.ingest(str(results_dir)) == 3
+
+    summary = {row["domain"]: row for row in index.domain_summary()}
+    assert summary["Legal"]["reports"] == 2
+    assert summary["Legal"]["runs"] == 5
+    assert summary["Legal"]["avg_improvement"] == pytest.approx(0.3)
+    assert summary["Medical"]["avg_sample_efficiency"] == pytest.approx(2.0)
+
+    reports = index.report_summaries(domain="Legal")
+    assert [r["path"].endswith(".jsonl.gz") for r in reports] == [True, False]
+    index.close()
+
+def test_ingest_is_incremental(results_dir):
+    index = ResultsIndex(str(results_dir / "index.sqlite"))
+    index.ingest(str(results_dir))
+    assert index.ingest(str(results_dir)) == 0
+
+    with open(results_dir / "Medical_eval_2.json", "w") as f:
+        json.dump(make_report("Medical", [0.2, 0.2]), f)
+    os.remove(results_dir / "Legal_eval_1.json")
+    assert index.ingest(str(results_dir)) == 1
+    assert len(index) == 3
+    assert {r["domain"]: r["reports"] for r in index.domain_summary()} == {"Legal": 1, "Medical": 2}
+    index.close()
+
+def test_unreadable_report_is_skipped(results_dir):
+    (results_dir / "Broken_eval_1.json").write_text("{not json")
+    index = ResultsIndex(str(results_dir / "index.sqlite"))
+    assert index.ingest(str(results_dir)) == 3
+    assert len(index) == 3
+    index.close()
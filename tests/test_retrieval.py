@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from src.reasoning_agent import DomainReasoningAgent
+from src.retrieval import BM25Index, DenseIndex, PassageStore, RetrievalCache, Retriever, normalize_query, tokenize
+
+CORPUS = [
+    "Force majeure clauses excuse performance after unforeseeable events.",
+    "Gross negligence is never excused by a limitation of liability clause.",
+    "Hypertension is a contraindication for several decongestant drugs.",
+    "Acute renal failure risk rises with NSAIDs in hypertensive patients.",
+]
+
+def test_tokenize_lowercases_words():
+    assert tokenize("Force-Majeure, clause!") == ["force", "majeure", "clause"]
+
+def test_bm25_ranks_matching_passage_first():
+    index = BM25Index.build(CORPUS)
+    hits = index.search("liability and gross negligence", k=2)
+    assert hits[0][0] == 1
+    assert len(hits) <= 2
+    assert index.search("unrelated zebra", k=3) == []
+
+def test_bm25_csr_layout_matches_document_frequencies():
+    index = BM25Index.build(["a b a", "b c"])
+    df = np.diff(index.indptr)
+    vocab = index.vocabulary
+    assert df[vocab["a"]] == 1
+    assert df[vocab["b"]] == 2
+    assert index.num_docs == 2
+
+def test_bm25_scores_every_document():
+    index = BM25Index.build(["a b a", "b c", "d"])
+    scores = index.scores("a b")
+    assert scores.shape == (3,)
+    vocab = index.vocabulary
+    expected = np.zeros(3)
+    for term in ("a", "b"):
+        t = vocab[term]
+        lo, hi = index.indptr[t], index.indptr[t + 1]
+        np.add.at(expected, index.doc_ids[lo:hi], index.impacts[lo:hi])
+    np.testing.assert_allclose(scores, expected)
+    assert scores[2] == 0.0
+    assert [doc for doc, _ in index.search("a b", k=3)] == [0, 1]
+
+def test_dense_index_finds_similar_passage():
+    index = DenseIndex.build(CORPUS)
+    hits = index.search("renal failure in hypertensive patients", k=1)
+    assert hits[0][0] == 3
+    np.testing.assert_allclose(np.linalg.norm(index.embeddings, axis=1), 1.0, atol=1e-5)
+
+def test_passage_store_roundtrip():
+    store = PassageStore.from_passages(["plain", "ünïcode text", ""])
+    assert len(store) == 3
+    assert store[1] == "ünïcode text"
+    assert store[2] == ""
+
+def test_retriever_save_and_memmapped_load(tmp_path):
+    retriever = Retriever.from_passages(CORPUS, use_bm25=True, use_dense=True)
+    expected = retriever.search("force majeure events", k=2)
+    retriever.save(str(tmp_path))
+
+    loaded = Retriever.load(str(tmp_path))
+    assert isinstance(loaded.bm25.doc_ids, np.memmap)
+    assert isinstance(loaded.dense.embeddings, np.memmap)
+    assert loaded.search("force majeure events", k=2) == expected
+    assert expected[0][0] == CORPUS[0]
+
+def test_retriever_requires_an_index():
+    with pytest.raises(ValueError):
+        Retriever(PassageStore.from_passages(CORPUS))
+
+def test_agent_uses_retriever_for_context():
+    agent = DomainReasoningAgent(domain="medical", retriever=Retriever.from_passages(CORPUS), retrieval_k=1)
+    context = agent._retrieve_context("contraindications with hypertension")
+    assert context == f"[1] {CORPUS[2]}"
+
+    response = agent.generate_response("contraindications with hypertension")
+    assert CORPUS[2] in response
+
+def test_retrieval_cache_keys_on_domain_and_normalized_query():
+    cache = RetrievalCache(max_entries=8)
+    calls = []
+    retrieve = lambda q: calls.append(q) or f"ctx for {q}"
+
+    first = cache.get_or_retrieve("Legal", "What is a Contract?", retrieve)
+    second = cache.get_or_retrieve("legal", "what is a contract", retrieve)
+    assert first == second
+    assert len(calls) == 1
+    cache.get_or_retrieve("medical", "what is a contract", retrieve)
+    assert len(calls) == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+    # A different index or passage count is a different lookup
+    cache.get_or_retrieve("legal", "what is a contract", retrieve, retriever_id=0, k=3)
+    cache.get_or_retrieve("legal", "what is a contract", retrieve, retriever_id=0, k=1)
+    cache.get_or_retrieve("legal", "what is a contract", retrieve, retriever_id=1, k=1)
+    assert len(calls) == 5
+    assert normalize_query("  What is a Contract? ") == "what is a contract"
@@ -0,0 +1,114 @@
+import pytest
+import numpy as np
+from src.diffusion import DiffusionPolicy
+from src.schedulers import (
+    ConstantStepScheduler,
+    DDIMScheduler,
+    DDPMScheduler,
+    DPMSolverScheduler,
+    get_scheduler,
+)
+
+def gaussian_score(mean):
+    # Exact score of x_t when the data distribution is a point mass at `mean`
+    def score_fn_factory(scheduler):
+        def score_fn(x, t):
+            return -(x - scheduler.alphas[t] * mean) / scheduler.sigmas[t] ** 2
+        return score_fn
+    return score_fn_factory
+
+def zero_noise(shape):
+    return np.zeros(shape)
+
+def test_schedule_tables():
+    scheduler = DDPMScheduler(num_train_timesteps=20)
+    assert scheduler.alphas.shape == (20,)
+    assert np.all(np.diff(scheduler.alphas) < 0)
+    assert np.allclose(scheduler.alphas ** 2 + scheduler.sigmas ** 2, 1.0)
+    assert np.all(np.diff(scheduler.lambdas) < 0)
+
+def test_ddim_strided_timesteps():
+    scheduler = DDIMScheduler(num_train_timesteps=100, num_inference_steps=10)
+    assert len(scheduler.timesteps) == 10
+    assert scheduler.timesteps[0] == 99
+    assert np.all(np.diff(scheduler.timesteps) < 0)
+
+    scheduler.set_timesteps(4)
+    assert len(scheduler.timesteps) == 4
+
+def test_ddpm_visits_every_timestep():
+    with pytest.warns(UserWarning, match="cannot skip timesteps"):
+        scheduler = DDPMScheduler(num_train_timesteps=30, num_inference_steps=5)
+    assert len(scheduler.timesteps) == 30
+    assert scheduler.num_inference_steps == 30
+
+def test_constant_scheduler_warns_on_inference_steps():
+    with pytest.warns(UserWarning, match="cannot skip timesteps"):
+        scheduler = ConstantStepScheduler(num_train_timesteps=10, num_inference_steps=3)
+    assert len(scheduler.timesteps) == 10
+
+@pytest.mark.parametrize("scheduler", [
+    DDPMScheduler(num_train_timesteps=50),
+    DDIMScheduler(num_train_timesteps=50, num_inference_steps=10),
+    DPMSolverScheduler(num_train_timesteps=50, num_inference_steps=5),
+])
+def test_samplers_recover_point_mass(scheduler):
+    mean = np.array([[1.5, -0.5]])
+    score_fn = gaussian_score(mean)(scheduler)
+    x = np.random.randn(8, 1, 2) * scheduler.sigmas[-1]
+
+    out = scheduler.sample(x, score_fn, zero_noise)
+
+    assert np.allclose(out, mean, atol=1e-3)
+
+@pytest.mark.parametrize("beta_schedule", ["linear", "cosine"])
+@pytest.mark.parametrize("num_train_timesteps", [5, 20])
+def test_short_schedules_keep_signal(num_train_timesteps, beta_schedule):
+    scheduler = DDPMScheduler(num_train_timesteps=num_train_timesteps, beta_schedule=beta_schedule)
+    assert scheduler.betas.max() <= scheduler.max_beta
+    assert scheduler.alphas_cumprod[-1] > 1e-3
+
+@pytest.mark.parametrize("name", ["ddpm", "ddim", "dpm_solver"])
+def test_default_policy_sample_magnitude(name):
+    # Default num_diffusion_steps with the mock score must not blow up
+    policy = DiffusionPolicy(action_dim=2, horizon=3, scheduler=name, rng=np.random.default_rng(0))
+    samples = policy.sample_batch(["ctx"], num_samples=64)
+    assert np.all(np.isfinite(samples))
+    assert np.abs(samples).max() < 10.0
+
+def test_constant_scheduler_matches_legacy_loop():
+    scheduler = ConstantStepScheduler(num_train_timesteps=3)
+    x = np.ones((2, 2))
+    out = scheduler.sample(x, lambda x_t, t: -0.1 * x_t, zero_noise)
+    assert np.allclose(out, 0.99 ** 3)
+
+def test_unknown_scheduler():
+    with pytest.raises(ValueError):
+        get_scheduler("euler")
+
+@pytest.mark.parametrize("steps", [0, -1])
+def test_non_positive_inference_steps_rejected(steps):
+    with pytest.raises(ValueError, match="num_inference_steps"):
+        DDIMScheduler(num_train_timesteps=10, num_inference_steps=steps)
+
+def test_policy_with_step_skipping_scheduler():
+    policy = DiffusionPolicy(action_dim=2, horizon=3, num_diffusion_steps=50,
+                             scheduler="ddim", num_inference_steps=5)
+    calls = []
+    original = policy.score_model
+    policy.score_model = lambda x, t, ctx: calls.append(t) or original(x, t, ctx)
+
+    samples = policy.sample_batch(["ctx"], num_samples=2)
+
+    assert samples.shape == (1, 2, 3, 2)
+    assert len(calls) == 5
+
+    policy.set_inference_steps(2)
+    calls.clear()
+    policy.sample_action("ctx")
+    assert len(calls) == 2
+
+def test_fusion_key_includes_scheduler():
+    ddim = DiffusionPolicy(num_diffusion_steps=10, scheduler="ddim", num_inference_steps=2)
+    default = DiffusionPolicy(num_diffusion_steps=10)
+    assert ddim.fusion_key() != default.fusion_key()
@@ -0,0 +1,116 @@
+import pytest
+import numpy as np
+from src.score_network import ScoreNetwork
+
+def test_forward_shape_and_zero_init():
+    net = ScoreNetwork(input_dim=6, hidden_dim=16, context_dim=8, seed=0)
+    inputs = np.random.randn(5, 6 + net.time_embed_dim + net.context_dim)
+    out = net.forward(inputs)
+    assert out.shape == (5, 6)
+    # Output layer starts at zero
+    assert np.allclose(out, 0.0)
+
+def test_context_embedding_is_deterministic_and_cached():
+    net = ScoreNetwork(input_dim=2, context_dim=16)
+    emb1 = net.embed_context("contract liability clause")
+    emb2 = net.embed_context("contract liability clause")
+    assert emb1 is emb2
+    assert np.isclose(np.linalg.norm(emb1), 1.0)
+    assert net.embed_contexts(["a", "b"]).shape == (2, 16)
+
+def test_train_step_reduces_loss():
+    net = ScoreNetwork(input_dim=4, hidden_dim=32, context_dim=4, learning_rate=1e-2, seed=0)
+    rng = np.random.default_rng(0)
+    inputs = rng.standard_normal((64, 4 + net.time_embed_dim + 4))
+    target = np.tanh(inputs[:, :4])
+
+    first = net.train_step(inputs, target)
+    for _ in range(200):
+        last = net.train_step(inputs, target)
+    assert last < first * 0.5
+
+def test_stacked_forward_matches_individual():
+    nets = [ScoreNetwork(input_dim=3, hidden_dim=8, context_dim=4, seed=i) for i in range(3)]
+    for net in nets:
+        # Give the output layer non-zero weights
+        net.weights[-1] = np.random.randn(*net.weights[-1].shape)
+    inputs = np.random.randn(3, 7, 3 + nets[0].time_embed_dim + 4)
+
+    weights, biases = ScoreNetwork.stack_parameters(nets)
+    stacked = ScoreNetwork.forward_with(weights, biases, inputs)
+
+    for i, net in enumerate(nets):
+        assert np.allclose(stacked[i], net.forward(inputs[i]))
+
+def test_state_round_trip():
+    net = ScoreNetwork(input_dim=3, seed=1)
+    other = ScoreNetwork(input_dim=3, seed=2)
+    other.set_state(net.get_state())
+    inputs = np.random.randn(2, 3 + net.time_embed_dim + net.context_dim)
+    assert np.allclose(net.forward(inputs), other.forward(inputs))
+
+def test_state_round_trip_includes_adam_state():
+    rng = np.random.default_rng(0)
+    inputs = rng.standard_normal((8, 3 + 16 + 32))
+    target = rng.standard_normal((8, 3))
+    net = ScoreNetwork(input_dim=3, seed=1)
+    net.train_step(inputs, target)
+    other = ScoreNetwork(input_dim=3, seed=2)
+    other.set_state(net.get_state())
+    assert other._adam_t == 1
+
+    # Continuing from the restored optimizer matches continuing the original
+    np.testing.assert_array_equal(net.train_step(inputs, target), other.train_step(inputs, target))
+    for a, b in zip(net.parameters(), other.parameters()):
+        np.testing.assert_array_equal(a, b)
+
+    # Parameter-only states reset the optimizer
+    params_only = {k: v for k, v in net.get_state().items() if k[0] in "wb"}
+    other.set_state(params_only)
+    assert other._adam_t == 0 and not any(m.any() for m in other._adam_m)
+
+def test_odd_time_embedding_rejected():
+    with pytest.raises(ValueError):
+        ScoreNetwork(input_dim=2, time_embed_dim=5)
+
+def test_stacked_parameters_cached_until_update():
+    nets = [ScoreNetwork(input_dim=2, hidden_dim=8, context_dim=4, seed=i) for i in range(2)]
+    first = ScoreNetwork.stack_parameters(nets)
+    assert ScoreNetwork.stack_parameters(nets) is first
+
+    inputs = np.ones((4, 2 + nets[1].time_embed_dim + 4))
+    nets[1].train_step(inputs, np.ones((4, 2)))
+    weights, _ = ScoreNetwork.stack_parameters(nets)
+    assert weights is not first[0]
+    assert np.allclose(weights[-1][1], nets[1].weights[-1])
+
+def test_context_cache_is_bounded():
+    net = ScoreNetwork(input_dim=2, max_cached_contexts=2)
+    a = net.embed_context("a")
+    net.embed_context("b")
+    net.embed_context("a")
+    net.embed_context("c")
+    assert list(net._context_cache) == ["a", "c"]
+    assert net.embed_context("a") is a
+
+def test_gradient_norm_clipped():
+    net = ScoreNetwork(input_dim=2, hidden_dim=8, context_dim=4, max_grad_norm=1e-3, seed=0)
+    inputs = np.ones((4, 2 + net.time_embed_dim + 4))
+    net.train_step(inputs, np.full((4, 2), 1e6))
+    # Adam normalizes the step size; clipping must not produce non-finite moments
+    assert all(np.isfinite(m).all() for m in net._adam_m)
+    assert np.sqrt(sum(np.sum(np.square(m)) for m in net._adam_m)) <= 0.1 * 1e-3 + 1e-12
+
+def test_sample_weights_scale_per_row_loss():
+    rng = np.random.default_rng(0)
+    inputs = rng.standard_normal((4, 3 + 16 + 4))
+    target = rng.standard_normal((4, 3))
+    make = lambda: ScoreNetwork(input_dim=3, hidden_dim=8, context_dim=4, max_grad_norm=None, seed=0)
+
+    assert np.isclose(make().train_step(inputs, target, np.ones(4)), make().train_step(inputs, target))
+    # Zero-weighted rows do not contribute: Adam's first step matches training on the others
+    weighted, subset = make(), make()
+    weighted.train_step(inputs, target, np.array([1.0, 1.0, 0.0, 0.0]))
+    subset.train_step(inputs[:2], target[:2])
+    for a, b in zip(weighted.parameters(), subset.parameters()):
+        assert np.allclose(a, b)